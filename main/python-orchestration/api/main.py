@@ -2,19 +2,25 @@ from fastapi import (
     FastAPI,
     HTTPException,
     Depends,
+    Header,
+    Query,
     WebSocket,
     WebSocketDisconnect,
     status,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Tuple, Union
 from enum import Enum
 import asyncio
 import hashlib
+import hmac
 import os
 import json
+import logging
+import orjson
+import numpy as np
 from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
 
@@ -28,13 +34,59 @@ from services.blockchain_service import (
     KeyRecoveryService,
 )
 from services.eeg_service import (
+    ChecksumError,
+    EEGSample,
+    EEGEvent,
+    EEGChannel,
+    EEGDataType,
     EEGDataParser,
     EEGDataProcessor,
     EEGStreamBuffer,
-    process_hex_stream,
+    DownsampleMethod,
     create_eeg_processor,
     create_eeg_parser,
+    stream_layout,
 )
+from services.metrics_service import (
+    registry as metrics_registry,
+    stage_timer,
+    record_error,
+    METRICS_ENABLED,
+)
+from services.session_store import create_session_manager, event_to_dict
+from services.eeg_archive import (
+    RangeTooLongError,
+    create_archiver,
+    read_overview,
+    read_range,
+)
+from services.eeg_filter import create_filter_bank
+from services.eeg_resample import create_resampler_bank
+from services.eeg_spectral import spectral_cache
+from services.eeg_anomaly import create_anomaly_scheduler
+from services.eeg_coherence import create_coherence_bank
+from services.eeg_spectrogram import (
+    HeatmapDtype,
+    create_spectrogram_bank,
+    encode_heatmap,
+)
+from services.ingest_gateway import create_ingest_gateway
+from services.eeg_framing import FrameReassembler
+from services.eeg_codec import CODECS, encode_frame, decode_frame, negotiate_codec
+from services.profiler_service import (
+    ProfileManager,
+    ProfileRequestMiddleware,
+    create_profile_manager,
+)
+from services.eeg_wire import (
+    WireFormat,
+    MEDIA_TYPES,
+    negotiate_format,
+    to_columnar_json,
+    to_binary_frame,
+)
+
+logger = logging.getLogger(__name__)
 
 # ==================== MODELS ====================
 
@@ -50,6 +102,9 @@ class UploadRequest(BaseModel):
     data: str = Field(..., description="Base64 encoded EEG data")
     is_encrypted: bool = Field(True, description="Whether data is already encrypted")
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict)
+    codec: Optional[str] = Field(
+        None, description="Store an unencrypted EEG frame compressed with this codec"
+    )
 
 
 class UploadResponse(BaseModel):
@@ -117,6 +172,25 @@ class EEGProcessedData(BaseModel):
     events: List[Dict[str, Any]]
     stress_level: str
     stats: Dict[str, Any]
+    quality: Optional[Dict[str, Dict[str, Any]]] = None
+    data_type: str = "raw"
+
+
+def dumps_json(content: Any) -> bytes:
+    with stage_timer("serialization"):
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+class EEGJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, including NumPy arrays and scalars
+
+    Endpoints return it directly so FastAPI skips response_model validation
+    and jsonable_encoder; declared models then only document the schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
 
 
 # ==================== APP LIFETIME ====================
@@ -125,12 +199,52 @@ class EEGProcessedData(BaseModel):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    # Create shared EEG stream buffers
-    app.state.eeg_buffers = {}
+    # Create shared EEG stream buffers (in-process, or host-wide shared memory)
+    # behind the idle / memory-budget eviction policy
+    app.state.eeg_buffers = create_session_manager()
+    sweeper = asyncio.create_task(app.state.eeg_buffers.run())
+
+    # Per-session band-pass / notch state for the live display (SAVY_STREAM_FILTER)
+    app.state.filters = create_filter_bank(create_eeg_processor().filter_params)
+
+    # Mixed device rates resampled to one analysis rate (SAVY_ANALYSIS_RATE)
+    app.state.resamplers = create_resampler_bank()
+
+    # Rolling STFT columns for watched sessions (SAVY_SPECTROGRAM)
+    app.state.spectrograms = create_spectrogram_bank()
+
+    # Running channel-pair coherence for watched sessions (SAVY_COHERENCE)
+    app.state.coherence = create_coherence_bank()
+
+    # Seal live sessions into compressed chunks on IPFS (SAVY_ARCHIVE=1)
+    app.state.archiver = create_archiver(app.state.eeg_buffers, get_ipfs())
+    if app.state.archiver is not None:
+        archiving = asyncio.create_task(app.state.archiver.run())
+
+    # Batched anomaly scoring of all live sessions (SAVY_ANOMALY=1)
+    app.state.anomaly = create_anomaly_scheduler(
+        app.state.eeg_buffers, _emit_session_events
+    )
+    if app.state.anomaly is not None:
+        scoring = asyncio.create_task(app.state.anomaly.run())
+
+    # Device TLS ingest port feeding the same pipeline (SAVY_INGEST=1)
+    app.state.ingest = create_ingest_gateway(_ingest_frame)
+    if app.state.ingest is not None:
+        await app.state.ingest.start()
 
     yield
 
     # Cleanup
+    if app.state.ingest is not None:
+        await app.state.ingest.close()
+    if app.state.archiver is not None:
+        await app.state.archiver.drain()
+        archiving.cancel()
+    if app.state.anomaly is not None:
+        scoring.cancel()
+    sweeper.cancel()
+    app.state.eeg_buffers.close()
     app.state.eeg_buffers = {}
 
 
@@ -149,6 +263,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+profiles = create_profile_manager()
+app.add_middleware(ProfileRequestMiddleware, manager=profiles)
+
 
 # ==================== DEPENDENCIES ====================
 
@@ -176,18 +293,150 @@ def get_blockchain() -> BlockchainService:
     )
 
 
-def get_eeg_processor() -> EEGDataProcessor:
-    return create_eeg_processor()
-
-
 def get_eeg_parser() -> EEGDataParser:
     return create_eeg_parser()
 
 
+def get_wire_format(
+    wire_format: Optional[WireFormat] = Query(None, alias="format"),
+    accept: Optional[str] = Header(None),
+) -> WireFormat:
+    return negotiate_format(accept, wire_format)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    token = os.getenv("SAVY_ADMIN_TOKEN", "")
+    if not token:
+        raise HTTPException(status_code=404, detail="Debug endpoints disabled")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _display_samples(
+    session_id: str,
+    processor: EEGDataProcessor,
+    samples: List[EEGSample],
+    live: bool = True,
+) -> Tuple[List[EEGSample], EEGDataType]:
+    """
+    Samples as served to clients: filtered unless SAVY_STREAM_FILTER=0
+
+    Live blocks continue the session's filter state; buffered windows
+    (``live=False``) are filtered on their own.
+    """
+    filters = app.state.filters
+    if filters is None:
+        return samples, EEGDataType.RAW
+
+    layout = (processor.sampling_rate, processor.num_channels)
+    if live:
+        stream_filter = filters.get(session_id, *layout)
+    else:
+        stream_filter = filters.create(*layout)
+    return processor.filter_samples(samples, stream_filter), EEGDataType.FILTERED
+
+
+def _resample(
+    session_id: Optional[str], processor: EEGDataProcessor, samples: List[EEGSample]
+) -> Tuple[List[EEGSample], EEGDataProcessor]:
+    """
+    Samples at the analysis rate (SAVY_ANALYSIS_RATE) and a processor for it
+
+    Live blocks continue the session's resampler; without a session the
+    block is resampled on its own, through to its last sample. Unchanged
+    when resampling is off.
+    """
+    resamplers = app.state.resamplers
+    if resamplers is None:
+        return samples, processor
+
+    layout = (processor.sampling_rate, processor.num_channels)
+    if session_id is None:
+        resampler = resamplers.create(*layout)
+    else:
+        resampler = resamplers.get(session_id, *layout)
+    return (
+        processor.resample_samples(samples, resampler, final=session_id is None),
+        create_eeg_processor(resamplers.target_rate, processor.num_channels),
+    )
+
+
+def _update_live_views(
+    session_id: str, processor: EEGDataProcessor, samples: List[EEGSample]
+):
+    """Append a buffered block to the session's spectrogram and coherence"""
+    views = (
+        (app.state.spectrograms, EEGDataProcessor.update_spectrogram),
+        (app.state.coherence, EEGDataProcessor.update_coherence),
+    )
+    for bank, update in views:
+        state = bank.peek(session_id) if bank is not None else None
+        if state is None or not samples:
+            continue
+        if (state.sampling_rate, state.num_channels) != (
+            processor.sampling_rate,
+            processor.num_channels,
+        ):
+            # Layout changed; the next request starts over from the buffer
+            bank.discard(session_id)
+            continue
+        update(processor, samples, state)
+
+
+async def _watched_view(session_id: str, bank, update: Callable):
+    """
+    The session's state in a spectrogram or coherence bank
+
+    Made on first request from everything the session buffer holds; live
+    blocks extend it from then on.
+    """
+    state = bank.peek(session_id)
+    if state is None:
+        buffer = app.state.eeg_buffers[session_id]
+        samples, _ = await buffer.get_window(float("inf"))
+        processor = create_eeg_processor(*stream_layout(samples))
+        # No await between reading the buffer and registering the state,
+        # so no ingested block falls in between
+        state = bank.create(session_id, processor.sampling_rate, processor.num_channels)
+        update(processor, samples, state)
+    bank.touch(session_id)
+    return state
+
+
+def _parse_hex_frames(
+    parser: EEGDataParser, hex_data: str
+) -> Tuple[List[EEGSample], List[EEGEvent], EEGDataProcessor]:
+    """
+    Samples and events of every frame in a hex payload (one or several)
+
+    Also returns a processor for the frames' sampling rate and channels.
+    """
+    reassembler = FrameReassembler(initial_capacity=0)
+    frames = reassembler.feed_hex(hex_data)
+    if not frames or len(reassembler):
+        raise ValueError(f"Incomplete EEG frame ({len(reassembler)} bytes pending)")
+
+    layouts = {_frame_layout(parser.frame_header(frame)) for frame in frames}
+    if len(layouts) > 1:
+        raise ValueError(
+            "Frames in one request must share a sampling rate and channels"
+        )
+
+    samples, events = [], []
+    for frame in frames:
+        frame_samples, frame_events = parser.frame_to_samples(frame)
+        samples.extend(frame_samples)
+        events.extend(frame_events)
+    parser.drain_checksums()
+    return samples, events, create_eeg_processor(*layouts.pop())
+
+
+def _frame_layout(header: Dict[str, Any]) -> Tuple[int, int]:
+    return header["sampling_rate"], header["channels"]
+
+
 async def get_eeg_buffer(session_id: str) -> EEGStreamBuffer:
-    if session_id not in app.state.eeg_buffers:
-        app.state.eeg_buffers[session_id] = EEGStreamBuffer()
-    return app.state.eeg_buffers[session_id]
+    return app.state.eeg_buffers.get_or_create(session_id)
 
 
 # ==================== HEALTH ====================
@@ -203,6 +452,116 @@ async def health_check():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus text exposition of stage timers, I/O latency and live state
+
+    Metrics live in each worker process: with several uvicorn workers a
+    scrape reports only the worker that served it, so scrape each worker
+    (or run one) to see the whole host.
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+
+    return PlainTextResponse(
+        metrics_registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+def _buffer_sizes() -> Dict[tuple, float]:
+    buffers = getattr(app.state, "eeg_buffers", {})
+    sizes = [len(buffer) for buffer in buffers.values()]
+    return {
+        ("total",): float(sum(sizes)),
+        ("max",): float(max(sizes, default=0)),
+    }
+
+
+def _session_bytes() -> Dict[tuple, float]:
+    buffers = getattr(app.state, "eeg_buffers", None)
+    if not hasattr(buffers, "total_bytes"):
+        return {}
+    return {(): float(buffers.total_bytes())}
+
+
+def _archive_queue_depth() -> Dict[tuple, float]:
+    archiver = getattr(app.state, "archiver", None)
+    if archiver is None:
+        return {}
+    return {(): float(archiver.queue.qsize())}
+
+
+def _ingest_connections() -> Dict[tuple, float]:
+    ingest = getattr(app.state, "ingest", None)
+    if ingest is None:
+        return {}
+    return {(): float(len(ingest.connections))}
+
+
+def _websocket_counts() -> Dict[tuple, float]:
+    return {
+        ("viewer",): float(sum(map(len, manager.active_connections.values()))),
+        ("producer",): float(sum(map(len, manager.producers.values()))),
+    }
+
+
+def _spectral_cache_stats() -> Dict[tuple, float]:
+    return {
+        ("entries",): float(len(spectral_cache)),
+        ("hit_ratio",): spectral_cache.hit_ratio,
+    }
+
+
+def _pending_tasks() -> Dict[tuple, float]:
+    return {(): float(len(asyncio.all_tasks()))}
+
+
+metrics_registry.gauge(
+    "eeg_sessions",
+    "Active EEG stream sessions",
+    callback=lambda: {(): float(len(getattr(app.state, "eeg_buffers", {})))},
+)
+metrics_registry.gauge(
+    "eeg_buffer_samples",
+    "Samples held in session buffers",
+    ["aggregate"],
+    callback=_buffer_sizes,
+)
+metrics_registry.gauge(
+    "eeg_session_bytes",
+    "Approximate memory held by session buffers",
+    callback=_session_bytes,
+)
+metrics_registry.gauge(
+    "eeg_archive_queue_depth",
+    "Sealed archive chunks waiting for upload",
+    callback=_archive_queue_depth,
+)
+metrics_registry.gauge(
+    "eeg_ingest_connections",
+    "Open device connections on the TLS ingest port",
+    callback=_ingest_connections,
+)
+metrics_registry.gauge(
+    "eeg_websocket_connections",
+    "Open EEG WebSocket connections",
+    ["role"],
+    callback=_websocket_counts,
+)
+metrics_registry.gauge(
+    "eeg_spectral_cache",
+    "Shared spectral setup cache: entries held and lifetime hit ratio",
+    ["stat"],
+    callback=_spectral_cache_stats,
+)
+metrics_registry.gauge(
+    "event_loop_pending_tasks",
+    "Tasks scheduled on the event loop",
+    callback=_pending_tasks,
+)
+
+
 @app.get("/")
 async def root():
     return {"name": "SAVY Neuro-Data Steward API", "version": "0.1.0", "docs": "/docs"}
@@ -253,19 +612,38 @@ async def upload_data(
     import base64
     import time
 
+    data_bytes = base64.b64decode(request.data)
+    stored_bytes = data_bytes
+    codec_metadata = {}
+
+    if request.codec is not None:
+        if request.is_encrypted:
+            raise HTTPException(
+                status_code=400, detail="Encrypted data cannot be compressed"
+            )
+        if request.codec not in CODECS:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown codec, expected one of {CODECS}"
+            )
+        try:
+            stored_bytes = encode_frame(data_bytes, request.codec)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        codec_metadata = {"codec": request.codec, "original_size": len(data_bytes)}
+
     try:
-        data_bytes = base64.b64decode(request.data)
         data_hash = hashlib.sha256(data_bytes).hexdigest()
         timestamp = int(time.time())
 
         async with ipfs as ipfs_client:
             metadata = {
                 "timestamp": timestamp,
-                "size": len(data_bytes),
+                "size": len(stored_bytes),
                 "is_encrypted": request.is_encrypted,
                 **(request.metadata or {}),
+                **codec_metadata,
             }
-            ipfs_result = await ipfs_client.upload_encrypted(data_bytes, metadata)
+            ipfs_result = await ipfs_client.upload_encrypted(stored_bytes, metadata)
 
         try:
             tx_hash = await blockchain.register_data(
@@ -289,13 +667,32 @@ async def upload_data(
 
 
 @app.get("/api/v1/data/{cid}")
-async def get_data(cid: str, ipfs: IPFSStorageService = Depends(get_ipfs)):
-    """Retrieve data from IPFS"""
+async def get_data(
+    cid: str,
+    codecs: Optional[str] = Query(
+        None, description="Comma-separated EEG codecs the client can decode"
+    ),
+    ipfs: IPFSStorageService = Depends(get_ipfs),
+):
+    """
+    Retrieve data from IPFS
+
+    Compressed EEG frames are sent as stored when their codec is listed in
+    ``codecs``, otherwise decoded to the original frame first; the returned
+    ``metadata.codec`` says which.
+    """
     try:
         async with ipfs as ipfs_client:
             data, metadata = await ipfs_client.retrieve_encrypted(cid)
             import base64
 
+            stored_codec = metadata.get("codec")
+            if stored_codec is not None:
+                codec = negotiate_codec(stored_codec, codecs)
+                if codec is None:
+                    data = decode_frame(data)
+                metadata = {**metadata, "codec": codec}
+
             return {
                 "cid": cid,
                 "data": base64.b64encode(data).decode(),
@@ -330,20 +727,115 @@ async def get_gateway_url(cid: str, ipfs: IPFSStorageService = Depends(get_ipfs)
 @app.post("/api/v1/eeg/process", response_model=EEGProcessedData)
 async def process_eeg_data(
     request: EEGHexData,
-    processor: EEGDataProcessor = Depends(get_eeg_processor),
+    max_points: Optional[int] = Query(None, ge=2),
+    downsample: DownsampleMethod = DownsampleMethod.LTTB,
+    wire_format: WireFormat = Depends(get_wire_format),
+    parser: EEGDataParser = Depends(get_eeg_parser),
+):
+    """
+    Process hexadecimal EEG data and return visualization-ready format
+
+    ``format=columnar|binary`` (or the matching ``Accept`` media type) returns
+    per-channel float32 columns instead of point dicts.
+    """
+    try:
+        samples, events, processor = _parse_hex_frames(parser, request.hex_data)
+        processed_samples, processor = _resample(
+            None, processor, processor.preprocess_samples(samples)
+        )
+
+        if wire_format != WireFormat.JSON:
+            processed_data = processor.prepare_columnar_data(
+                processed_samples, events, max_points, downsample
+            )
+            return _columnar_response(processed_data, wire_format)
+
+        processed_data = processor.prepare_stream_data(
+            processed_samples, events, max_points, downsample
+        )
+
+        return EEGJSONResponse(processed_data)
+
+    except Exception as e:
+        record_error("process")
+        raise HTTPException(status_code=400, detail=f"Processing failed: {str(e)}")
+
+
+@app.post("/api/v1/eeg/cwt")
+async def wavelet_transform(
+    request: EEGHexData,
+    min_freq: float = Query(1.0, gt=0),
+    max_freq: float = Query(40.0, gt=0),
+    num_freqs: int = Query(32, ge=1, le=256),
+    max_points: int = Query(1000, ge=2, le=100000),
     parser: EEGDataParser = Depends(get_eeg_parser),
 ):
-    """Process hexadecimal EEG data and return visualization-ready format"""
+    """
+    Morlet continuous wavelet transform of hexadecimal EEG data
+
+    Per channel, a magnitude matrix ``[frequency][time]`` on ``num_freqs``
+    log-spaced frequencies (capped at Nyquist), at most ``max_points`` time
+    columns, in the layout of crypto-core's ``WaveletResult``.
+    """
+    if max_freq <= min_freq:
+        raise HTTPException(status_code=400, detail="max_freq must exceed min_freq")
+
     try:
-        samples, events = parser.hex_to_samples(request.hex_data)
-        processed_samples = processor.preprocess_samples(samples)
-        processed_data = processor.prepare_stream_data(processed_samples, events)
+        samples, _, processor = _parse_hex_frames(parser, request.hex_data)
+        processed_samples, processor = _resample(
+            None, processor, processor.preprocess_samples(samples)
+        )
+        results = await asyncio.to_thread(
+            processor.wavelet_transform,
+            processed_samples,
+            min_freq,
+            max_freq,
+            num_freqs,
+            max_points,
+        )
+    except Exception as e:
+        record_error("cwt")
+        raise HTTPException(status_code=400, detail=f"Processing failed: {str(e)}")
+
+    first = next(iter(results.values()), None)
+    return EEGJSONResponse(
+        {
+            "sampling_rate": processor.sampling_rate,
+            "frequencies": first.frequencies if first else [],
+            "times": first.times if first else [],
+            "channels": {
+                channel: result.magnitudes for channel, result in results.items()
+            },
+        }
+    )
 
-        return processed_data
 
+@app.post("/api/v1/eeg/coherence")
+async def channel_coherence(
+    request: EEGHexData,
+    window_size: int = Query(256, ge=8, le=8192),
+    parser: EEGDataParser = Depends(get_eeg_parser),
+):
+    """
+    Channel-pair coherence of hexadecimal EEG data
+
+    Per band, a ``[channel][channel]`` matrix of magnitude-squared coherence
+    from one Welch cross-spectral density over ``window_size`` segments.
+    """
+    try:
+        samples, _, processor = _parse_hex_frames(parser, request.hex_data)
+        processed_samples, processor = _resample(
+            None, processor, processor.preprocess_samples(samples)
+        )
+        coherence = await asyncio.to_thread(
+            processor.get_coherence, processed_samples, window_size
+        )
     except Exception as e:
+        record_error("coherence")
         raise HTTPException(status_code=400, detail=f"Processing failed: {str(e)}")
 
+    return EEGJSONResponse({"sampling_rate": processor.sampling_rate, **coherence})
+
 
 @app.post("/api/v1/eeg/stream/start")
 async def start_eeg_stream(session_id: str):
@@ -351,7 +843,7 @@ async def start_eeg_stream(session_id: str):
     if session_id in app.state.eeg_buffers:
         raise HTTPException(status_code=409, detail="Session already active")
 
-    app.state.eeg_buffers[session_id] = EEGStreamBuffer()
+    app.state.eeg_buffers.create(session_id)
     return {"status": "active", "session_id": session_id}
 
 
@@ -361,7 +853,19 @@ async def stop_eeg_stream(session_id: str):
     if session_id not in app.state.eeg_buffers:
         raise HTTPException(status_code=404, detail="Session not found")
 
+    if app.state.archiver is not None:
+        # The archiving worker seals the unarchived tail in the background
+        app.state.archiver.hand_off(session_id)
+
     del app.state.eeg_buffers[session_id]
+    if app.state.filters is not None:
+        app.state.filters.discard(session_id)
+    if app.state.resamplers is not None:
+        app.state.resamplers.discard(session_id)
+    if app.state.spectrograms is not None:
+        app.state.spectrograms.discard(session_id)
+    if app.state.coherence is not None:
+        app.state.coherence.discard(session_id)
     return {"status": "stopped", "session_id": session_id}
 
 
@@ -375,15 +879,44 @@ async def stream_eeg_data(
     Returns processed data for display
     """
     try:
-        processed_data = await process_hex_stream(request.hex_data, buffer)
+        with profiles.session_block(request.session_id):
+            samples, events, processor = _parse_hex_frames(
+                create_eeg_parser(), request.hex_data
+            )
+            processed_samples, processor = _resample(
+                request.session_id, processor, processor.preprocess_samples(samples)
+            )
+            if processed_samples:
+                await buffer.add_data(processed_samples, events)
+                _update_live_views(request.session_id, processor, processed_samples)
 
-        return {
-            "status": "processed",
-            "session_id": request.session_id,
-            "data": processed_data,
-        }
+            # Quality is judged on the raw block; filtering hides line noise
+            quality = processor.signal_quality(processed_samples)
+            display_samples, data_type = _display_samples(
+                request.session_id, processor, processed_samples
+            )
+            processed_data = processor.prepare_stream_data(
+                display_samples, events, data_type=data_type, quality=quality
+            )
+        if processed_samples:
+            await manager.broadcast_stream(
+                request.session_id,
+                processor,
+                display_samples,
+                events,
+                summary={k: v for k, v in processed_data.items() if k != "channels"},
+            )
+
+        return EEGJSONResponse(
+            {
+                "status": "processed",
+                "session_id": request.session_id,
+                "data": processed_data,
+            }
+        )
 
     except Exception as e:
+        record_error("stream")
         raise HTTPException(status_code=400, detail=f"Processing failed: {str(e)}")
 
 
@@ -391,107 +924,682 @@ async def stream_eeg_data(
 async def get_stream_buffer(
     session_id: str,
     duration: float = 10.0,
-    processor: EEGDataProcessor = Depends(get_eeg_processor),
+    max_points: Optional[int] = Query(None, ge=2),
+    downsample: DownsampleMethod = DownsampleMethod.LTTB,
+    filtered: bool = False,
+    wire_format: WireFormat = Depends(get_wire_format),
 ):
-    """Get buffered data from a specific stream session"""
+    """
+    Get buffered data from a specific stream session
+
+    Buffers hold raw samples; ``filtered=true`` band-pass / notch filters
+    the window as the live stream is (unless filtering is disabled).
+    """
     if session_id not in app.state.eeg_buffers:
         raise HTTPException(status_code=404, detail="Session not found")
 
     buffer = app.state.eeg_buffers[session_id]
     samples, events = await buffer.get_window(duration)
+    processor = create_eeg_processor(*stream_layout(samples))
+    quality = processor.signal_quality(samples)
+    data_type = EEGDataType.RAW
+    if filtered:
+        samples, data_type = _display_samples(
+            session_id, processor, samples, live=False
+        )
 
-    processed_data = processor.prepare_stream_data(samples, events)
+    if wire_format != WireFormat.JSON:
+        processed_data = processor.prepare_columnar_data(
+            samples, events, max_points, downsample, data_type, quality
+        )
+        return _columnar_response(
+            processed_data,
+            wire_format,
+            session_id=session_id,
+            buffer_size=len(samples),
+        )
 
-    return {
-        "session_id": session_id,
-        "buffer_size": len(samples),
-        "data": processed_data,
-    }
+    processed_data = processor.prepare_stream_data(
+        samples, events, max_points, downsample, data_type, quality
+    )
+
+    return EEGJSONResponse(
+        {
+            "session_id": session_id,
+            "buffer_size": len(samples),
+            "data": processed_data,
+        }
+    )
+
+
+@app.get("/api/v1/eeg/stream/{session_id}/spectrogram")
+async def get_stream_spectrogram(
+    session_id: str,
+    since: Optional[float] = None,
+    columns: int = Query(240, ge=1, le=10000),
+    dtype: HeatmapDtype = HeatmapDtype.FLOAT32,
+    db_min: Optional[float] = None,
+    db_max: Optional[float] = None,
+    dynamic_range: float = Query(60.0, gt=0),
+):
+    """
+    Rolling spectrogram of a stream session as per-channel heatmaps
+
+    Columns (power spectral density in dB, ``[time][frequency]``) are
+    computed once as blocks arrive; the first request starts the session's
+    spectrogram from its buffer. Pass the last column time as ``since`` to
+    fetch only newer columns. ``dtype=uint8`` quantizes ``[db_min, db_max]``
+    (default: ``dynamic_range`` dB below the loudest value) to 0-255.
+    """
+    spectrograms = app.state.spectrograms
+    if spectrograms is None:
+        raise HTTPException(status_code=404, detail="Spectrograms disabled")
+    if session_id not in app.state.eeg_buffers:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    spectrogram = await _watched_view(
+        session_id, spectrograms, EEGDataProcessor.update_spectrogram
+    )
+
+    times, decibels = spectrogram.read(since, columns)
+    if dtype == HeatmapDtype.UINT8 and db_max is None and decibels.size:
+        # One scale across channels so their heatmaps compare
+        db_max = float(decibels.max())
+
+    return EEGJSONResponse(
+        {
+            "session_id": session_id,
+            "sampling_rate": spectrogram.sampling_rate,
+            "nperseg": spectrogram.nperseg,
+            "hop": spectrogram.hop,
+            "frequencies": spectrogram.frequencies,
+            "times": times,
+            "channels": {
+                EEGChannel(i).name.lower(): encode_heatmap(
+                    decibels[:, i], dtype, db_min, db_max, dynamic_range
+                )
+                for i in range(spectrogram.num_channels)
+            },
+        }
+    )
+
+
+@app.get("/api/v1/eeg/stream/{session_id}/coherence")
+async def get_stream_coherence(session_id: str):
+    """
+    Running channel-pair coherence of a stream session, per band
+
+    Cross-spectra are accumulated as blocks arrive, fading over
+    SAVY_COHERENCE_MEMORY seconds; the first request starts them from the
+    session buffer.
+    """
+    if app.state.coherence is None:
+        raise HTTPException(status_code=404, detail="Coherence disabled")
+    if session_id not in app.state.eeg_buffers:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    state = await _watched_view(
+        session_id, app.state.coherence, EEGDataProcessor.update_coherence
+    )
+    processor = create_eeg_processor(state.sampling_rate, state.num_channels)
+
+    return EEGJSONResponse(
+        {
+            "session_id": session_id,
+            "sampling_rate": state.sampling_rate,
+            "segments": state.segments,
+            "channels": [channel.name.lower() for channel in processor.channels],
+            "bands": state.coherence(processor.coherence_bands),
+        }
+    )
+
+
+@app.get("/api/v1/eeg/stream/{session_id}/archive")
+async def get_stream_archive(session_id: str):
+    """Manifest of a session's archived chunks (CIDs and time ranges)"""
+    if app.state.archiver is None:
+        raise HTTPException(status_code=404, detail="Archiving disabled")
+
+    manifest = app.state.archiver.get_manifest(session_id)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="No archive for session")
+
+    return {**manifest, "queued_chunks": app.state.archiver.queue.qsize()}
+
+
+def _columnar_response(
+    data: Dict[str, Any], wire_format: WireFormat, **extra
+) -> Response:
+    """Encode columnar data as base64 JSON or a binary frame
+
+    Extra fields wrap the JSON payload (as the default JSON endpoints do) or
+    are merged into the binary frame header.
+    """
+    media_type = MEDIA_TYPES[wire_format]
+    if wire_format == WireFormat.BINARY:
+        with stage_timer("serialization"):
+            frame = to_binary_frame(data, **extra)
+        return Response(frame, media_type=media_type)
+
+    with stage_timer("serialization"):
+        content = to_columnar_json(data)
+    if extra:
+        content = {**extra, "data": content}
+    return EEGJSONResponse(content, media_type=media_type)
+
+
+def _stream_message(
+    message_type: str,
+    processor: EEGDataProcessor,
+    samples: List[EEGSample],
+    summary: Dict[str, Any],
+    resolution: tuple,
+) -> Union[str, bytes]:
+    """Serialize one WebSocket message for a viewer resolution"""
+    max_points, method, wire_format = resolution
+
+    if wire_format == WireFormat.JSON:
+        data = {
+            "channels": processor.stream_channels(samples, max_points, method),
+            **summary,
+        }
+        return dumps_json({"type": message_type, "data": data}).decode()
+
+    data = {**processor.columnar_channels(samples, max_points, method), **summary}
+    if wire_format == WireFormat.BINARY:
+        with stage_timer("serialization"):
+            return to_binary_frame(data, type=message_type)
+    with stage_timer("serialization"):
+        data = to_columnar_json(data)
+    return dumps_json({"type": message_type, "data": data}).decode()
 
 
 class ConnectionManager:
-    """WebSocket connection manager for real-time EEG streaming"""
+    """WebSocket connection manager for real-time EEG streaming
+
+    Producers (devices pushing hex blocks) feed the session buffer; viewers
+    only receive the processed output fanned out by :meth:`broadcast`.
+    """
 
     def __init__(self):
         self.active_connections: Dict[str, List[WebSocket]] = {}
-
-    async def connect(self, websocket: WebSocket, session_id: str):
+        self.producers: Dict[str, List[WebSocket]] = {}
+        # Per-viewer (max_points, downsample method, wire format) resolution
+        self.resolutions: Dict[WebSocket, tuple] = {}
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        role: str = "viewer",
+        max_points: Optional[int] = None,
+        method: DownsampleMethod = DownsampleMethod.LTTB,
+        wire_format: WireFormat = WireFormat.JSON,
+    ):
         await websocket.accept()
-        if session_id not in self.active_connections:
-            self.active_connections[session_id] = []
-        self.active_connections[session_id].append(websocket)
+        pool = self.producers if role == "producer" else self.active_connections
+        pool.setdefault(session_id, []).append(websocket)
+        if max_points is None:
+            method = DownsampleMethod.LTTB
+        self.resolutions[websocket] = (max_points, method, wire_format)
 
     def disconnect(self, websocket: WebSocket, session_id: str):
-        if session_id in self.active_connections:
-            self.active_connections[session_id].remove(websocket)
-            if not self.active_connections[session_id]:
-                del self.active_connections[session_id]
+        self.resolutions.pop(websocket, None)
+        for pool in (self.active_connections, self.producers):
+            connections = pool.get(session_id)
+            if connections and websocket in connections:
+                connections.remove(websocket)
+                if not connections:
+                    del pool[session_id]
+
+    def viewer_count(self, session_id: str) -> int:
+        return len(self.active_connections.get(session_id, []))
 
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         await websocket.send_json(message)
 
     async def broadcast(self, session_id: str, message: dict):
-        if session_id in self.active_connections:
-            for connection in self.active_connections[session_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    print(f"Send failed: {e}")
-                    self.disconnect(connection, session_id)
+        """Send one message to every viewer of a session
+
+        The payload is serialized once and written to all viewers concurrently,
+        so a slow viewer does not delay the others.
+        """
+        connections = list(self.active_connections.get(session_id, []))
+        await self.send_all(session_id, connections, dumps_json(message).decode())
+
+    async def broadcast_stream(
+        self,
+        session_id: str,
+        processor: EEGDataProcessor,
+        samples: List[EEGSample],
+        events: List[EEGEvent],
+        summary: Optional[Dict[str, Any]] = None,
+        data_type: EEGDataType = EEGDataType.RAW,
+        quality: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        """Fan processed samples out to viewers at their requested resolution
+
+        Events, stress and stats are computed once per block; channel data is
+        prepared and serialized once per distinct viewer resolution. Pass
+        ``quality`` measured on the raw block when ``samples`` are filtered.
+        """
+        groups: Dict[tuple, List[WebSocket]] = {}
+        for connection in self.active_connections.get(session_id, []):
+            groups.setdefault(self.resolutions[connection], []).append(connection)
+        if not groups:
+            return
+
+        if summary is None:
+            summary = processor.summarize_stream(samples, events, data_type, quality)
+
+        await asyncio.gather(
+            *(
+                self.send_all(
+                    session_id,
+                    connections,
+                    _stream_message("data", processor, samples, summary, resolution),
+                )
+                for resolution, connections in groups.items()
+            )
+        )
+
+    async def send_all(
+        self,
+        session_id: str,
+        connections: List[WebSocket],
+        message: Union[str, bytes],
+    ):
+        if not connections:
+            return
+
+        results = await asyncio.gather(
+            *(
+                connection.send_bytes(message)
+                if isinstance(message, bytes)
+                else connection.send_text(message)
+                for connection in connections
+            ),
+            return_exceptions=True,
+        )
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                record_error("websocket_send")
+                logger.warning(f"Send to session {session_id} failed: {result}")
+                self.disconnect(connection, session_id)
 
 
 manager = ConnectionManager()
 
 
-@app.websocket("/ws/eeg/stream/{session_id}")
-async def websocket_endpoint(websocket: WebSocket, session_id: str):
-    """WebSocket endpoint for real-time EEG streaming"""
-    await manager.connect(websocket, session_id)
+async def _serve_viewer(
+    websocket: WebSocket, session_id: str, buffer: EEGStreamBuffer, duration: float
+):
+    """Prefill a viewer from the session buffer, then wait for it to leave"""
+    samples, events = await buffer.get_window(duration)
+    if samples:
+        processor = create_eeg_processor(*stream_layout(samples))
+        quality = processor.signal_quality(samples)
+        samples, data_type = _display_samples(
+            session_id, processor, samples, live=False
+        )
+        message = _stream_message(
+            "snapshot",
+            processor,
+            samples,
+            processor.summarize_stream(samples, events, data_type, quality),
+            manager.resolutions[websocket],
+        )
+        await manager.send_all(session_id, [websocket], message)
 
-    if session_id not in app.state.eeg_buffers:
-        app.state.eeg_buffers[session_id] = EEGStreamBuffer()
+    # Viewers do not send data; keep reading so disconnects are noticed
+    while True:
+        await websocket.receive_text()
 
-    buffer = app.state.eeg_buffers[session_id]
-    processor = create_eeg_processor()
 
-    try:
-        while True:
-            # Wait for incoming data
-            data = await websocket.receive_text()
+async def _ingest_block(
+    session_id: str,
+    processor: EEGDataProcessor,
+    samples: List[EEGSample],
+    events: List[EEGEvent],
+):
+    """Buffer one preprocessed producer block and fan it out to viewers"""
+    if not samples:
+        # Nothing decoded, or all held back by the resampler
+        if events:
+            await _emit_session_events(session_id, events)
+        return
+
+    # Looked up per block: the session may have been evicted since
+    buffer = app.state.eeg_buffers.get_or_create(session_id)
+    await buffer.add_data(samples, events)
+    _update_live_views(session_id, processor, samples)
+
+    quality = None
+    if manager.viewer_count(session_id):
+        quality = processor.signal_quality(samples)
+    display_samples, data_type = _display_samples(session_id, processor, samples)
+    await manager.broadcast_stream(
+        session_id,
+        processor,
+        display_samples,
+        events,
+        data_type=data_type,
+        quality=quality,
+    )
+
+
+async def _emit_session_events(session_id: str, events: List[EEGEvent]):
+    """Add events raised off the ingest path to a session and its viewers"""
+    buffer = app.state.eeg_buffers.get(session_id)
+    if buffer is None or not len(buffer):
+        return
+    await buffer.add_data([], events)
+    await manager.broadcast(
+        session_id,
+        {
+            "type": "events",
+            "events": [
+                {
+                    "timestamp": e.timestamp,
+                    "type": e.event_type,
+                    "channel": e.channel.name.lower() if e.channel else None,
+                    "duration": e.duration,
+                    "metadata": e.metadata,
+                }
+                for e in events
+            ],
+        },
+    )
+
+
+async def _ingest_frame(
+    session_id: str,
+    samples: List[EEGSample],
+    events: List[EEGEvent],
+    header: Dict[str, Any],
+):
+    """Process a frame from the TLS ingest port like a WebSocket producer block"""
+    processor = create_eeg_processor(*_frame_layout(header))
+    with profiles.session_block(session_id):
+        processed_samples, processor = _resample(
+            session_id, processor, processor.preprocess_samples(samples)
+        )
+        await _ingest_block(session_id, processor, processed_samples, events)
 
-            try:
-                hex_data = json.loads(data).get("hex_data")
+
+async def _serve_producer(websocket: WebSocket, session_id: str):
+    """
+    Process producer blocks once and fan the result out to viewers
+
+    Messages are ``{"hex_data": ...}`` text or raw binary frame bytes. They
+    are reassembled per connection, so a message may carry part of a frame
+    or several frames; each is acknowledged with the samples it completed.
+    """
+    parser = create_eeg_parser()
+    reassembler = FrameReassembler()
+
+    while True:
+        # Wait for incoming data
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+
+        try:
+            if message.get("bytes") is not None:
+                frames = reassembler.feed(message["bytes"])
+            else:
+                hex_data = json.loads(message.get("text") or "{}").get("hex_data")
                 if not hex_data:
                     continue
+                frames = reassembler.feed_hex(hex_data)
 
-                # Process data
-                samples, events = create_eeg_parser().hex_to_samples(hex_data)
-                processed_samples = processor.preprocess_samples(samples)
-                await buffer.add_data(processed_samples, events)
+            # Footers verify in the background while the message's frames
+            # decode; with the async policy failed frames are flagged by the
+            # time the batch is drained. Rejected frames are only counted
+            decoded, rejected = [], 0
+            for frame in frames:
+                try:
+                    decoded.append(
+                        (parser.frame_header(frame), *parser.frame_to_samples(frame))
+                    )
+                except ChecksumError:
+                    rejected += 1
+            checksum_failures = parser.drain_checksums()
+
+            processed = 0
+            with profiles.session_block(session_id):
+                for header, samples, events in decoded:
+                    processor = create_eeg_processor(*_frame_layout(header))
+                    processed_samples, processor = _resample(
+                        session_id, processor, processor.preprocess_samples(samples)
+                    )
+                    await _ingest_block(
+                        session_id, processor, processed_samples, events
+                    )
+                    processed += len(processed_samples)
+
+            await manager.send_personal_message(
+                {
+                    "type": "ack",
+                    "samples": processed,
+                    "frames": len(frames),
+                    "rejected": rejected,
+                    "pending_bytes": len(reassembler),
+                    "checksum_failures": checksum_failures,
+                    "viewers": manager.viewer_count(session_id),
+                },
+                websocket,
+            )
 
-                # Send processed data back
-                processed_data = processor.prepare_stream_data(
-                    processed_samples, events
-                )
+        except Exception as e:
+            record_error("websocket")
+            reassembler.reset()
+            await manager.send_personal_message(
+                {"type": "error", "error": str(e)}, websocket
+            )
 
-                await manager.send_personal_message(
-                    {"type": "data", "data": processed_data}, websocket
-                )
 
-            except Exception as e:
-                await manager.send_personal_message(
-                    {"type": "error", "error": str(e)}, websocket
-                )
+@app.websocket("/ws/eeg/stream/{session_id}")
+async def websocket_endpoint(
+    websocket: WebSocket,
+    session_id: str,
+    role: str = "producer",
+    duration: float = 10.0,
+    max_points: Optional[int] = None,
+    downsample: DownsampleMethod = DownsampleMethod.LTTB,
+    wire_format: Optional[WireFormat] = Query(None, alias="format"),
+):
+    """
+    WebSocket endpoint for real-time EEG streaming
+
+    ``role=producer`` (default) sends ``{"hex_data": ...}`` blocks which are
+    processed once into the session buffer. ``role=viewer`` receives a snapshot
+    of the last ``duration`` seconds on join, then every processed block,
+    decimated to ``max_points`` per channel when given. ``format=columnar``
+    sends base64 float32 columns; ``format=binary`` sends binary frames.
+    """
+    if role not in ("producer", "viewer") or (
+        max_points is not None and max_points < 2
+    ):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    wire_format = negotiate_format(websocket.headers.get("accept"), wire_format)
+    await manager.connect(
+        websocket, session_id, role, max_points, downsample, wire_format
+    )
+
+    try:
+        if role == "viewer":
+            buffer = app.state.eeg_buffers.get_or_create(session_id)
+            await _serve_viewer(websocket, session_id, buffer, duration)
+        else:
+            await _serve_producer(websocket, session_id)
 
     except WebSocketDisconnect:
         manager.disconnect(websocket, session_id)
-        print(f"Client disconnected from session: {session_id}")
+        logger.info(f"Client disconnected from session: {session_id}")
 
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        record_error("websocket")
+        logger.error(f"WebSocket error: {e}")
         manager.disconnect(websocket, session_id)
 
 
+# ==================== ARCHIVED SESSIONS ====================
+
+MAX_RANGE_SECONDS = float(os.getenv("SAVY_RANGE_MAX_SECONDS", "3600"))
+
+
+@app.get("/api/v1/sessions/{manifest_cid}/range")
+async def get_session_range(
+    manifest_cid: str,
+    start: float,
+    end: float,
+    ipfs: IPFSStorageService = Depends(get_ipfs),
+):
+    """
+    Decoded samples of an archived session between ``start`` and ``end``
+
+    Only the chunks overlapping the window are fetched, concurrently.
+    Timestamps are unix seconds, ``start`` inclusive and ``end`` exclusive.
+    """
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if end - start > MAX_RANGE_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range longer than {MAX_RANGE_SECONDS:g}s",
+        )
+
+    try:
+        async with ipfs as ipfs_client:
+            window = await read_range(ipfs_client, manifest_cid, start, end)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    records = window.records
+    channels = {}
+    for channel in np.unique(records["channel"]):
+        selected = records[records["channel"] == channel]
+        channels[EEGChannel(int(channel)).name.lower()] = {
+            "timestamps": np.ascontiguousarray(selected["timestamp"]),
+            "values": np.ascontiguousarray(selected["value"]),
+        }
+
+    return EEGJSONResponse(
+        {
+            "session_id": window.session_id,
+            "manifest_cid": manifest_cid,
+            "start": start,
+            "end": end,
+            "chunks": window.chunks,
+            "samples": len(records),
+            "channels": channels,
+            "events": [event_to_dict(e) for e in window.events],
+        }
+    )
+
+
+@app.get("/api/v1/sessions/{manifest_cid}/overview")
+async def get_session_overview(
+    manifest_cid: str,
+    start: float,
+    end: float,
+    max_points: int = Query(2000, gt=0, le=100000),
+    ipfs: IPFSStorageService = Depends(get_ipfs),
+):
+    """
+    Min/max/mean envelope of an archived session for overview rendering
+
+    Served from the archive pyramid at the most detailed level with at most
+    ``max_points`` bins per channel, so any recording length costs about the
+    same; windows short enough come back as raw samples (``level`` 0). Raw
+    windows are held to the same SAVY_RANGE_MAX_SECONDS cap as ``/range``.
+    """
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+
+    try:
+        async with ipfs as ipfs_client:
+            overview = await read_overview(
+                ipfs_client,
+                manifest_cid,
+                start,
+                end,
+                max_points,
+                max_range_seconds=MAX_RANGE_SECONDS,
+            )
+    except RangeTooLongError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return EEGJSONResponse(
+        {
+            "session_id": overview.session_id,
+            "manifest_cid": manifest_cid,
+            "start": start,
+            "end": end,
+            "level": overview.level,
+            "bin_seconds": overview.bin_seconds,
+            "fetched": overview.fetched,
+            "channels": {
+                EEGChannel(channel).name.lower(): data
+                for channel, data in overview.channels.items()
+            },
+        }
+    )
+
+
+# ==================== DEBUG ====================
+
+
+@app.post(
+    "/api/v1/debug/profile/sessions/{session_id}",
+    dependencies=[Depends(require_admin)],
+)
+async def start_session_profile(
+    session_id: str,
+    duration: float = Query(60.0, gt=0, le=3600),
+    output_format: str = Query("speedscope", alias="format"),
+):
+    """Sample-profile block processing for one stream session"""
+    if output_format not in ProfileManager.FORMATS:
+        raise HTTPException(status_code=400, detail="Unknown profile format")
+
+    try:
+        profiles.enable_session(session_id, duration, output_format)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return {"status": "profiling", "session_id": session_id, "duration": duration}
+
+
+@app.delete(
+    "/api/v1/debug/profile/sessions/{session_id}",
+    dependencies=[Depends(require_admin)],
+)
+async def stop_session_profile(session_id: str):
+    """Stop profiling a session and write its profile"""
+    path = profiles.disable_session(session_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Session not being profiled")
+
+    return {"status": "stopped", "session_id": session_id, "file": path}
+
+
+@app.get("/api/v1/debug/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """List written profiles and sessions currently being profiled"""
+    written = profiles.list_profiles()
+    return {
+        "output_dir": profiles.output_dir,
+        "active_sessions": list(profiles.sessions),
+        "profiles": written,
+    }
+
+
 # ==================== CONSENT ====================
 
 
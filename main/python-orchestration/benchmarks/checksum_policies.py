@@ -0,0 +1,84 @@
+"""
+Frame parse latency under each checksum policy
+
+Parses synthetic frames of several sizes with every ``ChecksumPolicy`` and
+prints p50/p99 latency per frame, including the drain that waits for
+deferred verifications, next to the cost of the SHA-1 footer on its own
+and of parsing with verification switched off.
+
+Usage:
+    python -m benchmarks.checksum_policies [--runs 200] [--sample-every 16]
+"""
+
+import argparse
+import hashlib
+import time
+import numpy as np
+from typing import Callable, List
+
+from services.brain_signal_generator import SyntheticEEGSource
+from services.eeg_service import ChecksumPolicy, EEGDataParser
+
+LAYOUTS = [(4, 256, 1), (4, 256, 10), (4, 256, 60), (8, 256, 60), (32, 1000, 10)]
+
+
+def latencies(fn: Callable[[], object], runs: int) -> List[float]:
+    fn()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def parse_fn(parser: EEGDataParser, frame: bytes) -> Callable[[], object]:
+    def parse():
+        parser.frame_to_samples(frame)
+        parser.drain_checksums()
+
+    return parse
+
+
+def report(channels: int, rate: int, seconds: int, runs: int, sample_every: int):
+    source = SyntheticEEGSource(
+        num_channels=channels, sampling_rate=rate, seed=0, start_timestamp=0.0
+    )
+    frame = source.next_frame(seconds * rate)
+    print(f"\n{channels}ch@{rate}Hz x {seconds}s: {len(frame) / 1024:.0f} KiB frame")
+    print(f"{'policy':<18}{'p50 ms':>10}{'p99 ms':>10}")
+
+    rows = [
+        ("sha1 only", lambda: hashlib.sha1(frame[:-16]).digest()),
+        # Sampling 1 in 10**9 frames stands in for no verification at all
+        (
+            "unverified",
+            parse_fn(
+                EEGDataParser(checksum_policy="sampled", checksum_sample_every=10**9),
+                frame,
+            ),
+        ),
+    ]
+    for policy in ChecksumPolicy:
+        parser = EEGDataParser(
+            checksum_policy=policy, checksum_sample_every=sample_every
+        )
+        rows.append((policy.value, parse_fn(parser, frame)))
+
+    for label, fn in rows:
+        p50, p99 = np.percentile(latencies(fn, runs), [50, 99]) * 1e3
+        print(f"{label:<18}{p50:>10.3f}{p99:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--sample-every", type=int, default=16)
+    args = parser.parse_args()
+
+    for channels, rate, seconds in LAYOUTS:
+        report(channels, rate, seconds, args.runs, args.sample_every)
+
+
+if __name__ == "__main__":
+    main()
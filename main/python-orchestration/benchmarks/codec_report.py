@@ -0,0 +1,104 @@
+"""
+Compression ratio and throughput of the EEG codecs
+
+Encodes synthetic sessions (and any recorded frames given on the command
+line, as binary or hex files in the parser's frame format) with every codec,
+next to the formats sessions are stored in today: hex text, base64 text and
+plain zstd over the raw float32 data.
+
+Usage:
+    python -m benchmarks.codec_report [--seconds 60] [--runs 5] [FRAME ...]
+"""
+
+import argparse
+import base64
+import time
+import numpy as np
+import zstandard
+from typing import Callable, List, Tuple
+
+from services.brain_signal_generator import SyntheticEEGSource
+from services.eeg_codec import CODECS, decode_samples, encode_samples
+
+SYNTHETIC_LAYOUTS = [(4, 256), (8, 256), (16, 500), (32, 1000)]
+
+
+def synthetic_sessions(seconds: float) -> List[Tuple[str, np.ndarray]]:
+    sessions = []
+    for channels, rate in SYNTHETIC_LAYOUTS:
+        source = SyntheticEEGSource(
+            num_channels=channels, sampling_rate=rate, seed=0, start_timestamp=0.0
+        )
+        data, _, _ = source.next_block(int(seconds * rate))
+        sessions.append((f"synthetic {channels}ch@{rate}Hz", data))
+    return sessions
+
+
+def recorded_session(path: str) -> Tuple[str, np.ndarray]:
+    with open(path, "rb") as f:
+        frame = f.read()
+    try:
+        frame = bytes.fromhex(frame.decode("ascii").strip())
+    except (UnicodeDecodeError, ValueError):
+        pass
+
+    channels = frame[6]
+    n = int.from_bytes(frame[7:11], "little")
+    data = np.frombuffer(frame, "<f4", n * channels, 32).reshape(n, channels)
+    return path, data
+
+
+def best_time(fn: Callable[[], object], runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def report(name: str, data: np.ndarray, runs: int):
+    raw = data.astype("<f4").tobytes()
+    mb = len(raw) / 1e6
+    print(f"\n{name}: {data.shape[0]} samples x {data.shape[1]} channels")
+    print(f"{'encoding':<14}{'bytes':>12}{'ratio':>8}{'enc MB/s':>10}{'dec MB/s':>10}")
+
+    baselines = (
+        ("hex", lambda: raw.hex()),
+        ("base64", lambda: base64.b64encode(raw)),
+        ("zstd", lambda: zstandard.ZstdCompressor(level=3).compress(raw)),
+    )
+    for label, fn in baselines:
+        size = len(fn())
+        encode = best_time(fn, runs)
+        print(
+            f"{label:<14}{size:>12}{len(raw) / size:>8.2f}{mb / encode:>10.0f}{'':>10}"
+        )
+
+    for codec in CODECS:
+        blob = encode_samples(data, codec)
+        assert np.array_equal(decode_samples(blob).view("<u4"), data.view("<u4"))
+
+        encode = best_time(lambda: encode_samples(data, codec), runs)
+        decode = best_time(lambda: decode_samples(blob), runs)
+        print(
+            f"{codec:<14}{len(blob):>12}{len(raw) / len(blob):>8.2f}"
+            f"{mb / encode:>10.0f}{mb / decode:>10.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("frames", nargs="*", help="Recorded frame files")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    sessions = synthetic_sessions(args.seconds)
+    sessions += [recorded_session(path) for path in args.frames]
+    for name, data in sessions:
+        report(name, data, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Throughput of the Morlet CWT on 60-second blocks
+
+Transforms synthetic 4-channel blocks on log-spaced 1-40 Hz grids of
+several sizes, with the kernel cache cold (first block of a size) and
+warm (every later block), and prints input samples and output
+coefficients per second.
+
+Usage:
+    python -m benchmarks.cwt_throughput [--seconds 60] [--channels 4] [--runs 20]
+"""
+
+import argparse
+import time
+import numpy as np
+
+from services.brain_signal_generator import SyntheticEEGSource
+from services.eeg_service import morlet_cwt
+from services.eeg_spectral import spectral_cache
+
+FREQUENCY_COUNTS = [16, 32, 64]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--rate", type=int, default=256)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    source = SyntheticEEGSource(
+        num_channels=args.channels, sampling_rate=args.rate, seed=0
+    )
+    data, _, _ = source.next_block(int(args.seconds * args.rate))
+    data = np.ascontiguousarray(data.T, dtype=np.float64)
+    samples = data.size
+
+    print(f"{args.seconds:g}s x {args.channels} channels at {args.rate} Hz")
+    print(
+        f"{'freqs':>6}{'cold ms':>10}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'Msamples/s':>12}{'Mcoef/s':>10}"
+    )
+    for count in FREQUENCY_COUNTS:
+        frequencies = np.geomspace(1.0, 40.0, count)
+
+        spectral_cache.clear()
+        start = time.perf_counter()
+        morlet_cwt(data, args.rate, frequencies)
+        cold = time.perf_counter() - start
+
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            morlet_cwt(data, args.rate, frequencies)
+            timings.append(time.perf_counter() - start)
+        p50, p99 = np.percentile(timings, [50, 99])
+
+        print(
+            f"{count:>6}{cold * 1e3:>10.1f}{p50 * 1e3:>10.1f}{p99 * 1e3:>10.1f}"
+            f"{samples / p50 / 1e6:>12.2f}{samples * count / p50 / 1e6:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Hot-path benchmark gate against the committed baseline
+
+Times the ``tests/benchmarks`` suite and fails (non-zero exit) when any
+case's median is more than ``--threshold`` percent slower than in
+``tests/benchmarks/.baselines/reference.json``. ``--save`` times the suite
+and rewrites that file instead; commit it when a slowdown is intended or
+the reference machine changes. Timings are only comparable on similar
+hardware, so CI should run the gate on the machine class that saved it.
+
+Usage:
+    python -m benchmarks.regression [--threshold 20] [--save] [pytest args]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import pytest
+from pytest_benchmark.session import PerformanceRegression
+
+SUITE = "tests/benchmarks"
+BASELINE = os.path.join(SUITE, ".baselines", "reference.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threshold", type=float, default=20.0)
+    parser.add_argument("--save", action="store_true")
+    args, extra = parser.parse_known_args(argv)
+
+    options = [
+        SUITE,
+        "-q",
+        "--benchmark-enable",
+        "--benchmark-sort=name",
+        "--benchmark-warmup=on",
+        "--benchmark-disable-gc",
+        "--benchmark-min-rounds=10",
+    ]
+    if args.save:
+        options.append(f"--benchmark-json={BASELINE}")
+    else:
+        if not os.path.exists(BASELINE):
+            print(f"No baseline at {BASELINE}; run with --save first")
+            return 2
+        options += [
+            f"--benchmark-compare={BASELINE}",
+            f"--benchmark-compare-fail=median:{args.threshold:g}%",
+        ]
+    try:
+        status = int(pytest.main(options + extra))
+    except PerformanceRegression as e:
+        # Raised after the report listing the cases past the threshold
+        print(e)
+        return 1
+    if args.save and status == 0:
+        strip_rounds(BASELINE)
+    return status
+
+
+def strip_rounds(path: str):
+    """Drop per-round timings; comparisons only use the summary stats"""
+    with open(path) as f:
+        report = json.load(f)
+    for bench in report["benchmarks"]:
+        bench["stats"].pop("data", None)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
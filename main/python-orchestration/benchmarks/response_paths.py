@@ -0,0 +1,85 @@
+"""
+Latency of the processed-data response paths
+
+Compares FastAPI's default response_model path (Pydantic validation,
+jsonable_encoder, json.dumps) with the pre-serialized orjson response for a
+10-second 4-channel block.
+
+Usage:
+    python -m benchmarks.response_paths [--seconds 10] [--runs 200]
+"""
+
+import argparse
+import time
+import numpy as np
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api.main import EEGJSONResponse, EEGProcessedData
+from services.eeg_service import EEGChannel, EEGSample, create_eeg_processor
+
+CHANNELS = list(EEGChannel)[:4]
+
+
+def synthetic_samples(seconds: float, sampling_rate: int = 256) -> List[EEGSample]:
+    """Interleaved 4-channel alpha/beta mixture with noise"""
+    rng = np.random.default_rng(0)
+    n = int(seconds * sampling_rate)
+    t = np.arange(n) / sampling_rate
+    samples = []
+
+    for i in range(n):
+        for channel in CHANNELS:
+            value = (
+                20 * np.sin(2 * np.pi * 10 * t[i] + channel.value)
+                + 5 * np.sin(2 * np.pi * 20 * t[i])
+                + rng.normal(0, 2)
+            )
+            samples.append(
+                EEGSample(timestamp=float(t[i]), channel=channel, value=value)
+            )
+
+    return samples
+
+
+def pydantic_path(data: Dict) -> bytes:
+    model = EEGProcessedData.model_validate(data)
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+def orjson_path(data: Dict) -> bytes:
+    return EEGJSONResponse(data).body
+
+
+def measure(fn: Callable[[Dict], bytes], data: Dict, runs: int) -> np.ndarray:
+    timings = np.empty(runs)
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(data)
+        timings[i] = time.perf_counter() - start
+    return timings * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    processor = create_eeg_processor()
+    samples = synthetic_samples(args.seconds, processor.sampling_rate)
+    data = processor.prepare_stream_data(samples, [])
+
+    print(f"{args.seconds:g}s x {len(CHANNELS)} channels, {len(samples)} samples")
+    print(f"{'path':<10}{'p50 ms':>10}{'p99 ms':>10}{'bytes':>12}")
+    for name, fn in (("pydantic", pydantic_path), ("orjson", orjson_path)):
+        fn(data)  # warm-up
+        timings = measure(fn, data, args.runs)
+        p50, p99 = np.percentile(timings, [50, 99])
+        print(f"{name:<10}{p50:>10.2f}{p99:>10.2f}{len(fn(data)):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,26 @@
-import socket
-import ssl
+"""
+EEG ingest server
 
-HOST = "0.0.0.0"
-PORT = 4433
+Serves the API together with the TLS device ingest port, which accepts
+length-prefixed parser frames from headsets (see services/ingest_gateway.py)
+and feeds them into the same session buffers and processing pipeline.
 
-context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
-context.load_cert_chain("cert.pem", "key.pem")
+    python server.py
 
-sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-sock.bind((HOST, PORT))
-sock.listen(1)
+SAVY_INGEST_PORT (default 4433) and SAVY_INGEST_CERT / SAVY_INGEST_KEY
+(default cert.pem / key.pem) configure the ingest port; SAVY_API_HOST and
+SAVY_API_PORT the HTTP API.
+"""
 
-print("TLS Server listening...")
+import os
 
-while True:
-    conn, addr = sock.accept()
-    tls_conn = context.wrap_socket(conn, server_side=True)
+import uvicorn
 
-    print("Connected:", addr)
-
-    data = tls_conn.recv(4096)
-
-    print("Received (secure):")
-    print(data.decode(errors="ignore"))
-
-    tls_conn.close()
+if __name__ == "__main__":
+    os.environ.setdefault("SAVY_INGEST", "1")
+    uvicorn.run(
+        "api.main:app",
+        host=os.getenv("SAVY_API_HOST", "0.0.0.0"),
+        port=int(os.getenv("SAVY_API_PORT", "8000")),
+        workers=int(os.getenv("SAVY_WORKERS", "1")),
+    )
@@ -9,6 +9,8 @@ from web3 import Web3
 from web3.contract import Contract
 from eth_account import Account
 
+from services.metrics_service import RPC_REQUEST_SECONDS, timer
+
 
 class Purpose(Enum):
     RESEARCH = 0
@@ -47,6 +49,14 @@ class DataRecord:
     is_encrypted: bool
 
 
+class TimedHTTPProvider(Web3.HTTPProvider):
+    """HTTP provider recording JSON-RPC latency per method"""
+
+    def make_request(self, method, params):
+        with timer(RPC_REQUEST_SECONDS, str(method)):
+            return super().make_request(method, params)
+
+
 class BlockchainService:
     """
     Layer 2: Polygon Blockchain Service
@@ -56,7 +66,7 @@ class BlockchainService:
     def __init__(
         self, rpc_url: str, private_key: str, contract_addresses: ContractAddresses
     ):
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        self.w3 = Web3(TimedHTTPProvider(rpc_url))
         self.account = Account.from_key(private_key)
         self.contract_addresses = contract_addresses
         self.consent_contract: Optional[Contract] = None
@@ -332,7 +342,7 @@ class KeyRecoveryService:
     """
 
     def __init__(self, rpc_url: str, private_key: str, contract_address: str):
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        self.w3 = Web3(TimedHTTPProvider(rpc_url))
         self.account = Account.from_key(private_key)
         self.contract_address = Web3.to_checksum_address(contract_address)
         self._load_contract()
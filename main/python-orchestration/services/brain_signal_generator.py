@@ -1,8 +1,15 @@
+import argparse
 import random
+import struct
 import time
+import json
+import hashlib
 import asyncio
 import logging
-from typing import List
+import numpy as np
+from scipy.signal import lfilter
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
 
 # Configure logging
 logging.basicConfig(
@@ -11,20 +18,153 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def generate_random_hex_code(length: int = 64) -> str:
-    """Generate a random hexadecimal code of specified length"""
-    hex_chars = "0123456789ABCDEF"
-    return "".join(random.choice(hex_chars) for _ in range(length))
+FRAME_MAGIC = b"SAVY"
+FRAME_VERSION = 1
+HEADER_SIZE = 32
+FOOTER_SIZE = 16
 
+# (low Hz, high Hz, amplitude uV) per band
+EEG_BANDS = {
+    "delta": (0.5, 4.0, 20.0),
+    "theta": (4.0, 8.0, 10.0),
+    "alpha": (8.0, 13.0, 15.0),
+    "beta": (13.0, 30.0, 5.0),
+}
 
-async def simulate_external_server_connection() -> str:
+
+def build_frame(
+    data: np.ndarray,
+    sampling_rate: int = 256,
+    start_timestamp: float = 0.0,
+    session_id: str = "",
+    events: Optional[List[Dict[str, Any]]] = None,
+) -> bytes:
+    """
+    Encode a (n_samples, n_channels) block in the parser's binary format
+
+    [Header][Data][Events][Footer], see EEGDataParser.hex_to_samples. The
+    footer is the SHA-1 of everything before it, truncated to 16 bytes.
+    """
+    n_samples, n_channels = data.shape
+
+    header = (
+        FRAME_MAGIC
+        + FRAME_VERSION.to_bytes(2, "little")
+        + n_channels.to_bytes(1, "little")
+        + n_samples.to_bytes(4, "little")
+        + sampling_rate.to_bytes(2, "little")
+        + struct.pack("<d", start_timestamp)
+        + session_id.encode("ascii", errors="ignore")[:11].ljust(11)
+    )
+    event_bytes = json.dumps({"events": events or []}).encode("utf-8")
+
+    body = b"".join(
+        [
+            header,
+            np.ascontiguousarray(data, dtype="<f4").tobytes(),
+            len(event_bytes).to_bytes(4, "little"),
+            event_bytes,
+        ]
+    )
+    return body + hashlib.sha1(body).digest()[:FOOTER_SIZE]
+
+
+@dataclass
+class SyntheticEEGSource:
+    """
+    Continuous multi-channel EEG-like signal source
+
+    Each channel is a sum of delta/theta/alpha/beta oscillations with
+    per-channel frequencies and phases, plus 1/f-ish noise, occasional
+    spikes and blink/marker events. Phases and time carry over between
+    blocks, so consecutive frames form one seamless recording.
+    """
+
+    num_channels: int = 4
+    sampling_rate: int = 256
+    session_id: str = ""
+    spike_rate: float = 0.2
+    event_rate: float = 0.1
+    seed: Optional[int] = None
+    start_timestamp: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        self.rng = np.random.default_rng(self.seed)
+        self.sample_index = 0
+
+        bands = list(EEG_BANDS.values())
+        self.freqs = np.array(
+            [[self.rng.uniform(low, high) for low, high, _ in bands]]
+            * self.num_channels
+        )
+        self.freqs += self.rng.normal(0, 0.2, self.freqs.shape)
+        self.amplitudes = np.array([amp for _, _, amp in bands]) * self.rng.uniform(
+            0.7, 1.3, (self.num_channels, len(bands))
+        )
+        self.phases = self.rng.uniform(0, 2 * np.pi, self.freqs.shape)
+        self.noise_state = np.zeros((1, self.num_channels))
+
+    def next_block(self, n_samples: int):
+        """Return (data, start_timestamp, events) for the next n_samples"""
+        fs = self.sampling_rate
+        t = (self.sample_index + np.arange(n_samples)) / fs
+        start = self.start_timestamp + self.sample_index / fs
+
+        # (n, channels, bands) oscillations summed over bands
+        angles = 2 * np.pi * t[:, None, None] * self.freqs[None] + self.phases[None]
+        data = (self.amplitudes[None] * np.sin(angles)).sum(axis=2)
+
+        # Brown-ish noise leaking back to zero, plus white noise
+        white = self.rng.normal(0, 1.0, (n_samples, self.num_channels))
+        drift, self.noise_state = lfilter(
+            [1.0], [1.0, -0.98], white, axis=0, zi=self.noise_state
+        )
+        data += 2.0 * drift + self.rng.normal(0, 2.0, data.shape)
+
+        events = []
+        duration = n_samples / fs
+
+        # Spikes: 30 ms sharp transients on a random channel
+        for _ in range(self.rng.poisson(self.spike_rate * duration)):
+            channel = int(self.rng.integers(self.num_channels))
+            at = int(self.rng.integers(n_samples))
+            width = max(1, int(0.03 * fs))
+            shape = np.hanning(width + 2)[1:-1] * self.rng.uniform(80, 200)
+            data[at : at + width, channel] += shape[: n_samples - at]
+
+        # Blinks and stimulus markers as frame events
+        for _ in range(self.rng.poisson(self.event_rate * duration)):
+            at = int(self.rng.integers(n_samples))
+            event_type = str(self.rng.choice(["blink", "marker"]))
+            events.append(
+                {
+                    "timestamp": start + at / fs,
+                    "type": event_type,
+                    "channel": 0 if event_type == "blink" else None,
+                    "duration": 0.3 if event_type == "blink" else 0.0,
+                    "metadata": {"source": "synthetic"},
+                }
+            )
+            if event_type == "blink":
+                width = min(int(0.3 * fs), n_samples - at)
+                data[at : at + width, :2] += np.hanning(width)[:, None] * 150
+
+        self.sample_index += n_samples
+        return data.astype(np.float32), start, events
+
+    def next_frame(self, n_samples: int) -> bytes:
+        """Return the next n_samples as a complete binary frame"""
+        data, start, events = self.next_block(n_samples)
+        return build_frame(data, self.sampling_rate, start, self.session_id, events)
+
+
+async def simulate_external_server_connection(source: SyntheticEEGSource) -> str:
     """Simulate connecting to an external server to get brain signal data"""
     # Simulate network latency
     await asyncio.sleep(random.uniform(0.1, 0.5))
 
-    # Generate random hex brain signal data
-    hex_code = generate_random_hex_code()
-    return hex_code
+    # One second of brain signal data as a hex frame
+    return source.next_frame(source.sampling_rate).hex()
 
 
 async def continuous_signal_generator():
@@ -33,13 +173,16 @@ async def continuous_signal_generator():
     logger.info("Simulating connection to external EEG server...")
     logger.info("=" * 80)
 
+    source = SyntheticEEGSource(session_id="demo")
+
     try:
         while True:
             # Get brain signal data
-            hex_data = await simulate_external_server_connection()
+            hex_data = await simulate_external_server_connection(source)
 
             # Print the received data
-            logger.info(f"Brain Signal Received: {hex_data}")
+            logger.info(f"Brain Signal Received: {len(hex_data) // 2} bytes")
+            logger.info(f"{hex_data[:64]}...")
 
             # Wait for next signal
             await asyncio.sleep(random.uniform(0.5, 2.0))
@@ -51,8 +194,197 @@ async def continuous_signal_generator():
         logger.error(f"Error: {e}")
 
 
+# ==================== LOAD GENERATOR ====================
+
+
+@dataclass
+class LoadStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    samples: int = 0
+    bytes_sent: int = 0
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        frames = len(self.latencies)
+        report = {
+            "frames": frames,
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 3),
+            "frames_per_s": round(frames / elapsed, 1) if elapsed else 0.0,
+            "samples_per_s": round(self.samples / elapsed, 1) if elapsed else 0.0,
+            "mbytes_per_s": round(self.bytes_sent / elapsed / 1e6, 3)
+            if elapsed
+            else 0.0,
+        }
+        if frames:
+            p50, p90, p99 = np.percentile(np.array(self.latencies) * 1000, [50, 90, 99])
+            report.update(
+                {
+                    "latency_p50_ms": round(p50, 2),
+                    "latency_p90_ms": round(p90, 2),
+                    "latency_p99_ms": round(p99, 2),
+                    "latency_max_ms": round(max(self.latencies) * 1000, 2),
+                }
+            )
+        return report
+
+
+async def _drive_http(client, source: SyntheticEEGSource, args, stats: LoadStats):
+    interval = 1.0 / args.rate
+    deadline = time.perf_counter() + args.duration
+    next_send = time.perf_counter()
+
+    while next_send < deadline:
+        hex_data = source.next_frame(args.block_samples).hex()
+        start = time.perf_counter()
+        try:
+            resp = await client.post(
+                "/api/v1/eeg/stream",
+                params={"session_id": source.session_id},
+                json={"session_id": source.session_id, "hex_data": hex_data},
+            )
+            resp.raise_for_status()
+            stats.latencies.append(time.perf_counter() - start)
+            stats.samples += args.block_samples * source.num_channels
+            stats.bytes_sent += len(hex_data)
+        except Exception as e:
+            stats.errors += 1
+            logger.debug(f"HTTP send failed: {e}")
+
+        next_send += interval
+        await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+
+
+async def _drive_ws(source: SyntheticEEGSource, args, stats: LoadStats):
+    import websockets
+
+    url = args.url.replace("http", "ws", 1).rstrip("/")
+    url = f"{url}/ws/eeg/stream/{source.session_id}?role=producer"
+    interval = 1.0 / args.rate
+    deadline = time.perf_counter() + args.duration
+
+    async with websockets.connect(url, max_size=None) as ws:
+        next_send = time.perf_counter()
+        while next_send < deadline:
+            hex_data = source.next_frame(args.block_samples).hex()
+            start = time.perf_counter()
+            try:
+                await ws.send(json.dumps({"hex_data": hex_data}))
+                reply = json.loads(await ws.recv())
+                if reply.get("type") == "error":
+                    raise RuntimeError(reply.get("error"))
+                stats.latencies.append(time.perf_counter() - start)
+                stats.samples += args.block_samples * source.num_channels
+                stats.bytes_sent += len(hex_data)
+            except Exception as e:
+                stats.errors += 1
+                logger.debug(f"WebSocket send failed: {e}")
+
+            next_send += interval
+            await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+
+
+async def _drive_tls(source: SyntheticEEGSource, args, stats: LoadStats):
+    """Length-prefixed binary frames to the TLS ingest port, one ack per frame"""
+    import ssl
+
+    context = ssl.create_default_context(cafile=args.cafile)
+    if not args.cafile:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    host, port = args.ingest.rsplit(":", 1)
+    interval = 1.0 / args.rate
+    deadline = time.perf_counter() + args.duration
+
+    reader, writer = await asyncio.open_connection(host, int(port), ssl=context)
+    try:
+        next_send = time.perf_counter()
+        while next_send < deadline:
+            frame = source.next_frame(args.block_samples)
+            start = time.perf_counter()
+            try:
+                writer.write(len(frame).to_bytes(4, "little") + frame)
+                await writer.drain()
+                _, accepted = struct.unpack("<Ii", await reader.readexactly(8))
+                if accepted < 0:
+                    raise RuntimeError("Frame rejected")
+                stats.latencies.append(time.perf_counter() - start)
+                stats.samples += accepted
+                stats.bytes_sent += len(frame) + 4
+            except Exception as e:
+                stats.errors += 1
+                logger.debug(f"TLS send failed: {e}")
+                if isinstance(e, (ConnectionError, asyncio.IncompleteReadError)):
+                    break
+
+            next_send += interval
+            await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+    finally:
+        writer.close()
+
+
+async def run_load(args) -> Dict[str, Any]:
+    """Drive args.sessions concurrent sessions and return a stats report"""
+    import httpx
+
+    stats = LoadStats()
+    sources = [
+        SyntheticEEGSource(
+            num_channels=args.channels,
+            sampling_rate=args.sampling_rate,
+            session_id=f"load{i:04d}",
+            seed=args.seed + i,
+        )
+        for i in range(args.sessions)
+    ]
+
+    start = time.perf_counter()
+    if args.transport == "ws":
+        await asyncio.gather(*(_drive_ws(s, args, stats) for s in sources))
+    elif args.transport == "tls":
+        await asyncio.gather(*(_drive_tls(s, args, stats) for s in sources))
+    else:
+        limits = httpx.Limits(max_connections=args.sessions)
+        async with httpx.AsyncClient(
+            base_url=args.url, limits=limits, timeout=30.0
+        ) as client:
+            await asyncio.gather(
+                *(_drive_http(client, s, args, stats) for s in sources)
+            )
+    elapsed = time.perf_counter() - start
+
+    return stats.report(elapsed)
+
+
 def main():
-    """Main function to start the brain signal receiver"""
+    """Main function to start the brain signal receiver or load generator"""
+    parser = argparse.ArgumentParser(description="Synthetic EEG signal generator")
+    parser.add_argument("--load", action="store_true", help="Drive load at --url")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--transport", choices=["http", "ws", "tls"], default="http")
+    parser.add_argument(
+        "--ingest", default="127.0.0.1:4433", help="TLS ingest host:port"
+    )
+    parser.add_argument("--cafile", help="CA to verify the ingest certificate")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=8.0, help="Frames/s/session")
+    parser.add_argument("--block-samples", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds")
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--sampling-rate", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.load:
+        logger.info(
+            f"Driving {args.sessions} sessions at {args.rate:g} frames/s "
+            f"over {args.transport} against "
+            f"{args.ingest if args.transport == 'tls' else args.url}"
+        )
+        report = asyncio.run(run_load(args))
+        logger.info(json.dumps(report, indent=2))
+        return
+
     logger.info("Brain Signal Monitoring System")
     logger.info("Version: 1.0.0")
     logger.info("Author: Savy EEG")
@@ -0,0 +1,405 @@
+import os
+import time
+import asyncio
+import logging
+import numpy as np
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.eeg_service import EEGChannel, EEGEvent
+from services.eeg_spectral import spectral_cache, welch
+from services.metrics_service import registry, stage_timer, record_error
+from services.session_store import buffer_tail_records
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - every worker scores its own sessions
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ANOMALY_TICKS = registry.counter(
+    "eeg_anomaly_ticks_total",
+    "Anomaly scheduler ticks by outcome",
+    ["result"],
+)
+ANOMALY_EVENTS = registry.counter(
+    "eeg_anomalies_total", "Anomaly events emitted into sessions"
+)
+
+FEATURE_BANDS = {
+    "delta": [0.5, 4],
+    "theta": [4, 8],
+    "alpha": [8, 13],
+    "beta": [13, 30],
+    "gamma": [30, 45],
+}
+FEATURE_NAMES = [f"log_{band}_power" for band in FEATURE_BANDS] + [
+    "log_line_length",
+    "log_variance",
+]
+
+AnomalySink = Callable[[str, List[EEGEvent]], Awaitable[Any]]
+
+
+def anomaly_features(block: np.ndarray, sampling_rate: float) -> np.ndarray:
+    """
+    One feature row per channel of an (n_samples, n_channels) block
+
+    Log band powers (Welch, 1 s segments), log line length (absolute change
+    per second) and log variance, in :data:`FEATURE_NAMES` order.
+    """
+    block = np.asarray(block, dtype=np.float64)
+    nperseg = min(len(block), int(sampling_rate))
+    _, power = welch(block.T, sampling_rate, nperseg)
+    bands = spectral_cache.band_indices(nperseg, sampling_rate, FEATURE_BANDS)
+    columns = [
+        power[:, bands[band]].sum(axis=1) if len(bands[band]) else np.zeros(len(power))
+        for band in FEATURE_BANDS
+    ]
+    columns.append(np.abs(np.diff(block, axis=0)).mean(axis=0) * sampling_rate)
+    columns.append(block.var(axis=0))
+    return np.log10(np.column_stack(columns) + 1e-12)
+
+
+def records_block(
+    records: np.ndarray, window_seconds: float
+) -> Optional[Tuple[List[int], np.ndarray, float, float]]:
+    """
+    Channels, (n_samples, n_channels) block, sampling rate and end time of
+    the last ``window_seconds`` of valid sample records
+
+    Channels are aligned on their latest samples. None when there is too
+    little data for a spectrum.
+    """
+    records = records[records["valid"] != 0]
+    if len(records) == 0:
+        return None
+    end = float(records["timestamp"][-1])
+    records = records[records["timestamp"] > end - window_seconds]
+
+    channels = np.unique(records["channel"]).tolist()
+    columns = [records["value"][records["channel"] == c] for c in channels]
+    length = min(len(column) for column in columns)
+    if length < 8:
+        return None
+
+    steps = np.diff(records["timestamp"][records["channel"] == channels[0]])
+    steps = steps[steps > 0]
+    if len(steps) == 0:
+        return None
+    sampling_rate = float(round(1.0 / np.median(steps)))
+
+    block = np.column_stack([column[-length:] for column in columns])
+    return channels, block, sampling_rate, end
+
+
+class AnomalyScheduler:
+    """
+    Micro-batched anomaly scoring across all live sessions
+
+    Every ``interval`` seconds the last ``window_seconds`` of each session
+    that received data since its last score is turned into per-channel
+    feature rows (:func:`anomaly_features`). All rows of the tick are scored
+    in one ``decision_function`` call of a scikit-learn outlier model, and
+    rows below ``threshold`` become ``EEGEvent(event_type="anomaly")``
+    passed to ``emit`` for their session.
+
+    Each tick has a ``deadline``: feature extraction stops halfway through
+    it and the remaining sessions go first on the next tick, and a score
+    that is not back by the deadline is dropped as stale. Without a
+    ``model`` an ``IsolationForest`` is fitted (off the event loop) on a
+    reservoir of recent feature rows and refitted every ``refit_ticks``
+    ticks; scoring starts once ``min_fit_rows`` rows were seen.
+
+    With ``lock_path`` set only the worker holding that flock scores, so
+    host-wide shared buffers are scored once.
+    """
+
+    def __init__(
+        self,
+        sessions,
+        emit: AnomalySink,
+        interval: float = 1.0,
+        window_seconds: float = 2.0,
+        deadline: float = 0.5,
+        threshold: float = 0.0,
+        model=None,
+        reservoir_rows: int = 5000,
+        min_fit_rows: int = 256,
+        refit_ticks: int = 60,
+        contamination: float = 0.005,
+        lock_path: Optional[str] = None,
+        seed: Optional[int] = None,
+    ):
+        self.sessions = sessions
+        self.emit = emit
+        self.interval = interval
+        self.window_seconds = window_seconds
+        self.deadline = deadline
+        self.threshold = threshold
+        self.model = model
+        self.fixed_model = model is not None
+        self.reservoir = np.zeros((reservoir_rows, len(FEATURE_NAMES)))
+        self.rows_seen = 0
+        self.min_fit_rows = min_fit_rows
+        self.refit_ticks = refit_ticks
+        self.contamination = contamination
+        self.lock_path = lock_path
+        self.ticks = 0
+        self.rng = np.random.default_rng(seed)
+
+        # Per session: end of the last scored window, records fetched for a
+        # window, and last anomaly time per channel
+        self.scored_until: Dict[str, float] = {}
+        self.tail_counts: Dict[str, int] = {}
+        self.last_anomaly: Dict[Tuple[str, int], float] = {}
+        self._deferred: List[str] = []
+        self._fitting: Optional[asyncio.Task] = None
+        self._lock_file = None
+
+    async def run(self):
+        """Score every ``interval`` seconds until cancelled"""
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                if not self._is_leader():
+                    continue
+                try:
+                    await self.tick()
+                except Exception as e:
+                    record_error("anomaly")
+                    logger.error(f"Anomaly tick failed: {e}")
+        finally:
+            if self._fitting is not None:
+                self._fitting.cancel()
+            self._release_leader()
+
+    async def tick(self) -> int:
+        """Score one batch of sessions; returns the anomalies emitted"""
+        started = time.perf_counter()
+        self.ticks += 1
+
+        with stage_timer("anomaly_features"):
+            batch, rows = self._gather(started + self.deadline / 2)
+        if not batch:
+            ANOMALY_TICKS.inc(1.0, "idle")
+            return 0
+
+        features = np.concatenate(rows)
+        self._observe(features)
+        if self.model is None:
+            ANOMALY_TICKS.inc(1.0, "warming_up")
+            return 0
+
+        model = self.model
+        remaining = started + self.deadline - time.perf_counter()
+        scoring = asyncio.ensure_future(asyncio.to_thread(self._score, model, features))
+        try:
+            scores = await asyncio.wait_for(asyncio.shield(scoring), max(remaining, 0))
+        except asyncio.TimeoutError:
+            ANOMALY_TICKS.inc(1.0, "deadline_missed")
+            logger.warning(
+                f"Anomaly scores for {len(features)} rows missed the "
+                f"{self.deadline:.3f}s deadline"
+            )
+            return 0
+
+        ANOMALY_TICKS.inc(1.0, "scored")
+        return await self._emit_anomalies(batch, features, scores)
+
+    def _gather(self, budget_end: float):
+        """Feature rows of sessions with new data, until ``budget_end``"""
+        # Live buffers only: looking a session up could restore a spilled one
+        live = dict(self.sessions.items())
+        for state in (self.scored_until, self.tail_counts):
+            for session_id in set(state) - set(live):
+                del state[session_id]
+        self.last_anomaly = {
+            key: value for key, value in self.last_anomaly.items() if key[0] in live
+        }
+
+        # Sessions left over from a tick that ran out of time go first
+        deferred = [s for s in self._deferred if s in live]
+        skip = set(deferred)
+        order = deferred + [s for s in live if s not in skip]
+        batch, rows = [], []
+        for index, session_id in enumerate(order):
+            if time.perf_counter() > budget_end:
+                self._deferred = order[index:]
+                break
+            window = self._window(session_id, live[session_id])
+            if window is None:
+                continue
+            channels, block, sampling_rate, end = window
+            self.scored_until[session_id] = end
+            batch.append((session_id, channels, end))
+            rows.append(anomaly_features(block, sampling_rate))
+        else:
+            self._deferred = []
+        return batch, rows
+
+    def _window(self, session_id: str, buffer):
+        """The session's newest window, or None without new data"""
+        last = buffer_tail_records(buffer, 1)
+        if len(last) == 0 or last["timestamp"][-1] <= self.scored_until.get(
+            session_id, -np.inf
+        ):
+            return None
+
+        # Fetch just enough of the buffer's tail to cover the window, growing
+        # the session's estimate when it falls short
+        count = self.tail_counts.get(session_id, 4096)
+        while True:
+            records = buffer_tail_records(buffer, count)
+            span = records["timestamp"][-1] - records["timestamp"][0]
+            if span >= self.window_seconds or len(records) < count:
+                break
+            count *= 2
+        inside = np.count_nonzero(
+            records["timestamp"] > records["timestamp"][-1] - self.window_seconds
+        )
+        self.tail_counts[session_id] = int(inside * 1.1) + 64
+
+        return records_block(records, self.window_seconds)
+
+    @staticmethod
+    def _score(model, features: np.ndarray) -> np.ndarray:
+        with stage_timer("anomaly_score"):
+            return model.decision_function(features)
+
+    async def _emit_anomalies(self, batch, features, scores) -> int:
+        emitted = 0
+        offset = 0
+        for session_id, channels, end in batch:
+            events = []
+            for i, channel in enumerate(channels):
+                row, score = features[offset + i], float(scores[offset + i])
+                last = self.last_anomaly.get((session_id, channel), -np.inf)
+                # Overlapping windows would report one anomaly twice
+                if score >= self.threshold or end - last < self.window_seconds:
+                    continue
+                self.last_anomaly[(session_id, channel)] = end
+                events.append(
+                    EEGEvent(
+                        timestamp=end,
+                        event_type="anomaly",
+                        channel=EEGChannel(channel),
+                        duration=self.window_seconds,
+                        metadata={
+                            "score": score,
+                            "threshold": self.threshold,
+                            "features": dict(zip(FEATURE_NAMES, row.tolist())),
+                        },
+                    )
+                )
+            offset += len(channels)
+
+            if events:
+                try:
+                    await self.emit(session_id, events)
+                except Exception as e:
+                    record_error("anomaly")
+                    logger.error(f"Anomaly events for {session_id} not sent: {e}")
+                    continue
+                ANOMALY_EVENTS.inc(float(len(events)))
+                emitted += len(events)
+        return emitted
+
+    def _observe(self, features: np.ndarray):
+        """Reservoir-sample the rows and refit the model when it is due"""
+        if self.fixed_model:
+            return
+        capacity = len(self.reservoir)
+        fill = max(0, min(capacity - self.rows_seen, len(features)))
+        self.reservoir[self.rows_seen : self.rows_seen + fill] = features[:fill]
+        # Past capacity, row k replaces a random slot with probability
+        # capacity / (k + 1)
+        seen = self.rows_seen + fill + np.arange(len(features) - fill)
+        slots = self.rng.integers(0, seen + 1)
+        replace = slots < capacity
+        self.reservoir[slots[replace]] = features[fill:][replace]
+        self.rows_seen += len(features)
+
+        held = min(self.rows_seen, capacity)
+        due = self.model is None or self.ticks % self.refit_ticks == 0
+        if held >= self.min_fit_rows and due and self._fitting is None:
+            seed = int(self.rng.integers(0, 2**31 - 1))
+            self._fitting = asyncio.ensure_future(
+                self._refit(self.reservoir[:held].copy(), seed)
+            )
+
+    async def _refit(self, rows: np.ndarray, seed: int):
+        try:
+            self.model = await asyncio.to_thread(self._fit, rows, seed)
+        except Exception as e:
+            record_error("anomaly")
+            logger.error(f"Anomaly model fit failed: {e}")
+        finally:
+            self._fitting = None
+
+    def _fit(self, rows: np.ndarray, seed: int):
+        from sklearn.ensemble import IsolationForest
+
+        with stage_timer("anomaly_fit"):
+            return IsolationForest(
+                n_estimators=100, contamination=self.contamination, random_state=seed
+            ).fit(rows)
+
+    def _is_leader(self) -> bool:
+        if self.lock_path is None or fcntl is None or self._lock_file is not None:
+            return True
+
+        lock_file = open(self.lock_path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+
+        self._lock_file = lock_file
+        logger.info(f"Worker {os.getpid()} is scoring anomalies")
+        return True
+
+    def _release_leader(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def create_anomaly_scheduler(sessions, emit: AnomalySink) -> Optional[AnomalyScheduler]:
+    """
+    Anomaly scheduler from environment, or None unless SAVY_ANOMALY=1
+
+    SAVY_ANOMALY_INTERVAL (seconds between ticks, default 1),
+    SAVY_ANOMALY_WINDOW (seconds scored per session, default 2),
+    SAVY_ANOMALY_DEADLINE (seconds per tick, default half the interval),
+    SAVY_ANOMALY_THRESHOLD (decision score below which a channel is
+    anomalous, default 0) and SAVY_ANOMALY_MODEL (a joblib-pickled fitted
+    scikit-learn outlier model). Without a model one is fitted on live
+    traffic, expecting SAVY_ANOMALY_CONTAMINATION (0.005) of it anomalous.
+    With the shared-memory session store one worker per host scores.
+    """
+    if os.getenv("SAVY_ANOMALY", "0").lower() in ("0", "false", "off"):
+        return None
+
+    model = None
+    model_path = os.getenv("SAVY_ANOMALY_MODEL", "")
+    if model_path:
+        import joblib
+
+        model = joblib.load(model_path)
+
+    interval = float(os.getenv("SAVY_ANOMALY_INTERVAL", "1"))
+    shared = os.getenv("SAVY_SESSION_STORE", "local").lower() == "shm"
+    namespace = os.getenv("SAVY_SHM_NAMESPACE", "savy")
+    return AnomalyScheduler(
+        sessions,
+        emit,
+        interval=interval,
+        window_seconds=float(os.getenv("SAVY_ANOMALY_WINDOW", "2")),
+        deadline=float(os.getenv("SAVY_ANOMALY_DEADLINE", str(interval / 2))),
+        threshold=float(os.getenv("SAVY_ANOMALY_THRESHOLD", "0")),
+        model=model,
+        contamination=float(os.getenv("SAVY_ANOMALY_CONTAMINATION", "0.005")),
+        lock_path=f"/tmp/{namespace}-eeg-anomaly.lock" if shared else None,
+    )
@@ -0,0 +1,912 @@
+import os
+import json
+import bisect
+import time
+import struct
+import asyncio
+import hashlib
+import logging
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.eeg_codec import CODECS, DEFAULT_CODEC, decode_samples, encode_samples
+from services.eeg_service import EEGEvent
+from services.metrics_service import registry, record_error
+from services.eeg_pyramid import (
+    BIN_DTYPE,
+    BIN_FACTOR,
+    TILE_BINS,
+    PyramidBuilder,
+    choose_level,
+    decode_tile,
+    encode_tile,
+    estimate_sampling_rate,
+)
+from services.session_store import (
+    SAMPLE_DTYPE,
+    buffer_records,
+    buffer_records_since,
+    event_from_dict,
+    event_to_dict,
+    load_window,
+    save_window,
+)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - single archiver per process instead
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_MAGIC = b"SVYA"
+CHUNK_VERSION = 2
+MANIFEST_VERSION = 3
+
+ARCHIVE_CHUNKS = registry.counter(
+    "eeg_archive_chunks_total", "Archive chunks by outcome", ["status"]
+)
+ARCHIVE_BYTES = registry.counter(
+    "eeg_archive_bytes_total",
+    "Archived sample bytes before and after encoding",
+    ["kind"],
+)
+ARCHIVE_TILES = registry.counter(
+    "eeg_archive_pyramid_tiles_total", "Pyramid tiles by outcome", ["status"]
+)
+ARCHIVE_GAPS = registry.counter(
+    "eeg_archive_gap_seconds_total",
+    "Seconds of stream trimmed from a live buffer before they were archived",
+)
+
+
+def encode_chunk(
+    records: np.ndarray,
+    events: List[EEGEvent],
+    session_id: str,
+    start: float,
+    end: float,
+    codec: str = DEFAULT_CODEC,
+) -> bytes:
+    """
+    Encode sample records as a compressed archive chunk
+
+    Layout: [Magic "SVYA"][Version u16][Header length u32][Header JSON]
+    [Values block][Timestamps block]. Records are grouped by channel; values
+    with their validity flags (0/1) form a float32 block and timestamps a
+    float64 block, both written by :func:`services.eeg_codec.encode_samples`.
+    """
+    records = records[np.argsort(records["channel"], kind="stable")]
+    channels, counts = np.unique(records["channel"], return_counts=True)
+
+    values = np.column_stack([records["value"], records["valid"]]).astype("<f4")
+    blocks = [
+        encode_samples(values, codec),
+        encode_samples(records["timestamp"], codec, dtype="<f8"),
+    ]
+
+    header = {
+        "session_id": session_id,
+        "codec": codec,
+        "start": start,
+        "end": end,
+        "channels": channels.tolist(),
+        "counts": counts.tolist(),
+        "events": [event_to_dict(e) for e in events],
+        "blocks": [len(block) for block in blocks],
+    }
+    header_bytes = json.dumps(header, default=float).encode("utf-8")
+    prefix = CHUNK_MAGIC + struct.pack("<HI", CHUNK_VERSION, len(header_bytes))
+    return b"".join([prefix, header_bytes, *blocks])
+
+
+def decode_chunk(chunk: bytes) -> Tuple[Dict[str, Any], np.ndarray, List[EEGEvent]]:
+    """Decode :func:`encode_chunk` output to (header, records, events)"""
+    if chunk[:4] != CHUNK_MAGIC:
+        raise ValueError("Not an EEG archive chunk")
+
+    version, header_length = struct.unpack_from("<HI", chunk, 4)
+    if version != CHUNK_VERSION:
+        raise ValueError(f"Unsupported chunk version: {version}")
+
+    header = json.loads(chunk[10 : 10 + header_length].decode("utf-8"))
+    if header["codec"] not in CODECS:
+        raise ValueError(f"Unsupported chunk codec: {header['codec']}")
+
+    offset = 10 + header_length
+    values_length, timestamps_length = header["blocks"]
+    values = decode_samples(chunk[offset : offset + values_length])
+    offset += values_length
+    timestamps = decode_samples(chunk[offset : offset + timestamps_length])
+    n = sum(header["counts"])
+    if values.shape != (n, 2) or timestamps.shape != (n, 1):
+        raise ValueError("Archive chunk blocks do not match its sample counts")
+
+    records = np.empty(n, SAMPLE_DTYPE)
+    records["timestamp"] = timestamps[:, 0]
+    records["value"] = values[:, 0]
+    records["channel"] = np.repeat(header["channels"], header["counts"])
+    records["valid"] = values[:, 1]
+
+    events = [event_from_dict(e) for e in header.pop("events")]
+    return header, records, events
+
+
+def _start(entry: Dict[str, Any]) -> float:
+    return entry["start"]
+
+
+def _link(value) -> str:
+    return value["/"] if isinstance(value, dict) else value
+
+
+def _event_key(event: EEGEvent) -> Tuple:
+    return (
+        event.timestamp,
+        event.event_type,
+        event.channel.value if event.channel else None,
+        event.duration,
+    )
+
+
+@dataclass
+class ArchiveChunk:
+    session_id: str
+    start: float
+    end: float
+    samples: int
+    payload: bytes
+
+
+@dataclass
+class ArchiveTile:
+    session_id: str
+    level: int
+    index: int
+    start: float
+    end: float
+    complete: bool
+    version: int
+    payload: bytes
+
+
+@dataclass
+class ArchiveCursor:
+    """Per-session archiving position and manifest"""
+
+    manifest: Dict[str, Any]
+    next_start: Optional[float] = None
+    last_sample: float = float("-inf")
+    last_progress: float = field(default_factory=time.time)
+    # Guards the manifest (uploads); sealing has its own lock because a seal
+    # waits for queue space that only the uploaders free
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    sealing: asyncio.Lock = field(default_factory=asyncio.Lock)
+    pyramid: Optional[PyramidBuilder] = None
+    pyramid_published: float = 0.0
+    # Keys of the buffered events already sealed into a chunk
+    archived_events: Optional[set] = None
+    # Chunks and tiles queued but not yet uploaded; a flushed cursor is
+    # dropped once this reaches zero
+    pending: int = 0
+    flushed: bool = False
+
+
+class _Window:
+    """A handed-over session window, read like a buffer"""
+
+    def __init__(self, records: np.ndarray, events: List[EEGEvent]):
+        self.data = records, events
+
+    def records(self) -> Tuple[np.ndarray, List[EEGEvent]]:
+        return self.data
+
+
+class SessionArchiver:
+    """
+    Background archival of live session buffers to IPFS
+
+    Every ``poll_interval`` seconds each live buffer is scanned for complete
+    ``chunk_seconds`` windows past the session's cursor. Sealed windows are
+    encoded in a worker thread and queued on a bounded queue; ``uploaders``
+    tasks push them to IPFS and republish the session manifest, which is
+    also kept under ``archive_dir`` so any worker can serve it and the
+    cursor survives restarts. A session with no new samples for
+    ``chunk_seconds`` has its partial tail sealed too. Only the buffer past
+    the cursor is converted to records on each scan. Events that arrive
+    after their window was sealed go out with the next chunk, whose span
+    is widened to cover them. A flushed session's cursor is dropped once
+    its last upload lands.
+
+    Sessions that are stopped or evicted (see :meth:`hand_off`) are saved
+    under ``archive_dir/handoff`` by whichever worker drops them; the
+    archiving worker seals and flushes them on its next pass.
+
+    Sealed samples also feed a min/max/mean pyramid (see
+    :mod:`services.eeg_pyramid`) whose tiles are uploaded on the same queue
+    and linked from the manifest: completed tiles once, the open tile of
+    each level every ``pyramid_interval`` seconds and when a session is
+    flushed.
+
+    With ``lock_path`` set only the worker holding that flock archives, so
+    host-wide shared buffers are archived once.
+    """
+
+    def __init__(
+        self,
+        sessions,
+        ipfs,
+        chunk_seconds: float = 5.0,
+        poll_interval: float = 1.0,
+        queue_size: int = 64,
+        uploaders: int = 2,
+        archive_dir: str = "archive",
+        lock_path: Optional[str] = None,
+        max_attempts: int = 3,
+        bucket_seconds: float = 3600.0,
+        pyramid_interval: float = 30.0,
+    ):
+        self.sessions = sessions
+        self.ipfs = ipfs
+        self.chunk_seconds = chunk_seconds
+        self.poll_interval = poll_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.uploaders = uploaders
+        self.archive_dir = archive_dir
+        self.lock_path = lock_path
+        self.max_attempts = max_attempts
+        self.bucket_seconds = bucket_seconds
+        self.pyramid_interval = pyramid_interval
+        self.cursors: Dict[str, ArchiveCursor] = {}
+        self._lock_file = None
+        self.handoff_dir = os.path.join(archive_dir, "handoff")
+        os.makedirs(self.handoff_dir, exist_ok=True)
+        # Evicted sessions are sealed, not dropped
+        sessions.eviction_hooks.append(self.hand_off)
+
+    # ---------- lifecycle ----------
+
+    async def run(self):
+        """Seal and upload until cancelled"""
+        async with self.ipfs:
+            workers = [
+                asyncio.create_task(self._upload_loop()) for _ in range(self.uploaders)
+            ]
+            try:
+                while True:
+                    await asyncio.sleep(self.poll_interval)
+                    if not self._is_leader():
+                        continue
+                    try:
+                        await self.seal_all()
+                    except Exception as e:
+                        record_error("archive")
+                        logger.error(f"Archive sweep failed: {e}")
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                self._release_leader()
+
+    async def drain(self, timeout: float = 10.0):
+        """Seal every partial chunk and wait for queued uploads (shutdown)"""
+        if not self._is_leader():
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"{self.queue.qsize()} archive chunks not uploaded at shutdown"
+            )
+
+    async def _drain(self):
+        await self.seal_all(force=True)
+        await self.queue.join()
+
+    async def flush(self, session_id: str, buffer=None):
+        """Seal everything buffered for a session and drop its cursor after"""
+        if buffer is None:
+            buffer = self.sessions.store.get(session_id)
+        if buffer is not None and self._is_leader():
+            await self.seal(session_id, buffer, force=True)
+            cursor = self.cursors.get(session_id)
+            if cursor is not None:
+                cursor.flushed = True
+                self._retire(session_id)
+
+    def hand_off(self, session_id: str, buffer=None) -> bool:
+        """
+        Save a session's window for the archiving worker before it is dropped
+
+        Called on any worker when a session is stopped or evicted. Only
+        writes a file: the leader seals it on its next pass, so the caller
+        neither waits on uploads nor loses the unsealed tail when it then
+        deletes the buffer. Returns False when there is nothing to save.
+        """
+        if buffer is None:
+            buffer = self.sessions.store.get(session_id)
+        if buffer is None or not len(buffer):
+            return False
+
+        records, events = buffer_records(buffer)
+        digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+        name = f"{time.time_ns()}-{os.getpid()}-{digest}.npz"
+        save_window(os.path.join(self.handoff_dir, name), records, events, session_id)
+        return True
+
+    async def seal_all(self, force: bool = False):
+        await self._seal_handoffs()
+        for session_id, buffer in self.sessions.items():
+            await self.seal(session_id, buffer, force)
+
+    async def _seal_handoffs(self):
+        """Seal and flush handed-off windows, oldest first"""
+        for name in sorted(os.listdir(self.handoff_dir)):
+            if not name.endswith(".npz"):
+                continue
+            path = os.path.join(self.handoff_dir, name)
+            try:
+                session_id, records, events = await asyncio.to_thread(load_window, path)
+                await self.flush(session_id, _Window(records, events))
+            except Exception as e:
+                record_error("archive")
+                logger.error(f"Dropping archive handoff {name}: {e}")
+            os.remove(path)
+
+    # ---------- sealing ----------
+
+    async def seal(self, session_id: str, buffer, force: bool = False) -> int:
+        """Queue every complete chunk of one session; returns chunks queued"""
+        cursor = self._cursor(session_id)
+        async with cursor.sealing:
+            return await self._seal(cursor, session_id, buffer, force)
+
+    async def _seal(
+        self, cursor: ArchiveCursor, session_id: str, buffer, force: bool
+    ) -> int:
+        since = float("-inf") if cursor.next_start is None else cursor.next_start
+        records, events = buffer_records_since(buffer, since)
+        if len(records) == 0:
+            return 0
+
+        if cursor.archived_events is None:
+            # Events before the cursor went out with earlier chunks
+            cursor.archived_events = {
+                _event_key(e) for e in events if e.timestamp < since
+            }
+        else:
+            # Forget events trimmed from the buffer
+            cursor.archived_events &= {_event_key(e) for e in events}
+        unsealed = sorted(
+            (e for e in events if _event_key(e) not in cursor.archived_events),
+            key=lambda e: e.timestamp,
+        )
+
+        timestamps = records["timestamp"]
+        now = time.time()
+        latest = float(timestamps[-1])
+        if latest > cursor.last_sample:
+            cursor.last_sample = latest
+            cursor.last_progress = now
+
+        if cursor.next_start is None:
+            cursor.next_start = float(timestamps[0])
+        elif timestamps[0] > cursor.next_start:
+            ARCHIVE_GAPS.inc(float(timestamps[0]) - cursor.next_start)
+            logger.warning(
+                f"Session {session_id} lost {timestamps[0] - cursor.next_start:.2f}s "
+                "before archiving; raise SAVY_BUFFER_SAMPLES or lower the chunk size"
+            )
+            cursor.next_start = float(timestamps[0])
+
+        windows = []
+        start = cursor.next_start
+        while start + self.chunk_seconds <= latest:
+            windows.append((start, start + self.chunk_seconds))
+            start += self.chunk_seconds
+        idle = now - cursor.last_progress > self.chunk_seconds
+        if (force or idle) and start <= latest:
+            windows.append((start, float(np.nextafter(latest, np.inf))))
+
+        queued = 0
+        tiles = []
+        for start, end in windows:
+            lo, hi = np.searchsorted(timestamps, [start, end])
+            cursor.next_start = end
+            if lo == hi:
+                continue
+
+            pyramid = await self._pyramid(cursor, records[lo:hi])
+            tiles += await asyncio.to_thread(pyramid.add, records[lo:hi])
+
+            # Includes late events from windows sealed earlier
+            window_events = [e for e in unsealed if e.timestamp < end]
+            unsealed = unsealed[len(window_events) :]
+            await self._queue_chunk(
+                cursor, session_id, records[lo:hi], window_events, start, end
+            )
+            queued += 1
+
+        late = [e for e in unsealed if e.timestamp < cursor.next_start]
+        if late and (force or idle):
+            # No samples left to carry them; seal the events on their own
+            await self._queue_chunk(
+                cursor,
+                session_id,
+                np.empty(0, SAMPLE_DTYPE),
+                late,
+                late[0].timestamp,
+                float(np.nextafter(late[-1].timestamp, np.inf)),
+            )
+            queued += 1
+
+        if cursor.pyramid is not None and (
+            force
+            or idle
+            or tiles
+            or now - cursor.pyramid_published >= self.pyramid_interval
+        ):
+            tiles += cursor.pyramid.open_tiles()
+            cursor.pyramid_published = now
+        for tile in tiles:
+            cursor.manifest["pyramid"]["sequence"] += 1
+            payload = await asyncio.to_thread(encode_tile, tile)
+            cursor.pending += 1
+            await self.queue.put(
+                ArchiveTile(
+                    session_id,
+                    tile.level,
+                    tile.index,
+                    tile.start,
+                    tile.end,
+                    tile.complete,
+                    cursor.manifest["pyramid"]["sequence"],
+                    payload,
+                )
+            )
+
+        return queued
+
+    async def _queue_chunk(
+        self,
+        cursor: ArchiveCursor,
+        session_id: str,
+        records: np.ndarray,
+        events: List[EEGEvent],
+        start: float,
+        end: float,
+    ):
+        """Encode a window and queue it for upload"""
+        if events:
+            start = min(start, events[0].timestamp)
+        payload = await asyncio.to_thread(
+            encode_chunk, records, events, session_id, start, end
+        )
+        cursor.archived_events.update(_event_key(e) for e in events)
+        ARCHIVE_BYTES.inc(float(len(records) * SAMPLE_DTYPE.itemsize), "raw")
+        ARCHIVE_BYTES.inc(float(len(payload)), "encoded")
+        cursor.pending += 1
+        await self.queue.put(
+            ArchiveChunk(session_id, start, end, len(records), payload)
+        )
+
+    async def _pyramid(self, cursor: ArchiveCursor, records: np.ndarray):
+        """The session's pyramid builder, resuming open tiles after a restart"""
+        if cursor.pyramid is not None:
+            return cursor.pyramid
+
+        manifest = cursor.manifest
+        if "pyramid" not in manifest:
+            rate = estimate_sampling_rate(records)
+            manifest["pyramid"] = {
+                "sampling_rate": rate,
+                "bin_factor": BIN_FACTOR,
+                "tile_bins": TILE_BINS,
+                "bin_seconds": PyramidBuilder(rate).bin_seconds,
+                "sequence": 0,
+                "tiles": [],
+            }
+
+        info = manifest["pyramid"]
+        pyramid = PyramidBuilder(info["sampling_rate"], len(info["bin_seconds"]))
+        for entry in info["tiles"]:
+            if entry["complete"]:
+                continue
+            try:
+                _, bins = decode_tile(await self.ipfs.cat(entry["cid"]))
+                pyramid.open[entry["level"] - 1] = bins.copy()
+            except Exception as e:
+                record_error("archive")
+                logger.error(f"Could not resume pyramid tile {entry['cid']}: {e}")
+
+        cursor.pyramid = pyramid
+        return pyramid
+
+    # ---------- upload ----------
+
+    async def _upload_loop(self):
+        while True:
+            item = await self.queue.get()
+            is_tile = isinstance(item, ArchiveTile)
+            counter = ARCHIVE_TILES if is_tile else ARCHIVE_CHUNKS
+            try:
+                if is_tile:
+                    await self._upload_tile(item)
+                else:
+                    await self._upload(item)
+                counter.inc(1.0, "uploaded")
+            except Exception as e:
+                counter.inc(1.0, "failed")
+                record_error("archive")
+                kind = "pyramid tile" if is_tile else "chunk"
+                logger.error(
+                    f"Dropping archive {kind} {item.session_id}@{item.start}: {e}"
+                )
+            finally:
+                cursor = self.cursors.get(item.session_id)
+                if cursor is not None:
+                    cursor.pending -= 1
+                    self._retire(item.session_id)
+                self.queue.task_done()
+
+    async def _add(self, payload: bytes) -> str:
+        for attempt in range(self.max_attempts):
+            try:
+                return await self.ipfs.add_bytes(payload, pin=True)
+            except Exception:
+                if attempt == self.max_attempts - 1:
+                    raise
+                await asyncio.sleep(2**attempt)
+
+    async def _upload(self, chunk: ArchiveChunk):
+        cid = await self._add(chunk.payload)
+
+        cursor = self._cursor(chunk.session_id)
+        async with cursor.lock:
+            entry = {
+                "cid": cid,
+                "start": chunk.start,
+                "end": chunk.end,
+                "samples": chunk.samples,
+                "size": len(chunk.payload),
+            }
+            chunks = cursor.manifest["chunks"]
+            starts = [c["start"] for c in chunks]
+            chunks.insert(bisect.bisect(starts, chunk.start), entry)
+            await self._publish(cursor.manifest, self._bucket(chunk.start))
+            self._save_manifest(chunk.session_id, cursor.manifest)
+
+    async def _upload_tile(self, tile: ArchiveTile):
+        cid = await self._add(tile.payload)
+
+        cursor = self._cursor(tile.session_id)
+        async with cursor.lock:
+            tiles = cursor.manifest["pyramid"]["tiles"]
+            key = (tile.level, tile.index)
+            current = next((t for t in tiles if (t["level"], t["index"]) == key), None)
+            if current is not None and current["version"] > tile.version:
+                return
+
+            if current is not None:
+                tiles.remove(current)
+            tiles.append(
+                {
+                    "level": tile.level,
+                    "index": tile.index,
+                    "start": tile.start,
+                    "end": tile.end,
+                    "complete": tile.complete,
+                    "version": tile.version,
+                    "cid": cid,
+                }
+            )
+            tiles.sort(key=lambda t: (t["level"], t["index"]))
+            if cursor.manifest["chunks"]:
+                await self._publish(cursor.manifest)
+            self._save_manifest(tile.session_id, cursor.manifest)
+
+    async def _publish(self, manifest: Dict[str, Any], key: Optional[int] = None):
+        """
+        Republish the manifest root, and one time bucket node, as DAG nodes
+
+        Root: session fields plus ``buckets`` of ``{start, end, chunks, node}``
+        and ``pyramid`` tiles of ``{level, index, start, end, tile}``; bucket
+        node: ``chunks`` of ``{start, end, samples, size, cid}``. Children are
+        linked as ``{"/": cid}``, and buckets sit on a fixed ``bucket_seconds``
+        grid so a new chunk only touches its own bucket.
+        """
+        if key is not None:
+            await self._publish_bucket(manifest, key)
+        manifest["updated_at"] = time.time()
+
+        root = {
+            k: v
+            for k, v in manifest.items()
+            if k not in ("chunks", "buckets", "pyramid", "manifest_cid")
+        }
+        root["start"] = manifest["chunks"][0]["start"]
+        root["end"] = manifest["chunks"][-1]["end"]
+        root["samples"] = sum(c["samples"] for c in manifest["chunks"])
+        root["buckets"] = [
+            {**{k: v for k, v in b.items() if k != "cid"}, "node": {"/": b["cid"]}}
+            for b in manifest["buckets"]
+        ]
+        if "pyramid" in manifest:
+            pyramid = manifest["pyramid"]
+            root["pyramid"] = {
+                **{k: v for k, v in pyramid.items() if k not in ("tiles", "sequence")},
+                "tiles": [
+                    {
+                        **{k: v for k, v in t.items() if k not in ("cid", "version")},
+                        "tile": {"/": t["cid"]},
+                    }
+                    for t in pyramid["tiles"]
+                ],
+            }
+        manifest["manifest_cid"] = await self.ipfs.dag_put(root)
+
+    async def _publish_bucket(self, manifest: Dict[str, Any], key: int):
+        chunks = [c for c in manifest["chunks"] if self._bucket(c["start"]) == key]
+        node_cid = await self.ipfs.dag_put(
+            {
+                "start": chunks[0]["start"],
+                "end": chunks[-1]["end"],
+                "chunks": [{**c, "cid": {"/": c["cid"]}} for c in chunks],
+            }
+        )
+
+        buckets = [b for b in manifest["buckets"] if b["key"] != key]
+        buckets.append(
+            {
+                "key": key,
+                "start": chunks[0]["start"],
+                "end": chunks[-1]["end"],
+                "chunks": len(chunks),
+                "cid": node_cid,
+            }
+        )
+        buckets.sort(key=_start)
+        manifest["buckets"] = buckets
+
+    # ---------- manifests ----------
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def get_manifest(self, session_id: str) -> Optional[Dict[str, Any]]:
+        cursor = self.cursors.get(session_id)
+        if cursor is not None:
+            return cursor.manifest
+        return self._load_manifest(session_id)
+
+    def _cursor(self, session_id: str) -> ArchiveCursor:
+        cursor = self.cursors.get(session_id)
+        if cursor is None:
+            manifest = self._load_manifest(session_id) or {
+                "version": MANIFEST_VERSION,
+                "session_id": session_id,
+                "codec": DEFAULT_CODEC,
+                "chunk_seconds": self.chunk_seconds,
+                "bucket_seconds": self.bucket_seconds,
+                "chunks": [],
+                "buckets": [],
+                "manifest_cid": None,
+            }
+            manifest.setdefault("buckets", [])
+            cursor = self.cursors[session_id] = ArchiveCursor(manifest)
+            if manifest["chunks"]:
+                cursor.next_start = manifest["chunks"][-1]["end"]
+        return cursor
+
+    def _retire(self, session_id: str):
+        """Drop a flushed session's cursor once nothing is left to upload"""
+        cursor = self.cursors.get(session_id)
+        if cursor is not None and cursor.flushed and cursor.pending <= 0:
+            del self.cursors[session_id]
+
+    def _manifest_path(self, session_id: str) -> str:
+        digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.archive_dir, f"{digest}.json")
+
+    def _load_manifest(self, session_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._manifest_path(session_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _save_manifest(self, session_id: str, manifest: Dict[str, Any]):
+        path = self._manifest_path(session_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    # ---------- leadership ----------
+
+    def _is_leader(self) -> bool:
+        if self.lock_path is None or fcntl is None or self._lock_file is not None:
+            return True
+
+        lock_file = open(self.lock_path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+
+        self._lock_file = lock_file
+        logger.info(f"Worker {os.getpid()} is archiving sessions")
+        return True
+
+    def _release_leader(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+@dataclass
+class ArchiveRange:
+    session_id: str
+    records: np.ndarray
+    events: List[EEGEvent]
+    chunks: int
+
+
+async def read_range(
+    ipfs, manifest_cid: str, start: float, end: float, concurrency: int = 8
+) -> ArchiveRange:
+    """
+    Samples of an archived session with ``start <= timestamp < end``
+
+    Walks the manifest DAG to the buckets and then the chunks overlapping
+    the window, fetching each level concurrently (at most ``concurrency``
+    chunks in flight) and decoding chunks in worker threads. Records are
+    returned in time order, channels interleaved.
+    """
+    root = await ipfs.dag_get(manifest_cid)
+    buckets = [b for b in root["buckets"] if b["start"] < end and b["end"] > start]
+    nodes = await asyncio.gather(*(ipfs.dag_get(_link(b["node"])) for b in buckets))
+    chunks = [
+        c
+        for node in nodes
+        for c in node["chunks"]
+        if c["start"] < end and c["end"] > start
+    ]
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(entry: Dict[str, Any]):
+        async with semaphore:
+            payload = await ipfs.cat(_link(entry["cid"]))
+        return await asyncio.to_thread(decode_chunk, payload)
+
+    decoded = await asyncio.gather(*(fetch(c) for c in chunks))
+
+    records = np.concatenate([r for _, r, _ in decoded] or [np.empty(0, SAMPLE_DTYPE)])
+    timestamps = records["timestamp"]
+    records = records[(timestamps >= start) & (timestamps < end)]
+    records = records[np.lexsort((records["channel"], records["timestamp"]))]
+
+    events = sorted(
+        (e for _, _, chunk_events in decoded for e in chunk_events),
+        key=lambda e: e.timestamp,
+    )
+    events = [e for e in events if start <= e.timestamp < end]
+
+    return ArchiveRange(root["session_id"], records, events, len(chunks))
+
+
+class RangeTooLongError(ValueError):
+    """A raw-sample window longer than the caller allows"""
+
+
+@dataclass
+class ArchiveOverview:
+    session_id: str
+    level: int
+    bin_seconds: float
+    channels: Dict[int, Dict[str, np.ndarray]]
+    fetched: int
+
+
+async def read_overview(
+    ipfs,
+    manifest_cid: str,
+    start: float,
+    end: float,
+    max_points: int,
+    concurrency: int = 8,
+    max_range_seconds: Optional[float] = None,
+) -> ArchiveOverview:
+    """
+    Min/max/mean of an archived session at no more than ``max_points`` per channel
+
+    Picks the most detailed pyramid level whose bins over the window fit
+    ``max_points`` and fetches only its tiles overlapping the window, so the
+    cost follows ``max_points`` rather than the window length. Short windows
+    fall through to raw samples (level 0, min = max = mean), as do sessions
+    archived without a pyramid; those raise :class:`RangeTooLongError` when
+    the window is longer than ``max_range_seconds``. Per channel,
+    ``timestamps`` are bin start times.
+    """
+    root = await ipfs.dag_get(manifest_cid)
+    pyramid = root.get("pyramid")
+    if pyramid is None:
+        level = 0
+    else:
+        level = choose_level(
+            pyramid["bin_seconds"], pyramid["sampling_rate"], end - start, max_points
+        )
+
+    if level == 0:
+        if max_range_seconds is not None and end - start > max_range_seconds:
+            raise RangeTooLongError(f"Range longer than {max_range_seconds:g}s")
+        window = await read_range(ipfs, manifest_cid, start, end, concurrency)
+        channels = {}
+        for channel in np.unique(window.records["channel"]):
+            selected = window.records[window.records["channel"] == channel]
+            values = np.ascontiguousarray(selected["value"])
+            channels[int(channel)] = {
+                "timestamps": np.ascontiguousarray(selected["timestamp"]),
+                "min": values,
+                "max": values,
+                "mean": values,
+            }
+        return ArchiveOverview(root["session_id"], 0, 0.0, channels, window.chunks)
+
+    bin_seconds = pyramid["bin_seconds"][level - 1]
+    tiles = [
+        t
+        for t in pyramid["tiles"]
+        if t["level"] == level and t["start"] < end and t["end"] > start
+    ]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(entry: Dict[str, Any]):
+        async with semaphore:
+            payload = await ipfs.cat(_link(entry["tile"]))
+        return await asyncio.to_thread(decode_tile, payload)
+
+    decoded = await asyncio.gather(*(fetch(t) for t in tiles))
+    bins = np.concatenate([b for _, b in decoded] or [np.empty(0, BIN_DTYPE)])
+    first, last = np.floor(start / bin_seconds), np.ceil(end / bin_seconds)
+    bins = bins[(bins["bin"] >= first) & (bins["bin"] < last)]
+    bins = bins[np.lexsort((bins["bin"], bins["channel"]))]
+
+    channels = {}
+    for channel in np.unique(bins["channel"]):
+        selected = bins[bins["channel"] == channel]
+        channels[int(channel)] = {
+            "timestamps": selected["bin"] * bin_seconds,
+            "min": np.ascontiguousarray(selected["min"]),
+            "max": np.ascontiguousarray(selected["max"]),
+            "mean": (selected["sum"] / selected["count"]).astype(np.float32),
+        }
+    return ArchiveOverview(root["session_id"], level, bin_seconds, channels, len(tiles))
+
+
+def create_archiver(sessions, ipfs) -> Optional[SessionArchiver]:
+    """
+    Session archiver from environment, or None unless SAVY_ARCHIVE=1
+
+    SAVY_ARCHIVE_CHUNK_SECONDS, SAVY_ARCHIVE_QUEUE (sealed chunks waiting for
+    upload), SAVY_ARCHIVE_UPLOADERS, SAVY_ARCHIVE_DIR (local manifests) and
+    SAVY_ARCHIVE_PYRAMID_SECONDS (open pyramid tile republish interval).
+    With the shared-memory session store one worker per host archives.
+    """
+    if os.getenv("SAVY_ARCHIVE", "0").lower() in ("0", "false", "off"):
+        return None
+
+    shared = os.getenv("SAVY_SESSION_STORE", "local").lower() == "shm"
+    namespace = os.getenv("SAVY_SHM_NAMESPACE", "savy")
+    return SessionArchiver(
+        sessions,
+        ipfs,
+        chunk_seconds=float(os.getenv("SAVY_ARCHIVE_CHUNK_SECONDS", "5")),
+        queue_size=int(os.getenv("SAVY_ARCHIVE_QUEUE", "64")),
+        uploaders=int(os.getenv("SAVY_ARCHIVE_UPLOADERS", "2")),
+        archive_dir=os.getenv("SAVY_ARCHIVE_DIR", "archive"),
+        pyramid_interval=float(os.getenv("SAVY_ARCHIVE_PYRAMID_SECONDS", "30")),
+        lock_path=f"/tmp/{namespace}-eeg-archiver.lock" if shared else None,
+    )
@@ -0,0 +1,254 @@
+import zlib
+import struct
+import numpy as np
+import zstandard
+from typing import Optional, Tuple
+
+# Codec names as they appear in upload/download metadata
+CODEC_RAW = "raw"
+CODEC_LPC_ZSTD = "lpc-zstd"
+CODEC_LPC_DEFLATE = "lpc-deflate"
+CODECS = (CODEC_RAW, CODEC_LPC_ZSTD, CODEC_LPC_DEFLATE)
+DEFAULT_CODEC = CODEC_LPC_ZSTD
+
+BLOCK_MAGIC = b"SVYZ"
+FRAME_MAGIC = b"SVYF"
+CODEC_VERSION = 1
+# Blocks of float64 (archive timestamps) carry their word size
+WIDE_VERSION = 2
+MAX_ORDER = 3
+
+# Parser frame layout, see EEGDataParser.hex_to_samples
+FRAME_HEADER_SIZE = 32
+
+_CODEC_IDS = {name: i for i, name in enumerate(CODECS)}
+_FLOATS = {4: np.dtype("<f4"), 8: np.dtype("<f8")}
+
+
+def _sign_bit(words: np.ndarray):
+    return words.dtype.type(1) << words.dtype.type(8 * words.itemsize - 1)
+
+
+def _to_ordered(values: np.ndarray) -> np.ndarray:
+    """float32/64 bit patterns as uint32/64 that sort like the floats"""
+    bits = values.view(f"u{values.itemsize}")
+    sign = _sign_bit(bits)
+    return np.where(bits & sign, ~bits, bits | sign)
+
+
+def _from_ordered(ordered: np.ndarray) -> np.ndarray:
+    sign = _sign_bit(ordered)
+    bits = np.where(ordered & sign, ordered & ~sign, ~ordered)
+    return bits.view(f"f{ordered.itemsize}")
+
+
+def _residuals(ordered: np.ndarray, order: int) -> np.ndarray:
+    """Fixed polynomial predictor residuals along the last axis, mod 2**bits"""
+    if order == 0:
+        return ordered
+    warmup = np.zeros(ordered.shape[:-1] + (order,), ordered.dtype)
+    return np.diff(ordered, n=order, prepend=warmup)
+
+
+def _zigzag(residuals: np.ndarray) -> np.ndarray:
+    signed = residuals.view(f"i{residuals.itemsize}")
+    return ((signed << 1) ^ (signed >> (8 * residuals.itemsize - 1))).view(
+        residuals.dtype
+    )
+
+
+def _unzigzag(zigzag: np.ndarray) -> np.ndarray:
+    signed_type = f"i{zigzag.itemsize}"
+    signed = (zigzag >> 1).view(signed_type) ^ -(zigzag.view(signed_type) & 1)
+    return signed.view(zigzag.dtype)
+
+
+def _shuffle(words: np.ndarray) -> bytes:
+    """Split (channels, n) words into one byte plane per byte, MSB last"""
+    channels, n = words.shape
+    width = words.itemsize
+    planes = words.astype(f"<u{width}").view(np.uint8).reshape(channels, n, width)
+    return np.ascontiguousarray(planes.transpose(2, 0, 1)).tobytes()
+
+
+def _unshuffle(data: bytes, channels: int, n: int, width: int = 4) -> np.ndarray:
+    planes = np.frombuffer(data, np.uint8).reshape(width, channels, n)
+    words = np.ascontiguousarray(planes.transpose(1, 2, 0))
+    return words.view(f"<u{width}").reshape(channels, n)
+
+
+def _decompress(codec: str, payload: bytes, size: int) -> bytes:
+    """Entropy-decode exactly ``size`` bytes, rejecting payloads that overrun"""
+    if codec == CODEC_LPC_ZSTD:
+        # A frame's declared content size is not trusted for the allocation
+        with zstandard.ZstdDecompressor().stream_reader(payload) as reader:
+            data = reader.read(size + 1)
+    else:
+        decompressor = zlib.decompressobj()
+        data = decompressor.decompress(payload, size + 1)
+    if len(data) != size:
+        raise ValueError("Encoded EEG block does not match its declared size")
+    return data
+
+
+def encode_samples(
+    data: np.ndarray,
+    codec: str = DEFAULT_CODEC,
+    level: Optional[int] = None,
+    dtype: str = "<f4",
+) -> bytes:
+    """
+    Losslessly encode a (n_samples, n_channels) block as ``dtype`` floats
+
+    Layout: [Magic "SVYZ"][Version u8][Codec u8][Channels u16][Samples u32]
+    [Predictor order per channel u8][Payload]; float64 blocks are version 2
+    and add a word size byte (8) before the orders. For the LPC codecs each
+    channel's floats are mapped to order-preserving integers, predicted with
+    the fixed polynomial predictor (order 0-3) that minimizes its residuals,
+    zigzag coded, byte-shuffled into planes and entropy coded with zstd or
+    deflate. Decoding restores the exact bit patterns. ``dtype`` is "<f4"
+    (samples) or "<f8" (e.g. timestamps).
+    """
+    if codec not in _CODEC_IDS:
+        raise ValueError(f"Unknown EEG codec: {codec}")
+    if np.dtype(dtype) not in _FLOATS.values():
+        raise ValueError(f"Unsupported EEG block dtype: {dtype}")
+
+    data = np.asarray(data, dtype=np.dtype(dtype).newbyteorder("<"))
+    if data.ndim == 1:
+        data = data[:, None]
+    n, channels = data.shape
+
+    if codec == CODEC_RAW:
+        orders = np.zeros(channels, np.uint8)
+        payload = np.ascontiguousarray(data).tobytes()
+    else:
+        ordered = _to_ordered(np.ascontiguousarray(data.T))
+        best = _zigzag(ordered)
+        orders = np.zeros(channels, np.uint8)
+        scores = best.sum(axis=1, dtype=np.float64)
+
+        for order in range(1, MAX_ORDER + 1):
+            zigzag = _zigzag(_residuals(ordered, order))
+            order_scores = zigzag.sum(axis=1, dtype=np.float64)
+            better = order_scores < scores
+            best[better] = zigzag[better]
+            orders[better] = order
+            scores = np.minimum(scores, order_scores)
+
+        shuffled = _shuffle(best)
+        if codec == CODEC_LPC_ZSTD:
+            payload = zstandard.ZstdCompressor(level=level or 3).compress(shuffled)
+        else:
+            payload = zlib.compress(shuffled, level or 6)
+
+    version = CODEC_VERSION if data.itemsize == 4 else WIDE_VERSION
+    header = BLOCK_MAGIC + struct.pack("<BBHI", version, _CODEC_IDS[codec], channels, n)
+    if version == WIDE_VERSION:
+        header += bytes([data.itemsize])
+    return header + orders.tobytes() + payload
+
+
+def decode_samples(blob: bytes) -> np.ndarray:
+    """Decode :func:`encode_samples` output to a (n_samples, n_channels) block"""
+    codec, channels, n, width, orders, payload = _read_block(blob)
+    size = width * channels * n
+
+    if codec == CODEC_RAW:
+        if len(payload) != size:
+            raise ValueError("Encoded EEG block does not match its declared size")
+        return np.frombuffer(payload, _FLOATS[width]).reshape(n, channels).copy()
+
+    shuffled = _decompress(codec, payload, size)
+    words = _unzigzag(_unshuffle(shuffled, channels, n, width))
+    for order in np.unique(orders):
+        rows = orders == order
+        for _ in range(order):
+            words[rows] = np.cumsum(words[rows], axis=1, dtype=words.dtype)
+
+    return _from_ordered(words).T.copy()
+
+
+def block_codec(blob: bytes) -> str:
+    """Codec name of an encoded block or frame"""
+    if blob[:4] == FRAME_MAGIC:
+        blob = blob[5 + FRAME_HEADER_SIZE + 4 :]
+    return _read_block(blob)[0]
+
+
+def _read_block(blob: bytes) -> Tuple[str, int, int, int, np.ndarray, bytes]:
+    if blob[:4] != BLOCK_MAGIC:
+        raise ValueError("Not an encoded EEG block")
+
+    version, codec_id, channels, n = struct.unpack_from("<BBHI", blob, 4)
+    if version not in (CODEC_VERSION, WIDE_VERSION):
+        raise ValueError(f"Unsupported codec version: {version}")
+    if codec_id >= len(CODECS):
+        raise ValueError(f"Unknown EEG codec id: {codec_id}")
+
+    offset, width = 12, 4
+    if version == WIDE_VERSION:
+        offset, width = 13, blob[12]
+        if width not in _FLOATS:
+            raise ValueError(f"Unsupported EEG block word size: {width}")
+
+    orders = np.frombuffer(blob, np.uint8, channels, offset)
+    return CODECS[codec_id], channels, n, width, orders, blob[offset + channels :]
+
+
+def encode_frame(frame: bytes, codec: str = DEFAULT_CODEC) -> bytes:
+    """
+    Encode the data section of a parser frame, keeping everything else
+
+    Layout: [Magic "SVYF"][Version u8][Frame header 32B][Block length u32]
+    [Encoded block][Frame events and footer, verbatim]. :func:`decode_frame`
+    returns the original frame byte for byte, so its checksum still holds.
+    """
+    if len(frame) < FRAME_HEADER_SIZE:
+        raise ValueError("Not an EEG frame")
+
+    channels = frame[6]
+    n = int.from_bytes(frame[7:11], "little")
+    data_end = FRAME_HEADER_SIZE + n * channels * 4
+    if channels == 0 or len(frame) < data_end:
+        raise ValueError("Not an EEG frame")
+
+    data = np.frombuffer(frame, "<f4", n * channels, FRAME_HEADER_SIZE)
+    block = encode_samples(data.reshape(n, channels), codec)
+
+    return b"".join(
+        [
+            FRAME_MAGIC,
+            bytes([CODEC_VERSION]),
+            frame[:FRAME_HEADER_SIZE],
+            len(block).to_bytes(4, "little"),
+            block,
+            frame[data_end:],
+        ]
+    )
+
+
+def decode_frame(blob: bytes) -> bytes:
+    """Restore the parser frame encoded by :func:`encode_frame`"""
+    if blob[:4] != FRAME_MAGIC:
+        raise ValueError("Not an encoded EEG frame")
+    if blob[4] != CODEC_VERSION:
+        raise ValueError(f"Unsupported codec version: {blob[4]}")
+
+    header = blob[5 : 5 + FRAME_HEADER_SIZE]
+    block_start = 5 + FRAME_HEADER_SIZE + 4
+    block_length = int.from_bytes(blob[block_start - 4 : block_start], "little")
+    block = blob[block_start : block_start + block_length]
+
+    data = decode_samples(block).astype("<f4").tobytes()
+    return header + data + blob[block_start + block_length :]
+
+
+def negotiate_codec(stored: Optional[str], accepted: Optional[str]) -> Optional[str]:
+    """
+    Codec to send data stored as ``stored``, or None to send the plain frame
+
+    ``accepted`` is the client's comma-separated list of codecs it decodes.
+    """
+    names = {name.strip().lower() for name in (accepted or "").split(",")}
+    return stored if stored in names else None
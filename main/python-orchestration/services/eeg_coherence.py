@@ -0,0 +1,181 @@
+import os
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence
+
+from services.eeg_spectral import (
+    band_coherence,
+    density_scale,
+    fold_one_sided,
+    magnitude_squared_coherence,
+    segment_spectra,
+    spectral_cache,
+)
+
+
+class StreamingCoherence:
+    """
+    Running cross-spectral density matrix of one multichannel stream
+
+    Blocks are cut into the same half-overlapping Hann segments as
+    :func:`~services.eeg_spectral.cross_spectral_density`; each new segment's
+    cross-spectra of every channel pair are added with one ``einsum``, and
+    older segments fade with a time constant of ``memory_seconds`` (None
+    keeps them all, giving exactly the Welch CSD of the whole stream).
+    """
+
+    def __init__(
+        self,
+        sampling_rate: float,
+        num_channels: int,
+        nperseg: int = 256,
+        memory_seconds: Optional[float] = 10.0,
+    ):
+        self.sampling_rate = sampling_rate
+        self.num_channels = num_channels
+        self.nperseg = nperseg
+        self.step = nperseg - nperseg // 2
+        self.memory_seconds = memory_seconds
+        self.decay = (
+            np.exp(-self.step / (sampling_rate * memory_seconds))
+            if memory_seconds
+            else 1.0
+        )
+
+        bins = nperseg // 2 + 1
+        self.cross = np.zeros((num_channels, num_channels, bins), np.complex128)
+        self.weight = 0.0
+        self.segments = 0
+
+        self._pending = np.zeros((num_channels, 0))
+        self.last_timestamp = -np.inf
+
+    @property
+    def frequencies(self) -> np.ndarray:
+        return spectral_cache.rfft_frequencies(self.nperseg, self.sampling_rate)
+
+    def process(self, block: np.ndarray, timestamps: np.ndarray) -> int:
+        """
+        Add an (n_samples, n_channels) block; returns the segments completed
+
+        Samples not newer than the last one seen are skipped.
+        """
+        fresh = timestamps > self.last_timestamp
+        if not fresh.all():
+            block, timestamps = block[fresh], timestamps[fresh]
+        if len(timestamps) == 0:
+            return 0
+        self.last_timestamp = float(timestamps[-1])
+
+        pending = np.concatenate([self._pending, block.T], axis=1)
+        count = (pending.shape[1] - self.nperseg) // self.step + 1
+        if count <= 0:
+            self._pending = pending
+            return 0
+
+        segments = np.lib.stride_tricks.sliding_window_view(
+            pending, self.nperseg, axis=-1
+        )[:, : count * self.step : self.step]
+        spectrum = segment_spectra(segments)
+        # Newest segment at full weight; scaling the spectra by the square
+        # root keeps the pair products a single two-operand einsum
+        weights = self.decay ** np.arange(count - 1, -1, -1, dtype=np.float64)
+        spectrum *= np.sqrt(weights)[:, None]
+
+        self.cross *= self.decay**count
+        self.cross += np.einsum(
+            "isf,jsf->ijf", spectrum.conj(), spectrum, optimize=True
+        )
+        self.weight = self.weight * self.decay**count + float(weights.sum())
+        self.segments += count
+
+        self._pending = pending[:, count * self.step :]
+        return count
+
+    def csd(self) -> np.ndarray:
+        """The (channels, channels, frequencies) cross-spectral density"""
+        if not self.weight:
+            return np.zeros_like(self.cross)
+        csd = self.cross * (
+            density_scale(self.nperseg, self.sampling_rate) / self.weight
+        )
+        fold_one_sided(csd, self.nperseg)
+        return csd
+
+    def coherence(self, bands: Dict[str, Sequence[float]]) -> Dict[str, np.ndarray]:
+        """Magnitude-squared coherence of every channel pair, per band"""
+        return band_coherence(
+            magnitude_squared_coherence(self.csd()),
+            self.nperseg,
+            self.sampling_rate,
+            bands,
+        )
+
+
+class CoherenceBank:
+    """
+    Running coherence of the sessions someone is watching
+
+    Like :class:`~services.eeg_spectrogram.SpectrogramBank`: a session's
+    state starts from its buffer on first request and every ingested block
+    extends it. Least recently used sessions are dropped first.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 1.0,
+        memory_seconds: Optional[float] = 10.0,
+        max_sessions: int = 256,
+    ):
+        self.window_seconds = window_seconds
+        self.memory_seconds = memory_seconds
+        self.max_sessions = max_sessions
+        self.states: "OrderedDict[str, StreamingCoherence]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def peek(self, session_id: str) -> Optional[StreamingCoherence]:
+        """The session's coherence state if it has one"""
+        return self.states.get(session_id)
+
+    def create(
+        self, session_id: str, sampling_rate: float, num_channels: int
+    ) -> StreamingCoherence:
+        """A new, empty state for the session, replacing any other"""
+        state = StreamingCoherence(
+            sampling_rate,
+            num_channels,
+            nperseg=max(2, int(round(self.window_seconds * sampling_rate))),
+            memory_seconds=self.memory_seconds,
+        )
+        self.states[session_id] = state
+        self.states.move_to_end(session_id)
+        while len(self.states) > self.max_sessions:
+            self.states.popitem(last=False)
+        return state
+
+    def touch(self, session_id: str):
+        if session_id in self.states:
+            self.states.move_to_end(session_id)
+
+    def discard(self, session_id: str):
+        self.states.pop(session_id, None)
+
+
+def create_coherence_bank() -> Optional[CoherenceBank]:
+    """
+    Coherence bank from environment, or None when SAVY_COHERENCE=0
+
+    SAVY_COHERENCE_WINDOW (seconds per segment, default 1),
+    SAVY_COHERENCE_MEMORY (time constant in seconds, default 10; 0 averages
+    the whole stream) and SAVY_COHERENCE_SESSIONS (default 256).
+    """
+    if os.getenv("SAVY_COHERENCE", "1").lower() in ("0", "false", "off"):
+        return None
+    memory = float(os.getenv("SAVY_COHERENCE_MEMORY", "10"))
+    return CoherenceBank(
+        window_seconds=float(os.getenv("SAVY_COHERENCE_WINDOW", "1")),
+        memory_seconds=memory or None,
+        max_sessions=int(os.getenv("SAVY_COHERENCE_SESSIONS", "256")),
+    )
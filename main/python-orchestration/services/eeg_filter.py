@@ -0,0 +1,168 @@
+import os
+import numpy as np
+from collections import OrderedDict
+from scipy import signal
+from typing import Dict, Optional, Tuple
+
+
+def design_filter_bank(
+    sampling_rate: float,
+    low_cutoff: float = 0.5,
+    high_cutoff: float = 40.0,
+    notch_freq: Optional[float] = 50.0,
+    order: int = 4,
+    notch_q: float = 30.0,
+) -> np.ndarray:
+    """
+    Band-pass plus notch as one cascade of second-order sections
+
+    Cutoffs at or above Nyquist are dropped (high-pass only, no notch) so
+    low sampling rates still get a stable filter.
+    """
+    nyquist = sampling_rate / 2
+    if high_cutoff < nyquist:
+        sos = signal.butter(
+            order,
+            [low_cutoff, high_cutoff],
+            btype="bandpass",
+            fs=sampling_rate,
+            output="sos",
+        )
+    else:
+        sos = signal.butter(
+            order, low_cutoff, btype="highpass", fs=sampling_rate, output="sos"
+        )
+
+    if notch_freq and notch_freq < nyquist:
+        b, a = signal.iirnotch(notch_freq, notch_q, fs=sampling_rate)
+        sos = np.vstack([sos, signal.tf2sos(b, a)])
+    return sos
+
+
+class StreamingFilter:
+    """
+    SOS filter over consecutive blocks of one multichannel stream
+
+    The ``zi`` state carries across :meth:`process` calls, so filtering a
+    stream block by block gives the same output as filtering it in one go:
+    there are no transients at block boundaries and each block costs
+    O(new samples). The state starts at the filter's steady state for the
+    first sample, which keeps the electrode DC offset from ringing at the
+    start of a session; the offline equivalent is
+    ``sosfilt(sos, x, axis=0, zi=sosfilt_zi(sos)[:, :, None] * x[0])``.
+    """
+
+    def __init__(self, sos: np.ndarray, num_channels: int):
+        self.sos = sos
+        self.num_channels = num_channels
+        self._zi_step = signal.sosfilt_zi(sos)
+        self.zi = np.zeros((len(sos), 2, num_channels))
+        self.started = np.zeros(num_channels, dtype=bool)
+
+    def _start(self, channels: np.ndarray, first: np.ndarray):
+        self.zi[:, :, channels] = self._zi_step[:, :, None] * first
+        self.started[channels] = True
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Filter an (n_samples, n_channels) block, all channels at once"""
+        block = np.asarray(block, dtype=np.float64)
+        if len(block) == 0:
+            return block
+        if not self.started.all():
+            pending = np.flatnonzero(~self.started)
+            self._start(pending, block[0, pending])
+
+        filtered, self.zi = signal.sosfilt(self.sos, block, axis=0, zi=self.zi)
+        return filtered
+
+    def process_channel(self, index: int, values: np.ndarray) -> np.ndarray:
+        """Filter one channel's samples when channels arrive unevenly"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return values
+        if not self.started[index]:
+            self._start(np.array([index]), values[:1])
+
+        filtered, self.zi[:, :, index] = signal.sosfilt(
+            self.sos, values, zi=self.zi[:, :, index]
+        )
+        return filtered
+
+    def reset(self):
+        self.zi[:] = 0.0
+        self.started[:] = False
+
+
+class FilterBank:
+    """
+    Streaming filter state per session, least recently used dropped first
+
+    Filters live in worker memory: with the shared-memory session store a
+    session's state restarts when its blocks move to another worker.
+    """
+
+    def __init__(
+        self,
+        low_cutoff: float = 0.5,
+        high_cutoff: float = 40.0,
+        notch_freq: Optional[float] = 50.0,
+        max_sessions: int = 4096,
+    ):
+        self.low_cutoff = low_cutoff
+        self.high_cutoff = high_cutoff
+        self.notch_freq = notch_freq
+        self.max_sessions = max_sessions
+        self.filters: "OrderedDict[str, StreamingFilter]" = OrderedDict()
+        self._designs: Dict[float, np.ndarray] = {}
+        self._keys: Dict[str, Tuple[float, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.filters)
+
+    def get(
+        self, session_id: str, sampling_rate: float, num_channels: int
+    ) -> StreamingFilter:
+        """The session's filter, new when the stream layout changes"""
+        key = (sampling_rate, num_channels)
+        stream_filter = self.filters.get(session_id)
+        if stream_filter is not None and self._keys[session_id] == key:
+            self.filters.move_to_end(session_id)
+            return stream_filter
+
+        stream_filter = self.create(sampling_rate, num_channels)
+        self.filters[session_id] = stream_filter
+        self.filters.move_to_end(session_id)
+        self._keys[session_id] = key
+
+        while len(self.filters) > self.max_sessions:
+            evicted, _ = self.filters.popitem(last=False)
+            del self._keys[evicted]
+        return stream_filter
+
+    def create(self, sampling_rate: float, num_channels: int) -> StreamingFilter:
+        """A filter with fresh state, not tied to any session"""
+        if sampling_rate not in self._designs:
+            self._designs[sampling_rate] = design_filter_bank(
+                sampling_rate, self.low_cutoff, self.high_cutoff, self.notch_freq
+            )
+        return StreamingFilter(self._designs[sampling_rate], num_channels)
+
+    def discard(self, session_id: str):
+        self.filters.pop(session_id, None)
+        self._keys.pop(session_id, None)
+
+
+def create_filter_bank(filter_params: Dict[str, float]) -> Optional[FilterBank]:
+    """
+    Per-session filter bank from the processor's filter parameters
+
+    None when SAVY_STREAM_FILTER=0, in which case streams are served raw.
+    """
+    if os.getenv("SAVY_STREAM_FILTER", "1").lower() in ("0", "false", "off"):
+        return None
+    return FilterBank(
+        filter_params["low_cutoff"],
+        filter_params["high_cutoff"],
+        filter_params["notch_freq"],
+        max_sessions=int(os.getenv("SAVY_STREAM_FILTER_SESSIONS", "4096")),
+    )
@@ -0,0 +1,171 @@
+import logging
+import numpy as np
+from typing import List, Optional, Union
+
+from services.eeg_service import MAX_CHANNELS
+from services.metrics_service import registry
+
+logger = logging.getLogger(__name__)
+
+# Parser frame layout, see EEGDataParser.frame_to_samples
+HEADER_SIZE = 32
+EVENTS_LENGTH_SIZE = 4
+FOOTER_SIZE = 16
+
+REASSEMBLY_DROPPED = registry.counter(
+    "eeg_reassembly_dropped_bytes_total",
+    "Bytes skipped while resynchronizing chunked device streams",
+)
+
+# Reassembler states: what the bytes at the read position are waiting for
+_HEADER, _EVENTS_LENGTH, _BODY = range(3)
+
+Chunk = Union[bytes, bytearray, memoryview]
+
+
+class FrameReassembler:
+    """
+    Incremental parser frame reassembly for chunked device streams
+
+    Chunks of any size are appended to one reusable bytearray; complete
+    frames are returned by :meth:`feed` as soon as the lengths declared in
+    their header (samples x channels) and events section are satisfied,
+    however the stream was split or coalesced. Pending bytes are never
+    re-copied per chunk: the read position advances through the buffer, which
+    is rewound when it empties and compacted only once the consumed prefix
+    outgrows the pending tail.
+
+    A header with an impossible layout (no channels or more than the parser
+    supports, no sampling rate) or declaring a frame larger than
+    ``max_frame_bytes`` is treated as corruption, and the stream is scanned
+    byte by byte for the next plausible header. The frame format has no
+    magic; for devices that write a fixed one, pass it as ``magic`` to also
+    require it and resynchronize straight to its next occurrence.
+    """
+
+    def __init__(
+        self,
+        max_frame_bytes: int = 16 << 20,
+        magic: Optional[bytes] = None,
+        initial_capacity: int = 64 << 10,
+    ):
+        self.max_frame_bytes = max_frame_bytes
+        self.magic = magic
+        self.dropped_bytes = 0
+        self._buffer = bytearray(initial_capacity)
+        self._start = 0
+        self._end = 0
+        self._state = _HEADER
+        self._need = HEADER_SIZE
+        self._data_length = 0
+        self._hex_nibble = ""
+
+    def __len__(self) -> int:
+        """Bytes received but not yet returned as a frame"""
+        return self._end - self._start
+
+    def feed(self, chunk: Chunk) -> List[bytes]:
+        """Append a chunk; returns the frames it completed, in order"""
+        self._append(chunk)
+        frames = []
+
+        while self._end - self._start >= self._need:
+            start = self._start
+            if self._state == _HEADER:
+                header = self._buffer[start : start + HEADER_SIZE]
+                if not self._plausible(header):
+                    self._resync()
+                    continue
+                channels = header[6]
+                samples = int.from_bytes(header[7:11], "little")
+                self._data_length = samples * channels * 4
+                self._state = _EVENTS_LENGTH
+                self._need = HEADER_SIZE + self._data_length + EVENTS_LENGTH_SIZE
+
+            elif self._state == _EVENTS_LENGTH:
+                at = start + HEADER_SIZE + self._data_length
+                events_length = int.from_bytes(
+                    self._buffer[at : at + EVENTS_LENGTH_SIZE], "little"
+                )
+                self._state = _BODY
+                self._need = self._need + events_length + FOOTER_SIZE
+
+            else:
+                frames.append(bytes(self._buffer[start : start + self._need]))
+                self._start += self._need
+                self._state = _HEADER
+                self._need = HEADER_SIZE
+
+            if self._need > self.max_frame_bytes:
+                self._resync()
+
+        self._compact()
+        return frames
+
+    def feed_hex(self, text: str) -> List[bytes]:
+        """:meth:`feed` for hex text, which may split a byte between chunks"""
+        text = self._hex_nibble + text.strip()
+        self._hex_nibble = text[-1] if len(text) % 2 else ""
+        return self.feed(bytes.fromhex(text[: len(text) - len(self._hex_nibble)]))
+
+    def reset(self):
+        """Drop any partial frame"""
+        self._start = self._end = 0
+        self._state = _HEADER
+        self._need = HEADER_SIZE
+        self._hex_nibble = ""
+
+    def _append(self, chunk: Chunk):
+        n = len(chunk)
+        if self._end + n > len(self._buffer):
+            self._compact(force=True)
+            if self._end + n > len(self._buffer):
+                self._buffer.extend(bytes(max(n, len(self._buffer))))
+        self._buffer[self._end : self._end + n] = chunk
+        self._end += n
+
+    def _compact(self, force: bool = False):
+        pending = self._end - self._start
+        if pending == 0:
+            self._start = self._end = 0
+        elif self._start and (force or self._start > pending):
+            self._buffer[:pending] = self._buffer[self._start : self._end]
+            self._start, self._end = 0, pending
+
+    def _plausible(self, header: Chunk) -> bool:
+        """Whether a header can start a frame"""
+        if self.magic and not header.startswith(self.magic):
+            return False
+        channels = header[6]
+        sampling_rate = int.from_bytes(header[11:13], "little")
+        return 1 <= channels <= MAX_CHANNELS and sampling_rate > 0
+
+    def _next_plausible(self) -> int:
+        """First offset past the read position with a plausible header layout"""
+        first, last = self._start + 1, self._end - HEADER_SIZE
+        if last < first:
+            return first
+        data = np.frombuffer(self._buffer, np.uint8, self._end)
+        channels = data[first + 6 : last + 7]
+        has_rate = (data[first + 11 : last + 12] | data[first + 12 : last + 13]) > 0
+        hits = np.flatnonzero((channels >= 1) & (channels <= MAX_CHANNELS) & has_rate)
+        return first + int(hits[0]) if len(hits) else last + 1
+
+    def _resync(self):
+        """Skip to the next candidate header after the current read position"""
+        if not self.magic:
+            skip_to = self._next_plausible()
+        else:
+            skip_to = self._buffer.find(self.magic, self._start + 1, self._end)
+            if skip_to < 0:
+                # Keep a tail that may be the start of a magic split by chunks
+                skip_to = max(self._start + 1, self._end - len(self.magic) + 1)
+
+        skipped = skip_to - self._start
+        self.dropped_bytes += skipped
+        REASSEMBLY_DROPPED.inc(float(skipped))
+        logger.warning(f"Skipped {skipped} bytes of malformed EEG stream")
+
+        self._start = skip_to
+        self._state = _HEADER
+        self._need = HEADER_SIZE
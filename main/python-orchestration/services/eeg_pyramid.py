@@ -0,0 +1,196 @@
+import json
+import struct
+import numpy as np
+import zstandard
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+BIN_FACTOR = 8
+TILE_BINS = 1024
+MAX_LEVELS = 6
+
+TILE_MAGIC = b"SVYP"
+TILE_VERSION = 1
+
+# One aggregate per (bin, channel); bin is the index on the level's time grid
+BIN_DTYPE = np.dtype(
+    [
+        ("bin", "<i8"),
+        ("channel", "u1"),
+        ("min", "<f4"),
+        ("max", "<f4"),
+        ("sum", "<f8"),
+        ("count", "<u4"),
+    ]
+)
+
+
+def aggregate(bins: np.ndarray) -> np.ndarray:
+    """Merge aggregates sharing (bin, channel)"""
+    if len(bins) == 0:
+        return bins
+
+    bins = bins[np.lexsort((bins["channel"], bins["bin"]))]
+    changed = (bins["bin"][1:] != bins["bin"][:-1]) | (
+        bins["channel"][1:] != bins["channel"][:-1]
+    )
+    starts = np.flatnonzero(np.concatenate([[True], changed]))
+
+    merged = np.empty(len(starts), BIN_DTYPE)
+    merged["bin"] = bins["bin"][starts]
+    merged["channel"] = bins["channel"][starts]
+    merged["min"] = np.minimum.reduceat(bins["min"], starts)
+    merged["max"] = np.maximum.reduceat(bins["max"], starts)
+    merged["sum"] = np.add.reduceat(bins["sum"], starts)
+    merged["count"] = np.add.reduceat(bins["count"], starts)
+    return merged
+
+
+def bins_from_records(records: np.ndarray, bin_seconds: float) -> np.ndarray:
+    """Level-1 aggregates of sample records"""
+    bins = np.empty(len(records), BIN_DTYPE)
+    bins["bin"] = np.floor(records["timestamp"] / bin_seconds).astype(np.int64)
+    bins["channel"] = records["channel"]
+    bins["min"] = bins["max"] = records["value"]
+    bins["sum"] = records["value"]
+    bins["count"] = 1
+    return aggregate(bins)
+
+
+def coarsen(bins: np.ndarray) -> np.ndarray:
+    """Aggregates of the next level up (BIN_FACTOR bins per bin)"""
+    coarse = bins.copy()
+    coarse["bin"] //= BIN_FACTOR
+    return aggregate(coarse)
+
+
+def estimate_sampling_rate(records: np.ndarray) -> float:
+    """Per-channel sampling rate of a block of records, rounded to 1 Hz"""
+    timestamps = records["timestamp"][records["channel"] == records["channel"][0]]
+    if len(timestamps) < 2 or timestamps[-1] <= timestamps[0]:
+        return 256.0
+    return float(
+        max(1, round((len(timestamps) - 1) / (timestamps[-1] - timestamps[0])))
+    )
+
+
+@dataclass
+class PyramidTile:
+    level: int
+    index: int
+    bin_seconds: float
+    bins: np.ndarray
+    complete: bool
+
+    @property
+    def start(self) -> float:
+        return self.index * TILE_BINS * self.bin_seconds
+
+    @property
+    def end(self) -> float:
+        return (self.index + 1) * TILE_BINS * self.bin_seconds
+
+
+class PyramidBuilder:
+    """
+    Incremental min/max/mean pyramid of one session
+
+    Level ``k`` aggregates ``BIN_FACTOR ** k`` samples per bin on a fixed
+    time grid, so partial bins at chunk edges merge exactly. Bins are grouped
+    in tiles of ``TILE_BINS``; a tile is complete once data past it arrives
+    (records are added in time order) and never changes after that.
+    """
+
+    def __init__(self, sampling_rate: float, levels: int = MAX_LEVELS):
+        self.sampling_rate = sampling_rate
+        self.bin_seconds = [
+            BIN_FACTOR**k / sampling_rate for k in range(1, levels + 1)
+        ]
+        self.open = [np.empty(0, BIN_DTYPE) for _ in range(levels)]
+
+    def add(self, records: np.ndarray) -> List[PyramidTile]:
+        """Fold in sample records; returns the tiles completed by them"""
+        completed = []
+        new = bins_from_records(records, self.bin_seconds[0])
+
+        for level, bin_seconds in enumerate(self.bin_seconds):
+            if level:
+                new = coarsen(new)
+            bins = aggregate(np.concatenate([self.open[level], new]))
+
+            tiles = bins["bin"] // TILE_BINS
+            done = tiles < tiles.max() if len(bins) else np.zeros(0, bool)
+            for index in np.unique(tiles[done]):
+                completed.append(
+                    PyramidTile(
+                        level + 1,
+                        int(index),
+                        bin_seconds,
+                        bins[tiles == index],
+                        complete=True,
+                    )
+                )
+            self.open[level] = bins[~done]
+
+        return completed
+
+    def open_tiles(self) -> List[PyramidTile]:
+        """Current partial tile of every level"""
+        return [
+            PyramidTile(
+                level + 1,
+                int(bins["bin"][0] // TILE_BINS),
+                self.bin_seconds[level],
+                bins,
+                complete=False,
+            )
+            for level, bins in enumerate(self.open)
+            if len(bins)
+        ]
+
+
+def encode_tile(tile: PyramidTile) -> bytes:
+    """[Magic "SVYP"][Version u16][Header length u32][Header JSON][zstd bins]"""
+    header = {
+        "level": tile.level,
+        "index": tile.index,
+        "bin_seconds": tile.bin_seconds,
+        "count": len(tile.bins),
+        "complete": tile.complete,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    prefix = TILE_MAGIC + struct.pack("<HI", TILE_VERSION, len(header_bytes))
+    body = zstandard.ZstdCompressor(level=3).compress(tile.bins.tobytes())
+    return prefix + header_bytes + body
+
+
+def decode_tile(data: bytes) -> Tuple[Dict[str, Any], np.ndarray]:
+    if data[:4] != TILE_MAGIC:
+        raise ValueError("Not an EEG pyramid tile")
+
+    version, header_length = struct.unpack_from("<HI", data, 4)
+    if version != TILE_VERSION:
+        raise ValueError(f"Unsupported tile version: {version}")
+
+    header = json.loads(data[10 : 10 + header_length].decode("utf-8"))
+    raw = zstandard.ZstdDecompressor().decompress(
+        data[10 + header_length :],
+        max_output_size=header["count"] * BIN_DTYPE.itemsize,
+    )
+    return header, np.frombuffer(raw, BIN_DTYPE)
+
+
+def choose_level(
+    bin_seconds: List[float], sampling_rate: float, duration: float, max_points: int
+) -> int:
+    """
+    Level whose bins fit ``max_points`` over ``duration`` with most detail
+
+    0 means raw samples; falls back to the coarsest level when none fits.
+    """
+    if duration * sampling_rate <= max_points:
+        return 0
+    for level, seconds in enumerate(bin_seconds, start=1):
+        if duration / seconds <= max_points:
+            return level
+    return len(bin_seconds)
@@ -0,0 +1,93 @@
+import numpy as np
+from typing import Dict, Optional, Sequence, Tuple
+
+from services.eeg_spectral import SpectralCache, spectral_cache, welch
+
+# Per metric, where the score starts to drop and where it reaches 0. Kurtosis
+# tolerates single blinks and spikes; electrode pops run into the hundreds
+QUALITY_LIMITS = {
+    "flatline": (0.1, 0.5),
+    "clipping": (0.0, 0.05),
+    "line_noise": (0.1, 0.5),
+    "kurtosis": (10.0, 100.0),
+}
+
+
+def signal_quality(
+    block: np.ndarray,
+    sampling_rate: float,
+    limits: Optional[Dict[str, Tuple[float, float]]] = None,
+    line_frequencies: Sequence[float] = (50.0, 60.0),
+    clip_level: float = 10000.0,
+    flat_tolerance: float = 1e-6,
+    cache: Optional[SpectralCache] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Signal-quality metrics and score per channel of an (n_samples, n_channels)
+    block
+
+    - ``flatline``: fraction of sample-to-sample steps within ``flat_tolerance``
+    - ``clipping``: fraction of samples pinned at the channel's extremes (two
+      in a row within 0.1% of its range) or beyond ``clip_level``
+    - ``line_noise``: share of the power above 1 Hz within 1 Hz (or a bin,
+      for short blocks) of a mains frequency, the larger of 50 and 60 Hz
+    - ``kurtosis``: excess kurtosis; large for spiky artefacts
+
+    ``score`` multiplies, over the metrics, how far each is from its limit:
+    1 up to the ``(onset, limit)`` onset, falling linearly to 0 at the limit.
+    """
+    cache = spectral_cache if cache is None else cache
+    limits = {**QUALITY_LIMITS, **(limits or {})}
+    block = np.asarray(block, dtype=np.float64)
+    length, channels = block.shape
+
+    centred = block - block.mean(axis=0)
+    m2 = np.mean(centred**2, axis=0)
+    m4 = np.mean(centred**4, axis=0)
+    kurtosis = np.divide(m4, m2**2, out=np.full(channels, 3.0), where=m2 > 0) - 3
+
+    if length > 1:
+        flatline = np.mean(np.abs(np.diff(block, axis=0)) <= flat_tolerance, axis=0)
+        high, low = block.max(axis=0), block.min(axis=0)
+        margin = 1e-3 * (high - low)
+        at_high, at_low = block >= high - margin, block <= low + margin
+        pinned = (at_high[1:] & at_high[:-1]) | (at_low[1:] & at_low[:-1])
+        clipping = np.maximum(
+            pinned.mean(axis=0), (np.abs(block) >= clip_level).mean(axis=0)
+        )
+    else:
+        flatline = clipping = np.zeros(channels)
+
+    line_noise = np.zeros(channels)
+    nperseg = min(length, int(sampling_rate))
+    if nperseg >= 8:
+        _, power = welch(block.T, sampling_rate, nperseg, cache)
+        bands = {"total": (1.0, sampling_rate / 2)}
+        width = max(1.0, sampling_rate / nperseg)
+        bands.update({f"line{f:g}": (f - width, f + width) for f in line_frequencies})
+        indices = cache.band_indices(nperseg, sampling_rate, bands)
+        total = power[:, indices["total"]].sum(axis=1)
+        for band, line in indices.items():
+            if band == "total":
+                continue
+            line_noise = np.maximum(
+                line_noise,
+                np.divide(
+                    power[:, line].sum(axis=1),
+                    total,
+                    out=np.zeros(channels),
+                    where=total > 0,
+                ),
+            )
+
+    metrics = {
+        "flatline": flatline,
+        "clipping": clipping,
+        "line_noise": line_noise,
+        "kurtosis": kurtosis,
+    }
+    score = np.ones(channels)
+    for name, values in metrics.items():
+        onset, limit = limits[name]
+        score *= 1 - np.clip((np.abs(values) - onset) / (limit - onset), 0, 1)
+    return {"score": score, **metrics}
@@ -0,0 +1,181 @@
+import os
+import numpy as np
+from collections import OrderedDict
+from functools import lru_cache
+from math import gcd
+from scipy import signal
+from typing import Optional, Tuple
+
+
+@lru_cache(maxsize=32)
+def design_resampler(up: int, down: int) -> np.ndarray:
+    """The anti-aliasing FIR ``scipy.signal.resample_poly`` uses for up/down"""
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    return signal.firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0)) * up
+
+
+class StreamingResampler:
+    """
+    Polyphase resampling over consecutive blocks of one multichannel stream
+
+    Output sample ``k`` is the FIR taps applied to the upsampled input
+    centred on input position ``k * down / up``, exactly as in
+    ``resample_poly(x, up, down, axis=0, padtype="edge")`` over the whole
+    stream. An output is produced once all the input it depends on has
+    arrived, so each block returns the outputs it completed (the filter's
+    half-length, a few input samples, is held back). Each block is one
+    ``upfirdn`` call over all channels.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int, num_channels: int):
+        divisor = gcd(int(from_rate), int(to_rate))
+        self.from_rate = from_rate
+        self.to_rate = to_rate
+        self.up = int(to_rate) // divisor
+        self.down = int(from_rate) // divisor
+        self.num_channels = num_channels
+        self.history = np.zeros((0, num_channels))
+        self.history_start = 0
+        self.received = 0
+        self.emitted = 0
+        if self.passthrough:
+            return
+
+        self.taps = design_resampler(self.up, self.down)
+        self.half_len = (len(self.taps) - 1) // 2
+        # Input samples one output's taps can reach
+        self._span = -(-len(self.taps) // self.up) + 1
+
+    @property
+    def passthrough(self) -> bool:
+        return self.up == self.down
+
+    def process(self, block: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Resample an (n_samples, n_channels) block
+
+        Returns the completed output samples and their positions in input
+        samples since the start of the stream (fractional), for timestamps.
+        """
+        block = np.asarray(block, dtype=np.float64)
+        if self.passthrough:
+            positions = self.received + np.arange(len(block), dtype=np.float64)
+            self.received += len(block)
+            return block, positions
+        if len(block) == 0:
+            return np.zeros((0, self.num_channels)), np.zeros(0)
+
+        if self.received == 0:
+            # Before the stream the signal is held at its first value
+            self.history = np.repeat(block[:1], self._span, axis=0)
+            self.history_start = -self._span
+        inputs = np.concatenate([self.history, block])
+        self.received += len(block)
+
+        # Output k needs upsampled input up to k * down + half_len
+        first = self.emitted
+        last = (self.up * (self.received - 1) - self.half_len) // self.down
+        self.emitted = max(self.emitted, last + 1)
+        outputs = np.arange(first, last + 1)
+        if len(outputs) == 0:
+            return np.zeros((0, self.num_channels)), np.zeros(0)
+
+        # upfirdn computes every down-th upsampled position from the start of
+        # the inputs; leading zero taps shift that grid onto output ``first``
+        centre = first * self.down + self.half_len - self.history_start * self.up
+        shift = -centre % self.down
+        taps = np.concatenate([np.zeros(shift), self.taps])
+        offset = (centre + shift) // self.down
+        resampled = signal.upfirdn(taps, inputs, self.up, self.down, axis=0)[
+            offset : offset + len(outputs)
+        ]
+
+        # Keep what the next outputs can reach back to
+        keep_from = -(
+            -(self.emitted * self.down + self.half_len - len(self.taps) + 1) // self.up
+        )
+        keep_from = max(self.history_start, min(keep_from, self.received))
+        self.history = inputs[keep_from - self.history_start :]
+        self.history_start = keep_from
+
+        return resampled, outputs * self.down / self.up
+
+    def flush(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The outputs still held back, as if the stream ended here
+
+        Past its end the signal is held at its last value, as with
+        ``padtype="edge"``, so a stream processed then flushed matches
+        ``resample_poly`` over all of it. Nothing can be processed after.
+        """
+        if self.passthrough or self.received == 0:
+            return np.zeros((0, self.num_channels)), np.zeros(0)
+
+        total = -(-self.received * self.up // self.down)
+        remaining = total - self.emitted
+        values, positions = self.process(
+            np.repeat(self.history[-1:], self._span, axis=0)
+        )
+        return values[:remaining], positions[:remaining]
+
+
+class ResamplerBank:
+    """
+    Streaming resampler state per session towards one analysis rate
+
+    Sessions whose devices already sample at the analysis rate pass through
+    unchanged. Least recently used sessions beyond ``max_sessions`` are
+    dropped first.
+    """
+
+    def __init__(self, target_rate: int, max_sessions: int = 4096):
+        self.target_rate = target_rate
+        self.max_sessions = max_sessions
+        self.resamplers: "OrderedDict[str, StreamingResampler]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.resamplers)
+
+    def get(
+        self, session_id: str, sampling_rate: int, num_channels: int
+    ) -> StreamingResampler:
+        """The session's resampler, new when the stream layout changes"""
+        resampler = self.resamplers.get(session_id)
+        if resampler is not None and (
+            resampler.from_rate,
+            resampler.num_channels,
+        ) == (sampling_rate, num_channels):
+            self.resamplers.move_to_end(session_id)
+            return resampler
+
+        resampler = self.create(sampling_rate, num_channels)
+        self.resamplers[session_id] = resampler
+        self.resamplers.move_to_end(session_id)
+        while len(self.resamplers) > self.max_sessions:
+            self.resamplers.popitem(last=False)
+        return resampler
+
+    def create(self, sampling_rate: int, num_channels: int) -> StreamingResampler:
+        """A resampler with fresh state, not tied to any session"""
+        return StreamingResampler(sampling_rate, self.target_rate, num_channels)
+
+    def discard(self, session_id: str):
+        self.resamplers.pop(session_id, None)
+
+
+def create_resampler_bank() -> Optional[ResamplerBank]:
+    """
+    Resampling to SAVY_ANALYSIS_RATE (Hz) at ingest, or None when unset
+
+    With it set, every session is buffered, filtered and analysed at that
+    one rate whatever its device samples at. SAVY_RESAMPLER_SESSIONS caps
+    the sessions whose resampler state is kept (default 4096).
+    """
+    rate = os.getenv("SAVY_ANALYSIS_RATE", "")
+    if not rate or rate == "0":
+        return None
+    return ResamplerBank(
+        int(rate),
+        max_sessions=int(os.getenv("SAVY_RESAMPLER_SESSIONS", "4096")),
+    )
@@ -1,21 +1,66 @@
+import os
 import struct
+import random
 import numpy as np
+from scipy import fft as sp_fft
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from concurrent.futures import Future, ThreadPoolExecutor
 import asyncio
 import json
+import time
 import hashlib
 import logging
 
+from services.metrics_service import registry, stage_timer, record_error
+from services.eeg_filter import StreamingFilter
+from services.eeg_resample import StreamingResampler
+from services.eeg_spectral import (
+    band_coherence,
+    cross_spectral_density,
+    magnitude_squared_coherence,
+    scratch_pool,
+    spectral_cache,
+    welch,
+)
+from services.eeg_spectrogram import StreamingSpectrogram
+from services.eeg_coherence import StreamingCoherence
+from services.eeg_quality import QUALITY_LIMITS, signal_quality
+
 logger = logging.getLogger(__name__)
 
+CHECKSUM_RESULTS = registry.counter(
+    "eeg_checksum_results_total",
+    "Frame footer verifications by outcome",
+    ["result"],
+)
+
+# Frames at least this large are hashed on a worker thread while the data
+# section is decoded; below it the thread hand-off costs more than the hash
+CHECKSUM_OVERLAP_BYTES = 32 << 10
+_checksum_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _checksum_executor() -> ThreadPoolExecutor:
+    global _checksum_pool
+    if _checksum_pool is None:
+        _checksum_pool = ThreadPoolExecutor(
+            max_workers=min(4, os.cpu_count() or 1),
+            thread_name_prefix="eeg-checksum",
+        )
+    return _checksum_pool
+
+
+MAX_CHANNELS = 64
 
-class EEGChannel(Enum):
-    FP1 = 0
-    FP2 = 1
-    C3 = 2
-    C4 = 3
+# Channel index in the frame -> name. The first four are the reference
+# headset's electrodes; wider devices' further channels are numbered from 1
+EEGChannel = Enum(
+    "EEGChannel",
+    [("FP1", 0), ("FP2", 1), ("C3", 2), ("C4", 3)]
+    + [(f"CH{index + 1}", index) for index in range(4, MAX_CHANNELS)],
+)
 
 
 class EEGDataType(Enum):
@@ -24,6 +69,28 @@ class EEGDataType(Enum):
     SPECTRAL = 2
 
 
+class DownsampleMethod(str, Enum):
+    LTTB = "lttb"
+    MINMAX = "minmax"
+
+
+class ChecksumPolicy(str, Enum):
+    """How the SHA-1 frame footer is enforced"""
+
+    # Verify every frame; count and log failures but keep the frame
+    WARN = "warn"
+    # Verify every frame before returning; reject frames that fail
+    STRICT = "strict"
+    # Return at once; frames that fail are marked invalid when drained
+    ASYNC_FLAG = "async"
+    # Verify a random 1 in ``checksum_sample_every`` frames, strictly
+    SAMPLED = "sampled"
+
+
+class ChecksumError(ValueError):
+    """A frame whose footer failed verification and was rejected"""
+
+
 @dataclass
 class EEGSample:
     timestamp: float
@@ -41,6 +108,15 @@ class EEGEvent:
     metadata: Dict[str, Any] = None
 
 
+@dataclass
+class WaveletResult:
+    """One channel's CWT, as crypto-core's WaveletResult"""
+
+    magnitudes: np.ndarray  # (frequencies, times) float32
+    frequencies: np.ndarray
+    times: np.ndarray
+
+
 @dataclass
 class EEGSessionMetadata:
     sampling_rate: int = 256
@@ -57,18 +133,23 @@ class EEGDataParser:
     Handles conversion from raw hex data to structured EEG samples
     """
 
-    def __init__(self, sampling_rate: int = 256, num_channels: int = 4):
+    def __init__(
+        self,
+        sampling_rate: int = 256,
+        num_channels: int = 4,
+        checksum_policy: ChecksumPolicy = ChecksumPolicy.WARN,
+        checksum_sample_every: int = 16,
+    ):
         self.sampling_rate = sampling_rate
         self.num_channels = num_channels
         self.byte_order = "<"  # Little endian
         self.value_format = "f"  # Float32
+        self.checksum_policy = ChecksumPolicy(checksum_policy)
+        self.checksum_sample_every = checksum_sample_every
+        # Deferred verifications (async policy) and the samples they cover
+        self.pending_checksums: List[Tuple[Future, List[EEGSample]]] = []
 
-        self.channel_map = {
-            0: EEGChannel.FP1,
-            1: EEGChannel.FP2,
-            2: EEGChannel.C3,
-            3: EEGChannel.C4,
-        }
+        self.channel_map = {channel.value: channel for channel in EEGChannel}
 
     def hex_to_samples(self, hex_data: str) -> Tuple[List[EEGSample], List[EEGEvent]]:
         """
@@ -81,49 +162,151 @@ class EEGDataParser:
         Events: variable length JSON encoded events
         Footer: 16 bytes - checksum
         """
+        try:
+            # Convert hex string to bytes
+            with stage_timer("hex_decode"):
+                raw_bytes = bytes.fromhex(hex_data)
+        except Exception as e:
+            record_error("parse")
+            logger.error(f"Parsing failed: {e}")
+            return [], []
+
+        return self.frame_to_samples(raw_bytes)
+
+    def frame_to_samples(
+        self, raw_bytes: bytes
+    ) -> Tuple[List[EEGSample], List[EEGEvent]]:
+        """
+        Parse one binary frame (the decoded hex format) to samples and events
+
+        The footer is verified per :attr:`checksum_policy`. Large frames are
+        hashed on a worker thread (hashlib releases the GIL) while the data
+        section is decoded, so verification overlaps decoding. Raises
+        :class:`ChecksumError` for a rejected frame.
+        """
         samples = []
         events = []
 
         try:
-            # Convert hex string to bytes
-            raw_bytes = bytes.fromhex(hex_data)
-
             # Validate header
             if len(raw_bytes) < 48:
                 raise ValueError("Data too short")
 
-            # Parse header
-            header = raw_bytes[:32]
-            metadata = self._parse_header(header)
-
-            # Parse data section
-            data_start = 32
-            data_length = metadata["total_samples"] * metadata["channels"] * 4
-            data_bytes = raw_bytes[data_start : data_start + data_length]
-
-            samples = self._parse_data(data_bytes, metadata)
+            with stage_timer("parse"):
+                # Parse header
+                header = raw_bytes[:32]
+                metadata = self._parse_header(header)
+                self._check_layout(metadata)
+
+                data_start = 32
+                data_length = metadata["total_samples"] * metadata["channels"] * 4
+                event_start = data_start + data_length
+                events_length = int.from_bytes(
+                    raw_bytes[event_start : event_start + 4], "little"
+                )
+                footer_start = event_start + 4 + events_length
 
-            # Parse events
-            event_start = data_start + data_length
-            events_length = int.from_bytes(
-                raw_bytes[event_start : event_start + 4], "little"
-            )
-            event_data = raw_bytes[event_start + 4 : event_start + 4 + events_length]
+            # Start verification first so it runs alongside the decode
+            checksum = self._start_checksum(raw_bytes, footer_start)
 
-            events = self._parse_events(event_data)
+            with stage_timer("parse"):
+                # Parse data section
+                data_bytes = raw_bytes[data_start:event_start]
+                samples = self._parse_data(data_bytes, metadata)
 
-            # Validate checksum
-            footer_start = event_start + 4 + events_length
-            checksum = raw_bytes[footer_start : footer_start + 16]
+                # Parse events
+                event_data = raw_bytes[
+                    event_start + 4 : event_start + 4 + events_length
+                ]
+                events = self._parse_events(event_data)
 
-            if not self._validate_checksum(raw_bytes[:footer_start], checksum):
-                logger.warning("Checksum validation failed")
+            if not self._finish_checksum(checksum, samples):
+                raise ChecksumError("Checksum validation failed; frame rejected")
 
+        except ChecksumError:
+            raise
         except Exception as e:
+            record_error("parse")
             logger.error(f"Parsing failed: {e}")
 
         return samples, events
 
+    def _start_checksum(self, raw_bytes: bytes, footer_start: int):
+        """Verification result: a bool, a Future of one, or None if skipped"""
+        if (
+            self.checksum_policy == ChecksumPolicy.SAMPLED
+            and random.random() * self.checksum_sample_every >= 1.0
+        ):
+            CHECKSUM_RESULTS.inc(1.0, "skipped")
+            return None
+
+        body = memoryview(raw_bytes)[:footer_start]
+        footer = bytes(raw_bytes[footer_start : footer_start + 16])
+        if (
+            footer_start < CHECKSUM_OVERLAP_BYTES
+            and self.checksum_policy != ChecksumPolicy.ASYNC_FLAG
+        ):
+            with stage_timer("checksum"):
+                return self._validate_checksum(body, footer)
+        return _checksum_executor().submit(self._validate_checksum, body, footer)
+
+    def _finish_checksum(self, checksum, samples: List[EEGSample]) -> bool:
+        """Apply the policy to a verification result; False rejects the frame"""
+        if checksum is None:
+            return True
+
+        if isinstance(checksum, Future):
+            if self.checksum_policy == ChecksumPolicy.ASYNC_FLAG:
+                self.pending_checksums.append((checksum, samples))
+                return True
+            with stage_timer("checksum"):
+                checksum = checksum.result()
+
+        if checksum:
+            CHECKSUM_RESULTS.inc(1.0, "ok")
+            return True
+
+        if self.checksum_policy == ChecksumPolicy.WARN:
+            CHECKSUM_RESULTS.inc(1.0, "mismatch")
+            logger.warning("Checksum validation failed; frame kept")
+            return True
+
+        CHECKSUM_RESULTS.inc(1.0, "rejected")
+        record_error("checksum")
+        logger.warning("Checksum validation failed; frame rejected")
+        return False
+
+    def drain_checksums(self) -> int:
+        """
+        Wait for deferred verifications (async policy), e.g. after a batch
+
+        Returns how many frames failed since the last drain, after marking
+        their samples invalid. Samples are only changed here, on the
+        caller's thread, never from the hashing threads.
+        """
+        pending, self.pending_checksums = self.pending_checksums, []
+        with stage_timer("checksum"):
+            results = [(future.result(), samples) for future, samples in pending]
+
+        failures = 0
+        for ok, samples in results:
+            if ok:
+                CHECKSUM_RESULTS.inc(1.0, "ok")
+                continue
+            for sample in samples:
+                sample.is_valid = False
+            failures += 1
+            CHECKSUM_RESULTS.inc(1.0, "flagged")
+            record_error("checksum")
+            logger.warning("Checksum validation failed; frame samples marked invalid")
+        return failures
+
+    def frame_header(self, raw_bytes: bytes) -> Dict[str, Any]:
+        """Header fields of a binary frame (channels, samples, session_id, ...)"""
+        if len(raw_bytes) < 32:
+            raise ValueError("Data too short")
+        return self._parse_header(raw_bytes[:32])
+
     def _parse_header(self, header: bytes) -> Dict[str, Any]:
         """Parse metadata header"""
         magic = header[:4].decode("ascii", errors="ignore")
@@ -138,32 +321,35 @@ class EEGDataParser:
             "session_id": header[21:32].decode("ascii", errors="ignore").strip(),
         }
 
+    @staticmethod
+    def _check_layout(metadata: Dict[str, Any]):
+        if not 1 <= metadata["channels"] <= MAX_CHANNELS:
+            raise ValueError(f"Unsupported channel count: {metadata['channels']}")
+        if metadata["sampling_rate"] <= 0:
+            raise ValueError("Frame has no sampling rate")
+
     def _parse_data(
         self, data_bytes: bytes, metadata: Dict[str, Any]
     ) -> List[EEGSample]:
         """Parse EEG data samples"""
-        samples = []
-        sample_size = 4  # float32
-
-        for i in range(metadata["total_samples"]):
-            for channel_idx in range(metadata["channels"]):
-                offset = (
-                    i * metadata["channels"] * sample_size + channel_idx * sample_size
-                )
-                value = struct.unpack_from(
-                    f"{self.byte_order}{self.value_format}", data_bytes, offset
-                )[0]
-
-                samples.append(
-                    EEGSample(
-                        timestamp=metadata["start_timestamp"]
-                        + (i / metadata["sampling_rate"]),
-                        channel=self.channel_map.get(channel_idx, EEGChannel.FP1),
-                        value=value,
-                    )
-                )
+        n_samples = metadata["total_samples"]
+        n_channels = metadata["channels"]
+
+        # Decoded as one block; the values are the same float32s widened
+        values = np.frombuffer(
+            data_bytes, f"{self.byte_order}{self.value_format}", n_samples * n_channels
+        ).reshape(n_samples, n_channels)
+        timestamps = (
+            metadata["start_timestamp"]
+            + np.arange(n_samples) / metadata["sampling_rate"]
+        )
+        channels = [self.channel_map[channel_idx] for channel_idx in range(n_channels)]
 
-        return samples
+        return [
+            EEGSample(timestamp=timestamp, channel=channel, value=value)
+            for timestamp, row in zip(timestamps.tolist(), values.tolist())
+            for channel, value in zip(channels, row)
+        ]
 
     def _parse_events(self, event_bytes: bytes) -> List[EEGEvent]:
         """Parse event markers from JSON data"""
@@ -191,8 +377,8 @@ class EEGDataParser:
         return events
 
     def _validate_checksum(self, data_bytes: bytes, checksum_bytes: bytes) -> bool:
-        """Validate data integrity with SHA-1 checksum"""
-        expected_checksum = hashlib.sha1(data_bytes).digest()
+        """Validate data integrity with SHA-1 checksum truncated to the footer"""
+        expected_checksum = hashlib.sha1(data_bytes).digest()[:16]
         return checksum_bytes == expected_checksum
 
 
@@ -224,19 +410,147 @@ class EEGDataProcessor:
             "delta": [0.5, 4],
         }
 
+        # Signal quality: channels scoring below the threshold are left out
+        # of spike and stress detection
+        self.quality_limits = dict(QUALITY_LIMITS)
+        self.quality_threshold = 0.5
+
+        # Coherence / connectivity bands
+        self.coherence_bands = {
+            "delta": [0.5, 4],
+            "theta": [4, 8],
+            "alpha": [8, 13],
+            "beta": [13, 30],
+            "gamma": [30, 45],
+        }
+
+    @property
+    def channels(self) -> List[EEGChannel]:
+        """Channels of the stream layout, in frame order"""
+        return [EEGChannel(index) for index in range(self.num_channels)]
+
     def preprocess_samples(self, samples: List[EEGSample]) -> List[EEGSample]:
         """Preprocess raw EEG data"""
         processed = []
 
-        for sample in samples:
-            # Basic validation
-            if abs(sample.value) > 10000:
-                sample.is_valid = False
+        with stage_timer("preprocess"):
+            for sample in samples:
+                # Basic validation
+                if abs(sample.value) > 10000:
+                    sample.is_valid = False
 
-            processed.append(sample)
+                processed.append(sample)
 
         return processed
 
+    def filter_samples(
+        self, samples: List[EEGSample], stream_filter: StreamingFilter
+    ) -> List[EEGSample]:
+        """
+        Band-pass and notch filtered copies of samples
+
+        ``stream_filter`` carries each channel's state from the previous block
+        of the same stream. Invalid samples are filtered as the last valid
+        value of their channel so one bad reading does not ring through the
+        filter; they stay marked invalid.
+        """
+        if not samples:
+            return []
+
+        with stage_timer("filter"):
+            grouped: Dict[EEGChannel, List[EEGSample]] = {}
+            for sample in samples:
+                grouped.setdefault(sample.channel, []).append(sample)
+
+            inputs = {
+                channel: _hold_invalid(channel_samples)
+                for channel, channel_samples in grouped.items()
+            }
+            lengths = {len(values) for values in inputs.values()}
+            if len(inputs) == stream_filter.num_channels and len(lengths) == 1:
+                order = sorted(inputs, key=lambda c: c.value)
+                block = stream_filter.process(
+                    np.column_stack([inputs[channel] for channel in order])
+                )
+                outputs = {channel: block[:, i] for i, channel in enumerate(order)}
+            else:
+                outputs = {
+                    channel: stream_filter.process_channel(channel.value, values)
+                    for channel, values in inputs.items()
+                }
+
+            positions = dict.fromkeys(grouped, 0)
+            filtered = []
+            for sample in samples:
+                index = positions[sample.channel]
+                positions[sample.channel] = index + 1
+                filtered.append(
+                    EEGSample(
+                        timestamp=sample.timestamp,
+                        channel=sample.channel,
+                        value=float(outputs[sample.channel][index]),
+                        is_valid=sample.is_valid,
+                    )
+                )
+
+        return filtered
+
+    def resample_samples(
+        self,
+        samples: List[EEGSample],
+        resampler: StreamingResampler,
+        final: bool = False,
+    ) -> List[EEGSample]:
+        """
+        One block of samples at the resampler's rate
+
+        Every channel of the stream must have the same number of samples in
+        the block, as in a frame. Invalid samples are held at the last valid
+        value; an output is invalid when the block's input nearest to it was.
+        Output timestamps continue from the block's first timestamp. With
+        ``final`` the resampler is flushed after the block, so the outputs
+        it would hold back for the next block are included.
+        """
+        if not samples or resampler.passthrough:
+            return samples
+
+        with stage_timer("resample"):
+            grouped: Dict[EEGChannel, List[EEGSample]] = {}
+            for sample in samples:
+                grouped.setdefault(sample.channel, []).append(sample)
+            order = sorted(grouped, key=lambda c: c.value)
+            if len(order) != resampler.num_channels or (
+                len({len(grouped[channel]) for channel in order}) != 1
+            ):
+                raise ValueError("Resampling needs whole frames of every channel")
+
+            block = np.column_stack([_hold_invalid(grouped[c]) for c in order])
+            valid = np.column_stack(
+                [[s.is_valid for s in grouped[channel]] for channel in order]
+            )
+            received = resampler.received
+            values, positions = resampler.process(block)
+            if final:
+                tail, tail_positions = resampler.flush()
+                values = np.concatenate([values, tail])
+                positions = np.concatenate([positions, tail_positions])
+
+            positions -= received
+            timestamps = grouped[order[0]][0].timestamp + positions / (
+                resampler.from_rate
+            )
+            nearest = np.clip(np.rint(positions).astype(int), 0, len(block) - 1)
+
+            return [
+                EEGSample(
+                    timestamp=timestamp, channel=channel, value=value, is_valid=ok
+                )
+                for timestamp, row, valid_row in zip(
+                    timestamps.tolist(), values.tolist(), valid[nearest].tolist()
+                )
+                for channel, value, ok in zip(order, row, valid_row)
+            ]
+
     def detect_spikes(
         self, samples: List[EEGSample], channel: EEGChannel
     ) -> List[EEGEvent]:
@@ -289,18 +603,30 @@ class EEGDataProcessor:
 
     def detect_stress_level(self, samples: List[EEGSample]) -> str:
         """Detect stress level from spectral features"""
-        # Calculate PSD using FFT
-        data = np.array([s.value for s in samples])
-        fft_data = np.fft.fft(data)
-        freqs = np.fft.fftfreq(len(data), 1 / self.sampling_rate)
+        # Calculate PSD using FFT, per channel at the stream's sampling rate
+        columns = [
+            values
+            for _, values in self._group_channels(samples).values()
+            if len(values)
+        ]
+        if not columns:
+            return "low"
+        length = min(len(values) for values in columns)
+        data = scratch_pool.get((len(columns), length))
+        for row, values in zip(data, columns):
+            row[:] = values[:length]
+        fft_data = np.fft.rfft(data, axis=1)
+        power = fft_data.real**2 + fft_data.imag**2
 
         # Calculate band powers
         band_powers = {}
         total_power = 0
 
-        for band, (low, high) in self.stress_bands.items():
-            band_indices = np.where((freqs >= low) & (freqs <= high))[0]
-            band_power = np.sum(np.abs(fft_data[band_indices]) ** 2)
+        bands = spectral_cache.band_indices(
+            length, self.sampling_rate, self.stress_bands
+        )
+        for band, band_indices in bands.items():
+            band_power = float(np.sum(power[:, band_indices]))
             band_powers[band] = band_power
             total_power += band_power
 
@@ -334,12 +660,8 @@ class EEGDataProcessor:
             return {"frequencies": [], "power": []}
 
         # Calculate PSD using Welch's method
-        from scipy.signal import welch
-
         try:
-            freqs, power = welch(
-                channel_samples, self.sampling_rate, nperseg=window_size
-            )
+            freqs, power = welch(channel_samples, self.sampling_rate, window_size)
 
             return {"frequencies": freqs.tolist(), "power": power.tolist()}
 
@@ -347,31 +669,277 @@ class EEGDataProcessor:
             logger.error(f"PSD calculation failed: {e}")
             return {"frequencies": [], "power": []}
 
-    def prepare_stream_data(
-        self, samples: List[EEGSample], events: List[EEGEvent]
+    def wavelet_transform(
+        self,
+        samples: List[EEGSample],
+        min_freq: float = 1.0,
+        max_freq: float = 40.0,
+        num_freqs: int = 32,
+        max_times: Optional[int] = None,
+    ) -> Dict[str, WaveletResult]:
+        """
+        Morlet CWT magnitudes per channel on log-spaced frequencies
+
+        Invalid samples are held at the last valid value. Channels are cut
+        to the shortest one; ``max_times`` keeps every k-th time column.
+        """
+        grouped: Dict[EEGChannel, List[EEGSample]] = {}
+        for sample in samples:
+            grouped.setdefault(sample.channel, []).append(sample)
+        if not grouped:
+            return {}
+
+        with stage_timer("cwt"):
+            order = sorted(grouped, key=lambda c: c.value)
+            length = min(len(grouped[channel]) for channel in order)
+            data = scratch_pool.get((len(order), length))
+            for row, channel in zip(data, order):
+                row[:] = _hold_invalid(grouped[channel][:length])
+
+            frequencies = np.geomspace(
+                min_freq, min(max_freq, self.sampling_rate / 2), num_freqs
+            )
+            magnitudes = morlet_cwt(data, self.sampling_rate, frequencies)
+
+            times = np.array([s.timestamp for s in grouped[order[0]][:length]])
+            step = -(-length // max_times) if max_times else 1
+            if step > 1:
+                magnitudes = np.ascontiguousarray(magnitudes[:, :, ::step])
+                times = np.ascontiguousarray(times[::step])
+
+        return {
+            channel.name.lower(): WaveletResult(magnitudes[i], frequencies, times)
+            for i, channel in enumerate(order)
+        }
+
+    def update_spectrogram(
+        self, samples: List[EEGSample], spectrogram: StreamingSpectrogram
+    ) -> int:
+        """Extend a session's rolling spectrogram; returns the columns added"""
+        if not samples:
+            return 0
+
+        with stage_timer("spectrogram"):
+            _, block, timestamps = self._channel_block(
+                samples, spectrogram.num_channels
+            )
+            return spectrogram.process(block, timestamps)
+
+    def get_coherence(
+        self, samples: List[EEGSample], window_size: int = 256
     ) -> Dict[str, Any]:
-        """Prepare data for frontend streaming"""
-        # Group samples by channel
-        channel_data = {"fp1": [], "fp2": [], "c3": [], "c4": []}
+        """
+        Magnitude-squared coherence of every channel pair, per band
+
+        One Welch cross-spectral density matrix for all pairs; each band's
+        ``[i][j]`` is the coherence of ``channels[i]`` and ``channels[j]``
+        averaged over the band.
+        """
+        if not samples:
+            return {"channels": [], "bands": {}}
+
+        with stage_timer("coherence"):
+            order, block, _ = self._channel_block(samples)
+            if len(block) < window_size:
+                return {"channels": [], "bands": {}}
+            _, csd = cross_spectral_density(block.T, self.sampling_rate, window_size)
+            bands = band_coherence(
+                magnitude_squared_coherence(csd),
+                window_size,
+                self.sampling_rate,
+                self.coherence_bands,
+            )
+
+        return {"channels": [c.name.lower() for c in order], "bands": bands}
+
+    def update_coherence(
+        self, samples: List[EEGSample], coherence: StreamingCoherence
+    ) -> int:
+        """Extend a session's running coherence; returns the segments added"""
+        if not samples:
+            return 0
+
+        with stage_timer("coherence"):
+            _, block, timestamps = self._channel_block(samples, coherence.num_channels)
+            return coherence.process(block, timestamps)
+
+    def _channel_block(
+        self, samples: List[EEGSample], num_channels: Optional[int] = None
+    ) -> Tuple[List[EEGChannel], np.ndarray, np.ndarray]:
+        """
+        Channels, an (n_samples, n_channels) block and its timestamps
+
+        Channels are aligned on their latest samples, as buffer windows are
+        trimmed from the front; invalid samples are held at the last valid
+        value.
+        """
+        grouped: Dict[EEGChannel, List[EEGSample]] = {}
+        for sample in samples:
+            grouped.setdefault(sample.channel, []).append(sample)
+
+        order = sorted(grouped, key=lambda c: c.value)
+        if num_channels is not None and len(order) != num_channels:
+            raise ValueError("Every channel of the stream is needed")
+        length = min(len(grouped[channel]) for channel in order)
+        block = np.column_stack(
+            [_hold_invalid(grouped[channel][-length:]) for channel in order]
+        )
+        timestamps = np.array([s.timestamp for s in grouped[order[0]][-length:]])
+        return order, block, timestamps
+
+    def _group_channels(
+        self, samples: List[EEGSample]
+    ) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Split valid samples into per-channel timestamp and value arrays"""
+        grouped = {channel.name.lower(): ([], []) for channel in self.channels}
 
         for sample in samples:
             if not sample.is_valid:
                 continue
 
-            channel_key = sample.channel.name.lower()
-            channel_data[channel_key].append(
-                {"timestamp": sample.timestamp, "value": sample.value}
+            timestamps, values = grouped.setdefault(
+                sample.channel.name.lower(), ([], [])
+            )
+            timestamps.append(sample.timestamp)
+            values.append(sample.value)
+
+        return {
+            key: (np.asarray(timestamps, dtype=np.float64), np.asarray(values))
+            for key, (timestamps, values) in grouped.items()
+        }
+
+    @staticmethod
+    def _decimate(
+        timestamps: np.ndarray,
+        values: np.ndarray,
+        max_points: Optional[int],
+        method: DownsampleMethod,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if not max_points or len(values) <= max_points:
+            return timestamps, values
+
+        if method == DownsampleMethod.MINMAX:
+            indices = minmax_downsample(values, max_points)
+        else:
+            indices = lttb_downsample(timestamps, values, max_points)
+        return timestamps[indices], values[indices]
+
+    def stream_channels(
+        self,
+        samples: List[EEGSample],
+        max_points: Optional[int] = None,
+        method: DownsampleMethod = DownsampleMethod.LTTB,
+    ) -> Dict[str, List[Dict[str, float]]]:
+        """Group valid samples by channel, optionally decimated to max_points"""
+        channel_data = {}
+        for key, (timestamps, values) in self._group_channels(samples).items():
+            timestamps, values = self._decimate(timestamps, values, max_points, method)
+            channel_data[key] = [
+                {"timestamp": t, "value": v}
+                for t, v in zip(timestamps.tolist(), values.tolist())
+            ]
+
+        return channel_data
+
+    def columnar_channels(
+        self,
+        samples: List[EEGSample],
+        max_points: Optional[int] = None,
+        method: DownsampleMethod = DownsampleMethod.LTTB,
+    ) -> Dict[str, Any]:
+        """
+        Group valid samples into per-channel float32 columns
+
+        Timestamps are implied by ``start_timestamp + index / sampling_rate``.
+        A channel carries an explicit ``indices`` column only when its samples
+        are not contiguous (invalid samples dropped, gaps, or decimation).
+        """
+        start = min((s.timestamp for s in samples), default=0.0)
+        channels = {}
+
+        for key, (timestamps, values) in self._group_channels(samples).items():
+            timestamps, values = self._decimate(timestamps, values, max_points, method)
+            indices = np.rint((timestamps - start) * self.sampling_rate).astype(
+                np.uint32
+            )
+            contiguous = len(indices) == 0 or (
+                indices[0] == 0
+                and indices[-1] == len(indices) - 1
+                and np.all(np.diff(indices) == 1)
             )
+            channels[key] = {
+                "values": values.astype(np.float32),
+                "indices": None if contiguous else indices,
+            }
+
+        return {
+            "start_timestamp": start,
+            "sampling_rate": self.sampling_rate,
+            "channels": channels,
+        }
+
+    def signal_quality(self, samples: List[EEGSample]) -> Dict[str, Dict[str, Any]]:
+        """
+        Per channel: quality score, its metrics and whether it is usable
+
+        See :func:`~services.eeg_quality.signal_quality`; a channel is usable
+        when its score reaches ``quality_threshold``.
+        """
+        if not samples:
+            return {}
+
+        with stage_timer("quality"):
+            order, block, _ = self._channel_block(samples)
+            metrics = signal_quality(block, self.sampling_rate, self.quality_limits)
+            rows = {name: values.tolist() for name, values in metrics.items()}
+
+        return {
+            channel.name.lower(): {
+                **{name: values[i] for name, values in rows.items()},
+                "usable": rows["score"][i] >= self.quality_threshold,
+            }
+            for i, channel in enumerate(order)
+        }
+
+    def summarize_stream(
+        self,
+        samples: List[EEGSample],
+        events: List[EEGEvent],
+        data_type: EEGDataType = EEGDataType.RAW,
+        quality: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Events, spikes, stress level, stats and signal quality shared by all
+        wire formats
+
+        ``quality`` is measured on ``samples`` unless given, e.g. from the raw
+        block before filtering. Spikes and stress skip unusable channels.
+        """
+        if quality is None:
+            quality = self.signal_quality(samples)
+        skipped = {
+            channel
+            for channel in self.channels
+            if not quality.get(channel.name.lower(), {}).get("usable", True)
+        }
+        analysed = samples
+        if skipped:
+            analysed = [s for s in samples if s.channel not in skipped]
 
         # Detect spikes and stress
         spikes = []
-        for channel in EEGChannel:
-            spikes.extend(self.detect_spikes(samples, channel))
+        with stage_timer("spikes"):
+            for channel in self.channels:
+                if channel not in skipped:
+                    spikes.extend(self.detect_spikes(analysed, channel))
+
+        with stage_timer("stress"):
+            stress_level = self.detect_stress_level(analysed)
 
-        stress_level = self.detect_stress_level(samples)
+        with stage_timer("stats"):
+            stats = self._calculate_stats(samples)
 
         return {
-            "channels": channel_data,
             "events": [
                 {
                     "timestamp": e.timestamp,
@@ -383,7 +951,39 @@ class EEGDataProcessor:
                 for e in events + spikes
             ],
             "stress_level": stress_level,
-            "stats": self._calculate_stats(samples),
+            "stats": stats,
+            "quality": quality,
+            "data_type": data_type.name.lower(),
+        }
+
+    def prepare_stream_data(
+        self,
+        samples: List[EEGSample],
+        events: List[EEGEvent],
+        max_points: Optional[int] = None,
+        method: DownsampleMethod = DownsampleMethod.LTTB,
+        data_type: EEGDataType = EEGDataType.RAW,
+        quality: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """Prepare data for frontend streaming"""
+        return {
+            "channels": self.stream_channels(samples, max_points, method),
+            **self.summarize_stream(samples, events, data_type, quality),
+        }
+
+    def prepare_columnar_data(
+        self,
+        samples: List[EEGSample],
+        events: List[EEGEvent],
+        max_points: Optional[int] = None,
+        method: DownsampleMethod = DownsampleMethod.LTTB,
+        data_type: EEGDataType = EEGDataType.RAW,
+        quality: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """Prepare data for the compact columnar wire formats"""
+        return {
+            **self.columnar_channels(samples, max_points, method),
+            **self.summarize_stream(samples, events, data_type, quality),
         }
 
     def _calculate_stats(self, samples: List[EEGSample]) -> Dict[str, Any]:
@@ -406,22 +1006,169 @@ class EEGDataProcessor:
         }
 
 
+def _hold_invalid(samples: List[EEGSample]) -> np.ndarray:
+    """Channel values with invalid samples replaced by the last valid value"""
+    values = np.fromiter((s.value for s in samples), np.float64, len(samples))
+    valid = np.fromiter((s.is_valid for s in samples), bool, len(samples))
+    if valid.all():
+        return values
+    if not valid.any():
+        return np.zeros_like(values)
+
+    last = np.maximum.accumulate(np.where(valid, np.arange(len(values)), -1))
+    last[last < 0] = np.flatnonzero(valid)[0]
+    return values[last]
+
+
+def morlet_kernels(
+    size: int, sampling_rate: float, frequencies: np.ndarray, omega0: float = 6.0
+) -> np.ndarray:
+    """
+    Analytic Morlet wavelets in the frequency domain, (frequencies, size)
+
+    Scaled to a peak gain of 2 on positive frequencies, so a sinusoid of
+    amplitude A has CWT magnitude A at its own frequency.
+    """
+    omega = 2 * np.pi * sp_fft.fftfreq(size, 1 / sampling_rate)
+    scales = omega0 / (2 * np.pi * np.asarray(frequencies))
+    kernels = 2 * np.exp(-0.5 * (scales[:, None] * omega - omega0) ** 2)
+    kernels[:, omega <= 0] = 0.0
+    kernels = kernels.astype(np.float32)
+    kernels.setflags(write=False)
+    return kernels
+
+
+def morlet_cwt(
+    data: np.ndarray,
+    sampling_rate: float,
+    frequencies: np.ndarray,
+    omega0: float = 6.0,
+) -> np.ndarray:
+    """
+    CWT magnitudes of (channels, n) data, (channels, frequencies, n) float32
+
+    One FFT per channel, one product with the cached kernels and one
+    batched inverse FFT over every channel and scale. The signal is
+    zero-padded to a fast FFT length, so the edges (the cone of influence,
+    about ``omega0 / (2 pi f)`` seconds at frequency f) are attenuated.
+    """
+    n = data.shape[-1]
+    size = sp_fft.next_fast_len(n)
+    key = (size, sampling_rate, tuple(np.asarray(frequencies).tolist()), omega0)
+    kernels = spectral_cache.get(
+        "morlet",
+        key,
+        lambda: morlet_kernels(size, sampling_rate, frequencies, omega0),
+    )
+
+    spectrum = sp_fft.fft(data.astype(np.float32), size, axis=-1)
+    product = spectrum[:, None, :] * kernels[None, :, :]
+    transform = sp_fft.ifft(product, axis=-1, overwrite_x=True, workers=-1)
+    return np.abs(transform[..., :n])
+
+
+def lttb_downsample(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets decimation
+
+    Returns the indices of the points to keep. The first and last points are
+    always kept; each bucket in between keeps the point forming the largest
+    triangle with the previously selected point and the next bucket's mean.
+    """
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    selected = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        area = np.abs(
+            (x[selected] - next_x) * (bucket_y - y[selected])
+            - (x[selected] - bucket_x) * (next_y - y[selected])
+        )
+        selected = start + int(np.argmax(area))
+        indices[i + 1] = selected
+
+    return indices
+
+
+def minmax_downsample(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Min/max decimation
+
+    Splits the signal into max_points // 2 buckets and keeps the minimum and
+    maximum of each, in time order, so peaks are never dropped.
+    """
+    n = len(y)
+    n_buckets = max_points // 2
+    if max_points >= n or n_buckets < 1:
+        return np.arange(n)
+
+    bucket_size = -(-n // n_buckets)
+    padded = np.full(n_buckets * bucket_size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(n_buckets, bucket_size)
+
+    # Buckets past the end of the signal are all-NaN after padding
+    filled = ~np.isnan(padded).all(axis=1)
+    padded = padded[filled]
+    offsets = np.flatnonzero(filled) * bucket_size
+
+    lows = offsets + np.nanargmin(padded, axis=1)
+    highs = offsets + np.nanargmax(padded, axis=1)
+
+    return np.unique(np.concatenate([lows, highs]))
+
+
 class EEGStreamBuffer:
     """
     Circular buffer for managing streaming EEG data
     """
 
+    # Approximate resident size of one EEGSample object plus its list slot
+    SAMPLE_BYTES = 160
+
     def __init__(self, max_samples: int = 10000):
         self.max_samples = max_samples
         self.samples = []
         self.events = []
         self.lock = asyncio.Lock()
+        self.last_activity = time.time()
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.samples) * self.SAMPLE_BYTES
+
+    def restore(self, samples: List[EEGSample], events: List[EEGEvent]):
+        """Load a previously saved window into an empty buffer"""
+        self.samples = list(samples[-self.max_samples :])
+        self.events = list(events)
 
     async def add_data(self, samples: List[EEGSample], events: List[EEGEvent]):
         """Add new data to buffer"""
+        if not samples and not events:
+            return
+
+        self.last_activity = time.time()
         async with self.lock:
             self.samples.extend(samples)
             self.events.extend(events)
+            if not self.samples:
+                return
 
             # Trim to max samples
             if len(self.samples) > self.max_samples:
@@ -435,6 +1182,7 @@ class EEGStreamBuffer:
         self, duration: float = 10.0
     ) -> Tuple[List[EEGSample], List[EEGEvent]]:
         """Get data from last N seconds"""
+        self.last_activity = time.time()
         async with self.lock:
             if not self.samples:
                 return [], []
@@ -458,14 +1206,44 @@ class EEGStreamBuffer:
             self.events = []
 
 
-def create_eeg_processor() -> EEGDataProcessor:
-    """Factory function for EEG processor"""
-    return EEGDataProcessor()
+def stream_layout(samples: List[EEGSample], default_rate: int = 256) -> Tuple[int, int]:
+    """
+    Sampling rate and channel count of a window of samples, e.g. a buffer
+
+    The rate is the median timestamp step of the first channel, rounded to
+    1 Hz; channels are counted up to the highest index present.
+    """
+    if not samples:
+        return default_rate, 4
+
+    first = samples[0].channel
+    num_channels = max(sample.channel.value for sample in samples) + 1
+    timestamps = np.array([s.timestamp for s in samples if s.channel is first])
+    steps = np.diff(timestamps)
+    steps = steps[steps > 0]
+    if len(steps) == 0:
+        return default_rate, num_channels
+    return max(1, int(round(1.0 / float(np.median(steps))))), num_channels
+
+
+def create_eeg_processor(
+    sampling_rate: int = 256, num_channels: int = 4
+) -> EEGDataProcessor:
+    """Factory function for EEG processor, for one stream layout"""
+    return EEGDataProcessor(sampling_rate, num_channels)
 
 
 def create_eeg_parser() -> EEGDataParser:
-    """Factory function for EEG parser"""
-    return EEGDataParser()
+    """
+    Factory function for EEG parser
+
+    SAVY_CHECKSUM_POLICY picks warn (default), strict, async or sampled
+    footer verification; SAVY_CHECKSUM_SAMPLE_EVERY sets the sampling ratio.
+    """
+    return EEGDataParser(
+        checksum_policy=ChecksumPolicy(os.getenv("SAVY_CHECKSUM_POLICY", "warn")),
+        checksum_sample_every=int(os.getenv("SAVY_CHECKSUM_SAMPLE_EVERY", "16")),
+    )
 
 
 async def process_hex_stream(
@@ -476,6 +1254,7 @@ async def process_hex_stream(
     processor = create_eeg_processor()
 
     samples, events = parser.hex_to_samples(hex_data)
+    parser.drain_checksums()
     processed_samples = processor.preprocess_samples(samples)
 
     if buffer:
@@ -0,0 +1,266 @@
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from scipy import signal
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from services.metrics_service import registry
+
+SPECTRAL_CACHE_REQUESTS = registry.counter(
+    "eeg_spectral_cache_requests_total",
+    "Spectral setup lookups (windows, bins, band masks) by result",
+    ["kind", "result"],
+)
+
+
+class SpectralCache:
+    """
+    Process-wide LRU of size-keyed spectral setup
+
+    Windows, FFT frequency bins, band index masks and Welch scale factors
+    depend only on block size and sampling rate, so they are built once per
+    (kind, size, rate) and shared by every processor; the returned arrays
+    are read-only. Work buffers live apart in :class:`ScratchPool`.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, kind: str, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Cached value for (kind, key), built on a miss"""
+        with self._lock:
+            value = self.entries.get((kind, key))
+            if value is not None:
+                self.entries.move_to_end((kind, key))
+                self.hits += 1
+                SPECTRAL_CACHE_REQUESTS.inc(1.0, kind, "hit")
+                return value
+
+        value = build()
+        with self._lock:
+            self.entries[(kind, key)] = value
+            self.entries.move_to_end((kind, key))
+            self.misses += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        SPECTRAL_CACHE_REQUESTS.inc(1.0, kind, "miss")
+        return value
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def window(self, name: str, size: int) -> np.ndarray:
+        """``scipy.signal.get_window(name, size)``"""
+        return self.get(
+            "window", (name, size), lambda: _frozen(signal.get_window(name, size))
+        )
+
+    def rfft_frequencies(self, size: int, sampling_rate: float) -> np.ndarray:
+        return self.get(
+            "frequencies",
+            (size, sampling_rate),
+            lambda: _frozen(np.fft.rfftfreq(size, 1 / sampling_rate)),
+        )
+
+    def band_indices(
+        self, size: int, sampling_rate: float, bands: Dict[str, Sequence[float]]
+    ) -> Dict[str, np.ndarray]:
+        """Per band, the rfft bins with ``low <= frequency <= high``"""
+        key = (size, sampling_rate, tuple((b, tuple(r)) for b, r in bands.items()))
+
+        def build():
+            freqs = self.rfft_frequencies(size, sampling_rate)
+            return {
+                band: _frozen(np.flatnonzero((freqs >= low) & (freqs <= high)))
+                for band, (low, high) in bands.items()
+            }
+
+        return self.get("bands", key, build)
+
+
+class ScratchPool:
+    """
+    Reusable work buffers, one per thread
+
+    Each thread keeps a single flat buffer that grows to its largest request
+    up to ``max_bytes``; :meth:`get` returns a view of its start, so a thread
+    can only use one scratch array at a time. Requests over the cap get a
+    fresh array. Unlike :class:`SpectralCache` entries these are keyed by
+    nothing but the thread, so varying block sizes reuse the same memory.
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20):
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def get(self, shape: Tuple[int, ...], dtype=np.float64) -> np.ndarray:
+        """
+        A work array of ``shape`` owned by the calling thread
+
+        Its contents are undefined and are overwritten by the thread's next
+        call, so results must not keep a reference.
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if nbytes > self.max_bytes:
+            return np.empty(shape, dtype)
+
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or len(buffer) < nbytes:
+            size = nbytes if buffer is None else max(nbytes, 2 * len(buffer))
+            buffer = self._local.buffer = np.empty(min(size, self.max_bytes), np.uint8)
+        return buffer[:nbytes].view(dtype).reshape(shape)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the calling thread"""
+        buffer = getattr(self._local, "buffer", None)
+        return 0 if buffer is None else len(buffer)
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+
+def welch(
+    x: np.ndarray,
+    sampling_rate: float,
+    nperseg: int,
+    cache: Optional[SpectralCache] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Welch PSD along the last axis with cached setup
+
+    Same defaults and output as ``scipy.signal.welch(x, fs, nperseg=...)``:
+    Hann window, 50% overlap, constant detrend, one-sided density, mean of
+    the segments. ``x`` must hold at least ``nperseg`` samples.
+    """
+    cache = spectral_cache if cache is None else cache
+    spectrum = segment_spectra(welch_segments(x, nperseg), cache)
+    power = spectrum.real**2 + spectrum.imag**2
+    power *= density_scale(nperseg, sampling_rate, cache)
+    fold_one_sided(power, nperseg)
+
+    return cache.rfft_frequencies(nperseg, sampling_rate), power.mean(axis=-2)
+
+
+def cross_spectral_density(
+    x: np.ndarray,
+    sampling_rate: float,
+    nperseg: int,
+    cache: Optional[SpectralCache] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Welch cross-spectral density matrix of (n_channels, n_samples) data
+
+    Returns the frequencies and a (channels, channels, frequencies) complex
+    matrix whose ``[i, j]`` is ``scipy.signal.csd(x[i], x[j], fs,
+    nperseg=...)``. Every pair comes from one set of segment FFTs and one
+    ``einsum``.
+    """
+    cache = spectral_cache if cache is None else cache
+    spectrum = segment_spectra(welch_segments(x, nperseg), cache)
+    csd = np.einsum("isf,jsf->ijf", spectrum.conj(), spectrum, optimize=True)
+    csd *= density_scale(nperseg, sampling_rate, cache) / spectrum.shape[-2]
+    fold_one_sided(csd, nperseg)
+
+    return cache.rfft_frequencies(nperseg, sampling_rate), csd
+
+
+def magnitude_squared_coherence(csd: np.ndarray) -> np.ndarray:
+    """``|Sxy|^2 / (Sxx Syy)`` for every pair of a cross-spectral matrix"""
+    auto = np.einsum("iif->if", csd).real
+    denominator = auto[:, None, :] * auto[None, :, :]
+    return np.divide(
+        csd.real**2 + csd.imag**2,
+        denominator,
+        out=np.zeros(denominator.shape),
+        where=denominator > 0,
+    )
+
+
+def band_coherence(
+    coherence: np.ndarray,
+    nperseg: int,
+    sampling_rate: float,
+    bands: Dict[str, Sequence[float]],
+    cache: Optional[SpectralCache] = None,
+) -> Dict[str, np.ndarray]:
+    """Per band, the channel-pair coherence averaged over the band's bins"""
+    cache = spectral_cache if cache is None else cache
+    return {
+        band: coherence[..., indices].mean(axis=-1)
+        for band, indices in cache.band_indices(nperseg, sampling_rate, bands).items()
+        if len(indices)
+    }
+
+
+def welch_segments(x: np.ndarray, nperseg: int) -> np.ndarray:
+    """Half-overlapping ``nperseg`` windows along the last axis, as a view"""
+    x = np.asarray(x, dtype=np.float64)
+    step = nperseg - nperseg // 2
+    count = (x.shape[-1] - nperseg) // step + 1
+    return np.lib.stride_tricks.sliding_window_view(x, nperseg, axis=-1)[
+        ..., : count * step : step, :
+    ]
+
+
+def segment_spectra(
+    segments: np.ndarray, cache: Optional[SpectralCache] = None
+) -> np.ndarray:
+    """rfft of each segment (last axis) after removing its mean and Hann windowing"""
+    cache = spectral_cache if cache is None else cache
+    work = scratch_pool.get(segments.shape)
+    np.subtract(segments, segments.mean(axis=-1, keepdims=True), out=work)
+    work *= cache.window("hann", segments.shape[-1])
+    return np.fft.rfft(work, axis=-1)
+
+
+def density_scale(
+    nperseg: int, sampling_rate: float, cache: Optional[SpectralCache] = None
+) -> float:
+    """Hann-window factor turning squared FFT magnitudes into a density"""
+    cache = spectral_cache if cache is None else cache
+    window = cache.window("hann", nperseg)
+    return cache.get(
+        "welch_scale",
+        (nperseg, sampling_rate),
+        lambda: 1.0 / (sampling_rate * float(np.sum(window**2))),
+    )
+
+
+def fold_one_sided(spectra: np.ndarray, nperseg: int):
+    """Fold the negative frequencies in, except DC and Nyquist (in place)"""
+    spectra[..., 1 : None if nperseg % 2 else -1] *= 2
+
+
+def create_spectral_cache() -> SpectralCache:
+    """Spectral cache sized by SAVY_SPECTRAL_CACHE_ENTRIES (default 256)"""
+    return SpectralCache(int(os.getenv("SAVY_SPECTRAL_CACHE_ENTRIES", "256")))
+
+
+def create_scratch_pool() -> ScratchPool:
+    """Scratch pool capped per thread by SAVY_SPECTRAL_SCRATCH_MB (default 64)"""
+    return ScratchPool(
+        int(float(os.getenv("SAVY_SPECTRAL_SCRATCH_MB", "64")) * (1 << 20))
+    )
+
+
+# Shared by every processor in the process
+spectral_cache = create_spectral_cache()
+scratch_pool = create_scratch_pool()
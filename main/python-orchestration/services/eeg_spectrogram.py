@@ -0,0 +1,240 @@
+import os
+import base64
+import numpy as np
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+from services.eeg_spectral import (
+    density_scale,
+    fold_one_sided,
+    segment_spectra,
+    spectral_cache,
+)
+
+# Floor for the dB conversion, far below any real EEG power density
+POWER_FLOOR = 1e-20
+
+
+class HeatmapDtype(str, Enum):
+    FLOAT32 = "float32"
+    UINT8 = "uint8"
+
+
+class StreamingSpectrogram:
+    """
+    Rolling STFT of one multichannel stream
+
+    Blocks are appended as they arrive; only the columns that the new
+    samples complete are computed (one batched rfft over every new
+    hop-sized segment and channel), the tail shorter than a window waits
+    for the next block. Columns are the one-sided power spectral density of
+    a Hann-windowed, mean-removed segment in dB, stamped at the segment
+    centre, and are kept in a ring of ``max_columns``.
+    """
+
+    def __init__(
+        self,
+        sampling_rate: float,
+        num_channels: int,
+        nperseg: int = 256,
+        hop: int = 64,
+        max_columns: int = 600,
+    ):
+        self.sampling_rate = sampling_rate
+        self.num_channels = num_channels
+        self.nperseg = nperseg
+        self.hop = hop
+        self.max_columns = max_columns
+        self.bins = nperseg // 2 + 1
+
+        self.columns = np.zeros((max_columns, num_channels, self.bins), np.float32)
+        self.times = np.zeros(max_columns)
+        self.written = 0
+
+        self._pending = np.zeros((0, num_channels))
+        self._pending_times = np.zeros(0)
+        self.last_timestamp = -np.inf
+
+    def __len__(self) -> int:
+        return min(self.written, self.max_columns)
+
+    @property
+    def frequencies(self) -> np.ndarray:
+        return spectral_cache.rfft_frequencies(self.nperseg, self.sampling_rate)
+
+    def process(self, block: np.ndarray, timestamps: np.ndarray) -> int:
+        """
+        Append an (n_samples, n_channels) block; returns the columns added
+
+        Samples not newer than the last one seen are skipped, so a block
+        that overlaps a backfill is not counted twice.
+        """
+        fresh = timestamps > self.last_timestamp
+        if not fresh.all():
+            block, timestamps = block[fresh], timestamps[fresh]
+        if len(timestamps) == 0:
+            return 0
+        self.last_timestamp = float(timestamps[-1])
+
+        pending = np.concatenate([self._pending, block])
+        pending_times = np.concatenate([self._pending_times, timestamps])
+        count = (len(pending) - self.nperseg) // self.hop + 1
+        if count <= 0:
+            self._pending, self._pending_times = pending, pending_times
+            return 0
+
+        # (count, channels, nperseg) views of every completed segment
+        segments = np.lib.stride_tricks.sliding_window_view(
+            pending, self.nperseg, axis=0
+        )[: count * self.hop : self.hop]
+        spectrum = segment_spectra(segments)
+        power = spectrum.real**2 + spectrum.imag**2
+        power *= density_scale(self.nperseg, self.sampling_rate)
+        fold_one_sided(power, self.nperseg)
+        np.maximum(power, POWER_FLOOR, out=power)
+        decibels = 10 * np.log10(power)
+
+        centre = self.nperseg / 2 / self.sampling_rate
+        times = pending_times[: count * self.hop : self.hop] + centre
+        self._append(decibels, times)
+
+        consumed = count * self.hop
+        self._pending = pending[consumed:]
+        self._pending_times = pending_times[consumed:]
+        return count
+
+    def read(
+        self, since: Optional[float] = None, limit: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Column times and (columns, channels, bins) dB values, oldest first
+
+        Only columns stamped after ``since``, at most the latest ``limit``.
+        """
+        held = len(self)
+        order = (self.written - held + np.arange(held)) % self.max_columns
+        times = self.times[order]
+        if since is not None:
+            order = order[times > since]
+            times = self.times[order]
+        if limit is not None:
+            order, times = order[-limit:], times[-limit:]
+        return times, self.columns[order]
+
+    def _append(self, columns: np.ndarray, times: np.ndarray):
+        columns, times = columns[-self.max_columns :], times[-self.max_columns :]
+        slots = (self.written + np.arange(len(times))) % self.max_columns
+        self.columns[slots] = columns
+        self.times[slots] = times
+        self.written += len(times)
+
+
+def encode_heatmap(
+    decibels: np.ndarray,
+    dtype: HeatmapDtype = HeatmapDtype.FLOAT32,
+    db_min: Optional[float] = None,
+    db_max: Optional[float] = None,
+    dynamic_range: float = 60.0,
+) -> Dict[str, Any]:
+    """
+    One channel's (columns, bins) dB matrix as base64, row per column
+
+    ``uint8`` maps ``[db_min, db_max]`` onto 0-255; the range defaults to
+    the ``dynamic_range`` dB below the loudest value. Decode with
+    ``db = db_min + q / 255 * (db_max - db_min)``.
+    """
+    heatmap = {"shape": list(decibels.shape), "dtype": HeatmapDtype(dtype).value}
+    if dtype == HeatmapDtype.FLOAT32:
+        heatmap["data"] = _b64(decibels.astype("<f4"))
+        return heatmap
+
+    if db_max is None:
+        db_max = float(decibels.max()) if decibels.size else 0.0
+    if db_min is None:
+        db_min = db_max - dynamic_range
+    span = max(db_max - db_min, 1e-6)
+    quantized = np.clip((decibels - db_min) * (255.0 / span), 0, 255)
+    heatmap["data"] = _b64(np.rint(quantized).astype(np.uint8))
+    heatmap["db_min"] = db_min
+    heatmap["db_max"] = db_max
+    return heatmap
+
+
+def _b64(array: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode("ascii")
+
+
+class SpectrogramBank:
+    """
+    Rolling spectrograms of the sessions someone is watching
+
+    A session gets a spectrogram on first request (backfilled from its
+    buffer by the caller); after that every ingested block extends it.
+    Least recently used sessions are dropped first. Like the filters, the
+    state lives in worker memory.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 1.0,
+        hop_seconds: float = 0.25,
+        max_columns: int = 600,
+        max_sessions: int = 256,
+    ):
+        self.window_seconds = window_seconds
+        self.hop_seconds = hop_seconds
+        self.max_columns = max_columns
+        self.max_sessions = max_sessions
+        self.spectrograms: "OrderedDict[str, StreamingSpectrogram]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.spectrograms)
+
+    def peek(self, session_id: str) -> Optional[StreamingSpectrogram]:
+        """The session's spectrogram if it has one"""
+        return self.spectrograms.get(session_id)
+
+    def create(
+        self, session_id: str, sampling_rate: float, num_channels: int
+    ) -> StreamingSpectrogram:
+        """A new, empty spectrogram for the session, replacing any other"""
+        nperseg = max(2, int(round(self.window_seconds * sampling_rate)))
+        spectrogram = StreamingSpectrogram(
+            sampling_rate,
+            num_channels,
+            nperseg=nperseg,
+            hop=max(1, int(round(self.hop_seconds * sampling_rate))),
+            max_columns=self.max_columns,
+        )
+        self.spectrograms[session_id] = spectrogram
+        self.spectrograms.move_to_end(session_id)
+        while len(self.spectrograms) > self.max_sessions:
+            self.spectrograms.popitem(last=False)
+        return spectrogram
+
+    def touch(self, session_id: str):
+        if session_id in self.spectrograms:
+            self.spectrograms.move_to_end(session_id)
+
+    def discard(self, session_id: str):
+        self.spectrograms.pop(session_id, None)
+
+
+def create_spectrogram_bank() -> Optional[SpectrogramBank]:
+    """
+    Spectrogram bank from environment, or None when SAVY_SPECTROGRAM=0
+
+    SAVY_SPECTROGRAM_WINDOW (seconds per column, default 1),
+    SAVY_SPECTROGRAM_HOP (seconds between columns, default 0.25),
+    SAVY_SPECTROGRAM_COLUMNS (ring size, default 600) and
+    SAVY_SPECTROGRAM_SESSIONS (default 256).
+    """
+    if os.getenv("SAVY_SPECTROGRAM", "1").lower() in ("0", "false", "off"):
+        return None
+    return SpectrogramBank(
+        window_seconds=float(os.getenv("SAVY_SPECTROGRAM_WINDOW", "1")),
+        hop_seconds=float(os.getenv("SAVY_SPECTROGRAM_HOP", "0.25")),
+        max_columns=int(os.getenv("SAVY_SPECTROGRAM_COLUMNS", "600")),
+        max_sessions=int(os.getenv("SAVY_SPECTROGRAM_SESSIONS", "256")),
+    )
@@ -0,0 +1,151 @@
+import base64
+import json
+import struct
+import numpy as np
+from typing import Dict, Any, Optional
+from enum import Enum
+
+
+MEDIA_TYPE_JSON = "application/json"
+MEDIA_TYPE_COLUMNAR = "application/vnd.savy.eeg.columnar+json"
+MEDIA_TYPE_FRAME = "application/vnd.savy.eeg.frame"
+
+FRAME_MAGIC = b"SVYC"
+FRAME_VERSION = 1
+FRAME_ALIGN = 8
+
+
+class WireFormat(str, Enum):
+    JSON = "json"
+    COLUMNAR = "columnar"
+    BINARY = "binary"
+
+
+MEDIA_TYPES = {
+    WireFormat.JSON: MEDIA_TYPE_JSON,
+    WireFormat.COLUMNAR: MEDIA_TYPE_COLUMNAR,
+    WireFormat.BINARY: MEDIA_TYPE_FRAME,
+}
+
+
+def negotiate_format(
+    accept: Optional[str] = None, requested: Optional[WireFormat] = None
+) -> WireFormat:
+    """Pick a wire format from an explicit flag, falling back to Accept"""
+    if requested is not None:
+        return WireFormat(requested)
+
+    for media_range in (accept or "").split(","):
+        media_type = media_range.split(";")[0].strip().lower()
+        for wire_format, candidate in MEDIA_TYPES.items():
+            if media_type == candidate and wire_format != WireFormat.JSON:
+                return wire_format
+
+    return WireFormat.JSON
+
+
+def to_columnar_json(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Encode columnar data as JSON-safe dict
+
+    Per-channel ``values`` (float32) and ``indices`` (uint32) columns become
+    base64 strings of their little-endian bytes.
+    """
+    channels = {}
+    for key, column in data["channels"].items():
+        channels[key] = {
+            "count": len(column["values"]),
+            "values": _b64(column["values"].astype("<f4")),
+            "indices": _b64(column["indices"].astype("<u4"))
+            if column["indices"] is not None
+            else None,
+        }
+
+    return {**data, "encoding": "columnar", "channels": channels}
+
+
+def from_columnar_json(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode :func:`to_columnar_json` output back to NumPy columns"""
+    channels = {}
+    for key, column in data["channels"].items():
+        channels[key] = {
+            "values": np.frombuffer(base64.b64decode(column["values"]), "<f4"),
+            "indices": np.frombuffer(base64.b64decode(column["indices"]), "<u4")
+            if column["indices"] is not None
+            else None,
+        }
+
+    return {**data, "channels": channels}
+
+
+def to_binary_frame(data: Dict[str, Any], **extra) -> bytes:
+    """
+    Encode columnar data as a single binary frame
+
+    Layout:
+    [Magic "SVYC"][Version u16][Header length u32][Header JSON][Columns]
+    The header JSON holds every non-column field plus a ``columns`` table of
+    ``{channel, kind, dtype, count, offset}``; offsets are relative to the
+    start of the column section and 8-byte aligned.
+    """
+    columns = []
+    chunks = []
+    offset = 0
+
+    for key, column in data["channels"].items():
+        for kind, dtype in (("values", "<f4"), ("indices", "<u4")):
+            array = column[kind]
+            if array is None:
+                continue
+
+            raw = array.astype(dtype).tobytes()
+            columns.append(
+                {
+                    "channel": key,
+                    "kind": kind,
+                    "dtype": dtype,
+                    "count": len(array),
+                    "offset": offset,
+                }
+            )
+            padding = -len(raw) % FRAME_ALIGN
+            chunks.append(raw + b"\0" * padding)
+            offset += len(raw) + padding
+
+    header = {k: v for k, v in data.items() if k != "channels"}
+    header.update(extra)
+    header["encoding"] = "binary"
+    header["channels"] = list(data["channels"])
+    header["columns"] = columns
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    header_bytes += b" " * (-(len(header_bytes) + 10) % FRAME_ALIGN)
+
+    prefix = FRAME_MAGIC + struct.pack("<HI", FRAME_VERSION, len(header_bytes))
+    return b"".join([prefix, header_bytes, *chunks])
+
+
+def from_binary_frame(frame: bytes) -> Dict[str, Any]:
+    """Decode :func:`to_binary_frame` output without copying the columns"""
+    if frame[:4] != FRAME_MAGIC:
+        raise ValueError("Not an EEG columnar frame")
+
+    version, header_length = struct.unpack_from("<HI", frame, 4)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported frame version: {version}")
+
+    header = json.loads(frame[10 : 10 + header_length].decode("utf-8"))
+    body = memoryview(frame)[10 + header_length :]
+
+    channels = {key: {"values": None, "indices": None} for key in header["channels"]}
+    for column in header.pop("columns"):
+        channels[column["channel"]][column["kind"]] = np.frombuffer(
+            body, column["dtype"], column["count"], column["offset"]
+        )
+
+    header["channels"] = channels
+    return header
+
+
+def _b64(array: np.ndarray) -> str:
+    return base64.b64encode(array.tobytes()).decode("ascii")
@@ -0,0 +1,233 @@
+import os
+import ssl
+import socket
+import struct
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from services.eeg_service import ChecksumError, EEGEvent, EEGSample, create_eeg_parser
+from services.metrics_service import registry, record_error
+
+logger = logging.getLogger(__name__)
+
+# Device -> server: [Frame length u32][Parser frame]
+LENGTH_PREFIX = struct.Struct("<I")
+# Server -> device, one per frame: [Frames received u32][Samples accepted i32]
+# (-1 when the frame was rejected)
+ACK = struct.Struct("<Ii")
+MIN_FRAME_BYTES = 48
+
+INGEST_FRAMES = registry.counter(
+    "eeg_ingest_frames_total", "Frames received on the TLS ingest port", ["status"]
+)
+INGEST_BYTES = registry.counter(
+    "eeg_ingest_bytes_total", "Frame bytes received on the TLS ingest port"
+)
+INGEST_HANDSHAKES = registry.counter(
+    "eeg_ingest_handshakes_total",
+    "TLS handshakes on the ingest port by whether the session was resumed",
+    ["resumed"],
+)
+INGEST_REJECTED = registry.counter(
+    "eeg_ingest_rejected_connections_total",
+    "Ingest connections closed because the worker was at its connection limit",
+)
+
+# (session ID, samples, events, frame header)
+FrameHandler = Callable[
+    [str, List[EEGSample], List[EEGEvent], Dict[str, Any]], Awaitable[None]
+]
+
+
+def create_ingest_context(
+    certfile: str, keyfile: str, num_tickets: int = 2
+) -> ssl.SSLContext:
+    """
+    Server TLS context with session resumption
+
+    TLS 1.3 clients get ``num_tickets`` session tickets per handshake and
+    TLS 1.2 clients session IDs from the context's cache, so a headset that
+    reconnects skips the certificate exchange. Tickets are only valid on the
+    worker that issued them.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.load_cert_chain(certfile, keyfile)
+    context.num_tickets = num_tickets
+    return context
+
+
+class IngestGateway:
+    """
+    Asyncio TLS server for device streams
+
+    Each connection carries length-prefixed parser frames; every frame is
+    parsed off the event loop, handed to ``handler`` (the same buffer and processing pipeline
+    the API uses) and acknowledged with :data:`ACK`, so devices get
+    backpressure and per-frame delivery. Frames are routed by the session
+    ID in their header, so one connection may carry several sessions.
+    Connections that stay silent for ``idle_timeout`` seconds or break the
+    framing are closed.
+
+    With ``reuse_port`` several workers bind the same port and the kernel
+    spreads connections across them.
+    """
+
+    def __init__(
+        self,
+        handler: FrameHandler,
+        context: Optional[ssl.SSLContext],
+        host: str = "0.0.0.0",
+        port: int = 4433,
+        max_connections: int = 10000,
+        max_frame_bytes: int = 16 << 20,
+        idle_timeout: float = 60.0,
+        reuse_port: bool = False,
+    ):
+        self.handler = handler
+        self.context = context
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.max_frame_bytes = max_frame_bytes
+        self.idle_timeout = idle_timeout
+        self.reuse_port = reuse_port
+        self.connections: Set[asyncio.StreamWriter] = set()
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self._serve,
+            self.host,
+            self.port,
+            ssl=self.context,
+            ssl_handshake_timeout=10.0 if self.context else None,
+            backlog=1024,
+            reuse_port=self.reuse_port,
+        )
+        logger.info(f"EEG ingest listening on {self.host}:{self.port}")
+
+    async def close(self):
+        if self.server is None:
+            return
+        self.server.close()
+        for writer in list(self.connections):
+            writer.close()
+        await self.server.wait_closed()
+        self.server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if len(self.connections) >= self.max_connections:
+            INGEST_REJECTED.inc()
+            writer.close()
+            return
+
+        ssl_object = writer.get_extra_info("ssl_object")
+        if ssl_object is not None:
+            INGEST_HANDSHAKES.inc(1.0, str(ssl_object.session_reused).lower())
+
+        self.connections.add(writer)
+        parser = create_eeg_parser()
+        received = 0
+        try:
+            while True:
+                prefix = await asyncio.wait_for(
+                    reader.readexactly(LENGTH_PREFIX.size), self.idle_timeout
+                )
+                (length,) = LENGTH_PREFIX.unpack(prefix)
+                if not MIN_FRAME_BYTES <= length <= self.max_frame_bytes:
+                    INGEST_FRAMES.inc(1.0, "bad_length")
+                    logger.warning(
+                        f"Closing ingest connection {writer.get_extra_info('peername')}"
+                        f": frame length {length}"
+                    )
+                    break
+
+                frame = await asyncio.wait_for(
+                    reader.readexactly(length), self.idle_timeout
+                )
+                received += 1
+                INGEST_BYTES.inc(float(length))
+
+                accepted = await self._handle(parser, frame)
+                writer.write(ACK.pack(received, accepted))
+                await writer.drain()
+
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    async def _handle(self, parser, frame: bytes) -> int:
+        """Parse and process one frame; returns samples accepted or -1"""
+        try:
+            header, samples, events = await asyncio.to_thread(
+                self._decode, parser, frame
+            )
+            session_id = header["session_id"]
+            if not session_id or not samples:
+                INGEST_FRAMES.inc(1.0, "invalid")
+                return -1
+
+            await self.handler(session_id, samples, events, header)
+            INGEST_FRAMES.inc(1.0, "accepted")
+            return len(samples)
+
+        except ChecksumError:
+            INGEST_FRAMES.inc(1.0, "invalid")
+            return -1
+        except Exception as e:
+            INGEST_FRAMES.inc(1.0, "failed")
+            record_error("ingest")
+            logger.error(f"Ingest frame failed: {e}")
+            return -1
+
+    @staticmethod
+    def _decode(parser, frame: bytes):
+        """
+        Header, samples and events of a frame, with its footer verified
+
+        Runs on a worker thread so large frames don't stall other
+        connections; a connection's frames are decoded one at a time, and
+        its samples reach the event loop only once verification is done.
+        """
+        header = parser.frame_header(frame)
+        samples, events = parser.frame_to_samples(frame)
+        parser.drain_checksums()
+        return header, samples, events
+
+
+def create_ingest_gateway(handler: FrameHandler) -> Optional[IngestGateway]:
+    """
+    TLS ingest gateway from environment, or None unless SAVY_INGEST=1
+
+    SAVY_INGEST_HOST / SAVY_INGEST_PORT (default 0.0.0.0:4433),
+    SAVY_INGEST_CERT / SAVY_INGEST_KEY (default cert.pem / key.pem; set
+    SAVY_INGEST_TLS=0 for plain TCP behind a TLS terminator),
+    SAVY_INGEST_MAX_CONNECTIONS per worker, SAVY_INGEST_IDLE_TIMEOUT and
+    SAVY_INGEST_MAX_FRAME_MB. Workers share the port via SO_REUSEPORT.
+    """
+    if os.getenv("SAVY_INGEST", "0").lower() in ("0", "false", "off"):
+        return None
+
+    context = None
+    if os.getenv("SAVY_INGEST_TLS", "1").lower() not in ("0", "false", "off"):
+        context = create_ingest_context(
+            os.getenv("SAVY_INGEST_CERT", "cert.pem"),
+            os.getenv("SAVY_INGEST_KEY", "key.pem"),
+        )
+
+    return IngestGateway(
+        handler,
+        context,
+        host=os.getenv("SAVY_INGEST_HOST", "0.0.0.0"),
+        port=int(os.getenv("SAVY_INGEST_PORT", "4433")),
+        max_connections=int(os.getenv("SAVY_INGEST_MAX_CONNECTIONS", "10000")),
+        max_frame_bytes=int(
+            float(os.getenv("SAVY_INGEST_MAX_FRAME_MB", "16")) * 2**20
+        ),
+        idle_timeout=float(os.getenv("SAVY_INGEST_IDLE_TIMEOUT", "60")),
+        reuse_port=hasattr(socket, "SO_REUSEPORT"),
+    )
@@ -7,6 +7,8 @@ from dataclasses import dataclass, asdict
 import aiohttp
 import base64
 
+from services.metrics_service import IPFS_REQUEST_SECONDS, timer
+
 
 @dataclass
 class IPFSMetadata:
@@ -51,21 +53,34 @@ class IPFSStorageService:
         """Make POST request to IPFS API"""
         url = f"{self.base_url}/api/v0{endpoint}"
 
-        async with self._session.post(url, data=data, params=params) as resp:
-            if resp.status != 200:
-                text = await resp.text()
-                raise Exception(f"IPFS error {resp.status}: {text}")
-            return await resp.json()
+        with timer(IPFS_REQUEST_SECONDS, endpoint):
+            async with self._session.post(url, data=data, params=params) as resp:
+                if resp.status != 200:
+                    text = await resp.text()
+                    raise Exception(f"IPFS error {resp.status}: {text}")
+                return await resp.json()
 
     async def _get(self, endpoint: str, params: Dict = None) -> Any:
         """Make GET request to IPFS API"""
         url = f"{self.base_url}/api/v0{endpoint}"
 
-        async with self._session.get(url, params=params) as resp:
-            if resp.status != 200:
-                text = await resp.text()
-                raise Exception(f"IPFS error {resp.status}: {text}")
-            return await resp.json()
+        with timer(IPFS_REQUEST_SECONDS, endpoint):
+            async with self._session.get(url, params=params) as resp:
+                if resp.status != 200:
+                    text = await resp.text()
+                    raise Exception(f"IPFS error {resp.status}: {text}")
+                return await resp.json()
+
+    async def _post_raw(self, endpoint: str, params: Dict = None) -> bytes:
+        """Make POST request to IPFS API returning the raw body"""
+        url = f"{self.base_url}/api/v0{endpoint}"
+
+        with timer(IPFS_REQUEST_SECONDS, endpoint):
+            async with self._session.post(url, params=params) as resp:
+                if resp.status != 200:
+                    text = await resp.text()
+                    raise Exception(f"IPFS error {resp.status}: {text}")
+                return await resp.read()
 
     async def add_bytes(self, data: bytes, pin: bool = True) -> str:
         """Add raw bytes to IPFS"""
@@ -92,10 +107,7 @@ class IPFSStorageService:
 
     async def cat(self, cid: str) -> bytes:
         """Get data from IPFS by CID"""
-        result = await self._get("/cat", params={"arg": cid})
-        if isinstance(result, bytes):
-            return result
-        return result.encode("utf-8")
+        return await self._post_raw("/cat", params={"arg": cid})
 
     async def cat_json(self, cid: str) -> Dict:
         """Get JSON from IPFS"""
@@ -123,14 +135,22 @@ class IPFSStorageService:
         return [ref["Ref"] for ref in result.get("Refs", [])]
 
     async def dag_get(self, cid: str) -> Dict:
-        """Get DAG node"""
-        result = await self._get("/dag/get", params={"arg": cid})
-        return result
-
-    async def dag_put(self, data: Dict) -> str:
-        """Put DAG node"""
-        json_data = json.dumps(data)
-        result = await self._post("/dag/put", data=json_data.encode("utf-8"))
+        """Get DAG node (links come back as ``{"/": cid}``)"""
+        result = await self._post_raw(
+            "/dag/get", params={"arg": cid, "output-codec": "dag-json"}
+        )
+        return json.loads(result)
+
+    async def dag_put(self, data: Dict, pin: bool = True) -> str:
+        """Put DAG node as dag-cbor; ``{"/": cid}`` values become links"""
+        form = aiohttp.FormData()
+        form.add_field("file", json.dumps(data).encode("utf-8"), filename="node.json")
+        params = {
+            "store-codec": "dag-cbor",
+            "input-codec": "dag-json",
+            "pin": str(pin).lower(),
+        }
+        result = await self._post("/dag/put", data=form, params=params)
         return result["Cid"]["/"]
 
     async def block_put(self, data: bytes) -> str:
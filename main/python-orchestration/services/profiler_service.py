@@ -0,0 +1,299 @@
+import os
+import sys
+import hmac
+import json
+import time
+import uuid
+import threading
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for one thread
+
+    A daemon thread reads the target thread's current frame every
+    ``interval`` seconds while any :meth:`record` block is open (they may
+    overlap across awaits), and counts identical stacks. Nothing is hooked
+    into the profiled code, so the cost outside recording windows is one
+    sleeping thread, which exits by itself at ``deadline`` when one is set.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        thread_id: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.deadline = deadline
+        self.stacks: Counter = Counter()
+        self.depth = 0
+        self.started_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def recording(self) -> bool:
+        return self.depth > 0
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+    @contextmanager
+    def record(self):
+        with self._lock:
+            self.depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self.depth -= 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.deadline is not None and time.time() >= self.deadline:
+                break
+            if not self.recording:
+                continue
+
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                    f":{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+
+def to_collapsed(stacks: Counter) -> str:
+    """Brendan Gregg collapsed-stack format, one ``a;b;c count`` per line"""
+    return "".join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.items())
+
+
+def to_speedscope(stacks: Counter, name: str, interval: float) -> Dict:
+    """Speedscope sampled-profile JSON document"""
+    frame_index: Dict[str, int] = {}
+    samples: List[List[int]] = []
+    weights: List[float] = []
+
+    for stack, count in stacks.items():
+        samples.append([frame_index.setdefault(f, len(frame_index)) for f in stack])
+        weights.append(count * interval)
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": [{"name": f} for f in frame_index]},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+        "name": name,
+        "exporter": "savy-sampling-profiler",
+    }
+
+
+@dataclass
+class SessionProfile:
+    profiler: SamplingProfiler
+    output_format: str
+    expires_at: float
+    blocks: int = 0
+    started_at: float = field(default_factory=time.time)
+
+
+class ProfileManager:
+    """
+    Opt-in profiling of single requests or single stream sessions
+
+    Profiles are written to ``output_dir`` as ``.folded`` (collapsed stacks)
+    or ``.speedscope.json`` files. Session profiling only records while a
+    block of that session is being processed; a session profile past its
+    duration stops sampling on its own and is written out by the next block,
+    :meth:`expire` or the profile listing.
+    """
+
+    FORMATS = ("collapsed", "speedscope")
+
+    def __init__(self, output_dir: str = "profiles", interval: float = 0.005):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.sessions: Dict[str, SessionProfile] = {}
+
+    @contextmanager
+    def profile(self, name: str, output_format: str = "speedscope"):
+        """Profile the enclosed block and write it out; yields the file path"""
+        profiler = SamplingProfiler(self.interval)
+        path = self._path(name, output_format)
+        profiler.start()
+        try:
+            with profiler.record():
+                yield path
+        finally:
+            self._write(profiler.stop(), name, output_format, path)
+
+    def enable_session(
+        self, session_id: str, duration: float = 60.0, output_format: str = "speedscope"
+    ):
+        self.expire()
+        if session_id in self.sessions:
+            raise ValueError(f"Session {session_id} is already being profiled")
+
+        expires_at = time.time() + duration
+        profiler = SamplingProfiler(self.interval, deadline=expires_at)
+        profiler.start()
+        self.sessions[session_id] = SessionProfile(
+            profiler=profiler,
+            output_format=output_format,
+            expires_at=expires_at,
+        )
+
+    def disable_session(self, session_id: str) -> Optional[str]:
+        """Stop profiling a session and return the written profile path"""
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return None
+
+        name = f"session-{session_id}"
+        path = self._path(name, session.output_format)
+        self._write(session.profiler.stop(), name, session.output_format, path)
+        return path
+
+    def expire(self) -> List[str]:
+        """Write out session profiles past their duration; returns the paths"""
+        now = time.time()
+        expired = [s for s, p in self.sessions.items() if now >= p.expires_at]
+        return [self.disable_session(session_id) for session_id in expired]
+
+    @contextmanager
+    def session_block(self, session_id: str):
+        """Record samples while one block of a profiled session is processed"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            yield
+            return
+
+        try:
+            with session.profiler.record():
+                yield
+        finally:
+            session.blocks += 1
+            # An overlapping block may already have written it out
+            if self.sessions.get(session_id) is session and (
+                time.time() >= session.expires_at
+            ):
+                self.disable_session(session_id)
+
+    def list_profiles(self) -> List[Dict]:
+        self.expire()
+        if not os.path.isdir(self.output_dir):
+            return []
+
+        return [
+            {
+                "file": entry.name,
+                "size": entry.stat().st_size,
+                "modified": entry.stat().st_mtime,
+            }
+            for entry in sorted(os.scandir(self.output_dir), key=lambda e: e.name)
+            if entry.is_file()
+        ]
+
+    def _path(self, name: str, output_format: str) -> str:
+        suffix = ".folded" if output_format == "collapsed" else ".speedscope.json"
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        unique = uuid.uuid4().hex[:8]
+        return os.path.join(self.output_dir, f"{stamp}-{safe_name}-{unique}{suffix}")
+
+    def _write(self, stacks: Counter, name: str, output_format: str, path: str):
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(path, "w") as f:
+            if output_format == "collapsed":
+                f.write(to_collapsed(stacks))
+            else:
+                json.dump(to_speedscope(stacks, name, self.interval), f)
+
+        logger.info(f"Wrote profile {path} ({sum(stacks.values())} samples)")
+
+
+def create_profile_manager() -> ProfileManager:
+    """Factory function for the profile manager, configured from environment"""
+    return ProfileManager(
+        output_dir=os.getenv("SAVY_PROFILE_DIR", "profiles"),
+        interval=float(os.getenv("SAVY_PROFILE_INTERVAL", "0.005")),
+    )
+
+
+class ProfileRequestMiddleware:
+    """
+    ASGI middleware profiling single HTTP requests on demand
+
+    A request is profiled only when its ``X-Profile`` header matches the
+    ``SAVY_ADMIN_TOKEN`` environment variable. ``X-Profile-Format`` picks
+    ``collapsed`` or ``speedscope``; the written file name is returned in the
+    ``X-Profile-Output`` response header.
+    """
+
+    def __init__(self, app, manager: ProfileManager):
+        self.app = app
+        self.manager = manager
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        token = os.getenv("SAVY_ADMIN_TOKEN", "")
+        headers = dict(scope.get("headers") or [])
+        requested = headers.get(b"x-profile")
+        if not token or not requested:
+            return await self.app(scope, receive, send)
+        if not hmac.compare_digest(requested, token.encode()):
+            return await self.app(scope, receive, send)
+
+        output_format = headers.get(b"x-profile-format", b"speedscope").decode()
+        if output_format not in ProfileManager.FORMATS:
+            output_format = "speedscope"
+        name = f"request-{scope['method']}-{scope['path']}"
+
+        with self.manager.profile(name, output_format) as path:
+            output = os.path.basename(path).encode()
+
+            async def send_with_output(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-profile-output", output)
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_output)
@@ -0,0 +1,968 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+import numpy as np
+from contextlib import asynccontextmanager, contextmanager
+from multiprocessing import shared_memory, resource_tracker
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from services.eeg_service import (
+    EEGChannel,
+    EEGEvent,
+    EEGSample,
+    EEGStreamBuffer,
+)
+from services.metrics_service import registry
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts use the local store
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class LocalSessionStore(dict):
+    """In-process session buffers (the single-worker default)"""
+
+    def __init__(self, max_samples: int = 10000):
+        super().__init__()
+        self.max_samples = max_samples
+
+    def create(self, session_id: str) -> EEGStreamBuffer:
+        buffer = self[session_id] = EEGStreamBuffer(self.max_samples)
+        return buffer
+
+    def get_or_create(self, session_id: str) -> EEGStreamBuffer:
+        if session_id not in self:
+            return self.create(session_id)
+        return self[session_id]
+
+
+SAMPLE_DTYPE = np.dtype(
+    [("timestamp", "<f8"), ("value", "<f4"), ("channel", "u1"), ("valid", "u1")]
+)
+# magic, version, capacity, event slots, event slot size, samples written,
+# events written, last read or write (unix time)
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S4"),
+        ("version", "<u4"),
+        ("capacity", "<u8"),
+        ("event_slots", "<u8"),
+        ("event_slot_size", "<u8"),
+        ("written", "<u8"),
+        ("events_written", "<u8"),
+        ("last_activity", "<f8"),
+    ]
+)
+HEADER_SIZE = 64
+BUFFER_MAGIC = b"SEEG"
+
+# Header: [magic 4B][last generation u32][update sequence u64]
+# Slot: [id length u8][id bytes][...][generation u32 at the end]
+REGISTRY_HEADER_SIZE = 16
+REGISTRY_SLOT_SIZE = 128
+REGISTRY_ID_SIZE = REGISTRY_SLOT_SIZE - 5
+REGISTRY_MAGIC = b"SREG"
+# Lock-free registry reads tried before waiting on the writer's lock
+REGISTRY_READ_RETRIES = 100
+
+
+SESSION_EVICTIONS = registry.counter(
+    "eeg_session_evictions_total", "Session buffers evicted", ["reason"]
+)
+SESSION_REHYDRATIONS = registry.counter(
+    "eeg_session_rehydrations_total", "Evicted sessions restored from disk"
+)
+
+
+def samples_to_records(samples: List[EEGSample]) -> np.ndarray:
+    records = np.empty(len(samples), SAMPLE_DTYPE)
+    records["timestamp"] = [s.timestamp for s in samples]
+    records["value"] = [s.value for s in samples]
+    records["channel"] = [s.channel.value for s in samples]
+    records["valid"] = [s.is_valid for s in samples]
+    return records
+
+
+def records_to_samples(records: np.ndarray) -> List[EEGSample]:
+    channels = list(EEGChannel)
+    return [
+        EEGSample(
+            timestamp=timestamp,
+            channel=channels[channel],
+            value=value,
+            is_valid=bool(valid),
+        )
+        for timestamp, value, channel, valid in zip(
+            records["timestamp"].tolist(),
+            records["value"].tolist(),
+            records["channel"].tolist(),
+            records["valid"].tolist(),
+        )
+    ]
+
+
+def event_to_dict(event: EEGEvent) -> Dict:
+    return {
+        "timestamp": event.timestamp,
+        "type": event.event_type,
+        "channel": event.channel.value if event.channel else None,
+        "duration": event.duration,
+        "metadata": event.metadata,
+    }
+
+
+def event_from_dict(data: Dict) -> EEGEvent:
+    return EEGEvent(
+        timestamp=data["timestamp"],
+        event_type=data["type"],
+        channel=EEGChannel(data["channel"]) if data["channel"] is not None else None,
+        duration=data["duration"],
+        metadata=data["metadata"],
+    )
+
+
+def save_window(
+    path: str, records: np.ndarray, events: List[EEGEvent], session_id: str = ""
+):
+    """Write sample records and events to an .npz file, replacing it atomically"""
+    payload = json.dumps([event_to_dict(e) for e in events], default=float)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            records=records,
+            events=np.frombuffer(payload.encode("utf-8"), np.uint8),
+            session_id=np.frombuffer(session_id.encode("utf-8"), np.uint8),
+        )
+    os.replace(tmp_path, path)
+
+
+def load_window(path: str) -> Tuple[str, np.ndarray, List[EEGEvent]]:
+    """Session id, sample records and events written by :func:`save_window`"""
+    with np.load(path) as window:
+        records = window["records"]
+        events = [event_from_dict(e) for e in json.loads(window["events"].tobytes())]
+        session_id = window["session_id"].tobytes().decode("utf-8")
+    return session_id, records, events
+
+
+def buffer_records(buffer) -> Tuple[np.ndarray, List[EEGEvent]]:
+    """Whole buffer as sample records plus events, without marking activity"""
+    if hasattr(buffer, "records"):
+        return buffer.records()
+    return samples_to_records(buffer.samples), list(buffer.events)
+
+
+def buffer_records_since(buffer, since: float) -> Tuple[np.ndarray, List[EEGEvent]]:
+    """
+    Sample records from the last one before ``since`` on, plus all events
+
+    Only that tail is converted from sample objects. The record before
+    ``since`` (when there is one) shows whether the buffer still reaches
+    back to it. Does not mark activity.
+    """
+    if hasattr(buffer, "records"):
+        records, events = buffer.records()
+        first = int(np.searchsorted(records["timestamp"], since))
+        return records[max(first - 1, 0) :], events
+
+    samples = buffer.samples
+    low, high = 0, len(samples)
+    while low < high:
+        middle = (low + high) // 2
+        if samples[middle].timestamp < since:
+            low = middle + 1
+        else:
+            high = middle
+    return samples_to_records(samples[max(low - 1, 0) :]), list(buffer.events)
+
+
+def buffer_tail_records(buffer, count: int) -> np.ndarray:
+    """The last ``count`` sample records of a buffer, without marking activity"""
+    if hasattr(buffer, "records"):
+        return buffer.records()[0][-count:]
+    return samples_to_records(buffer.samples[-count:])
+
+
+def _untrack(shm: shared_memory.SharedMemory):
+    """
+    Stop the resource tracker from unlinking a segment when this worker exits
+
+    Segments outlive any one worker; they are unlinked explicitly when the
+    session is stopped.
+    """
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+def _open_segment(name: str, size: int) -> Tuple[shared_memory.SharedMemory, bool]:
+    """Attach to a named segment, creating it if needed"""
+    try:
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        created = True
+    except FileExistsError:
+        shm = shared_memory.SharedMemory(name=name)
+        created = False
+    _untrack(shm)
+    return shm, created
+
+
+class _FileLock:
+    """
+    flock on a lock file opened once, shared by this process's threads
+
+    flock locks belong to the open file, so threads of one process sharing
+    the descriptor would not exclude each other; a thread lock in front of
+    it does. :meth:`locked_async` waits in a worker thread instead of
+    blocking the event loop when another holder has the lock. Closing while
+    the lock is held or being waited for leaves the descriptor to the
+    holder's release.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+        self._thread_lock = threading.Lock()
+        self._closing = False
+
+    def acquire(self, mode: int, blocking: bool = True) -> bool:
+        if not self._thread_lock.acquire(blocking):
+            return False
+        try:
+            fcntl.flock(self.fd, mode if blocking else mode | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._thread_lock.release()
+            return False
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return True
+
+    def release(self):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        if self._closing:
+            self._close_fd()
+        self._thread_lock.release()
+
+    @contextmanager
+    def locked(self, mode: int):
+        self.acquire(mode)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def locked_async(self, mode: int):
+        if not self.acquire(mode, blocking=False):
+            waiter = asyncio.ensure_future(asyncio.to_thread(self.acquire, mode))
+            try:
+                await asyncio.shield(waiter)
+            except asyncio.CancelledError:
+                # The thread still takes the lock; give it back when it does
+                waiter.add_done_callback(
+                    lambda w: not w.cancelled()
+                    and w.exception() is None
+                    and self.release()
+                )
+                raise
+        try:
+            yield
+        finally:
+            self.release()
+
+    def close(self):
+        self._closing = True
+        if self._thread_lock.acquire(blocking=False):
+            try:
+                self._close_fd()
+            finally:
+                self._thread_lock.release()
+
+    def _close_fd(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class SharedEEGStreamBuffer:
+    """
+    EEGStreamBuffer backed by a shared-memory ring
+
+    Layout: [Header 64B][Samples: capacity x 14B records][Events: slots of
+    length-prefixed JSON]. Any worker on the host can attach by name.
+    Writers and readers serialize through an flock on a per-session lock
+    file, opened once per buffer and held only for the copy in or out of
+    the ring; the async paths wait for a contended lock off the event loop.
+    With ``create=False`` only an existing segment is attached, and
+    FileNotFoundError is raised once the session has been unlinked.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        lock_path: str,
+        max_samples: int = 10000,
+        event_slots: int = 256,
+        event_slot_size: int = 512,
+        create: bool = True,
+    ):
+        self.name = name
+        self.lock_path = lock_path
+        self.max_samples = max_samples
+
+        if not create:
+            # Before opening the lock file, so a gone session leaves none behind
+            self.shm = shared_memory.SharedMemory(name=name)
+            _untrack(self.shm)
+        self.lock = _FileLock(lock_path)
+
+        size = (
+            HEADER_SIZE
+            + max_samples * SAMPLE_DTYPE.itemsize
+            + event_slots * event_slot_size
+        )
+        with self.lock.locked(fcntl.LOCK_EX):
+            created = False
+            if create:
+                self.shm, created = _open_segment(name, size)
+            self.header = np.ndarray((), HEADER_DTYPE, self.shm.buf, 0)
+            if created:
+                self.header["magic"] = BUFFER_MAGIC
+                self.header["version"] = 1
+                self.header["capacity"] = max_samples
+                self.header["event_slots"] = event_slots
+                self.header["event_slot_size"] = event_slot_size
+                self.header["written"] = 0
+                self.header["events_written"] = 0
+                self.header["last_activity"] = time.time()
+
+        # Attaching workers adopt the creator's geometry
+        self.max_samples = int(self.header["capacity"])
+        self.event_slots = int(self.header["event_slots"])
+        self.event_slot_size = int(self.header["event_slot_size"])
+        self.ring = np.ndarray(
+            (self.max_samples,), SAMPLE_DTYPE, self.shm.buf, HEADER_SIZE
+        )
+        events_offset = HEADER_SIZE + self.max_samples * SAMPLE_DTYPE.itemsize
+        self.event_ring = np.ndarray(
+            (self.event_slots, self.event_slot_size),
+            np.uint8,
+            self.shm.buf,
+            events_offset,
+        )
+
+    def __len__(self) -> int:
+        return min(int(self.header["written"]), self.max_samples)
+
+    @property
+    def nbytes(self) -> int:
+        return self.shm.size
+
+    @property
+    def last_activity(self) -> float:
+        return float(self.header["last_activity"])
+
+    @property
+    def samples(self) -> List[EEGSample]:
+        with self.lock.locked(fcntl.LOCK_SH):
+            records = self._ordered_records()
+        return records_to_samples(records)
+
+    def records(self) -> Tuple[np.ndarray, List[EEGEvent]]:
+        """Whole ring as sample records, oldest first, plus its events"""
+        with self.lock.locked(fcntl.LOCK_SH):
+            records = self._ordered_records()
+            raw_events = self._ordered_events()
+        return records, [self._decode_event(raw) for raw in raw_events]
+
+    def restore(self, records: np.ndarray, events: List[EEGEvent]):
+        """Load previously saved sample records into the ring"""
+        encoded_events = [self._encode_event(e) for e in events]
+        with self.lock.locked(fcntl.LOCK_EX):
+            self._write(records[-self.max_samples :], encoded_events)
+
+    async def add_data(self, samples: List[EEGSample], events: List[EEGEvent]):
+        """Add new data to the shared ring"""
+        if not samples and not events:
+            return
+        records = samples_to_records(samples)[-self.max_samples :]
+        encoded_events = [self._encode_event(e) for e in events]
+        async with self.lock.locked_async(fcntl.LOCK_EX):
+            self._write(records, encoded_events)
+
+    def _write(self, records: np.ndarray, encoded_events: List[bytes]):
+        """Copy records and encoded events into the ring (caller holds the lock)"""
+        self.header["last_activity"] = time.time()
+        written = int(self.header["written"])
+        positions = (written + np.arange(len(records))) % self.max_samples
+        self.ring[positions] = records
+        self.header["written"] = written + len(records)
+
+        events_written = int(self.header["events_written"])
+        for i, payload in enumerate(encoded_events):
+            slot = self.event_ring[(events_written + i) % self.event_slots]
+            slot[:4] = np.frombuffer(len(payload).to_bytes(4, "little"), np.uint8)
+            slot[4 : 4 + len(payload)] = np.frombuffer(payload, np.uint8)
+        self.header["events_written"] = events_written + len(encoded_events)
+
+    async def get_window(
+        self, duration: float = 10.0
+    ) -> Tuple[List[EEGSample], List[EEGEvent]]:
+        """Get data from last N seconds"""
+        async with self.lock.locked_async(fcntl.LOCK_SH):
+            records = self._ordered_records()
+            raw_events = self._ordered_events()
+        self.header["last_activity"] = time.time()
+
+        if len(records) == 0:
+            return [], []
+
+        end_time = records["timestamp"][-1]
+        start_time = end_time - duration
+        records = records[records["timestamp"] >= start_time]
+
+        events = [self._decode_event(raw) for raw in raw_events]
+        window_events = [
+            e for e in events if e.timestamp >= start_time and e.timestamp <= end_time
+        ]
+
+        return records_to_samples(records), window_events
+
+    async def clear(self):
+        """Clear buffer"""
+        async with self.lock.locked_async(fcntl.LOCK_EX):
+            self.header["written"] = 0
+            self.header["events_written"] = 0
+
+    def close(self):
+        self.header = self.ring = self.event_ring = None
+        self.shm.close()
+        self.lock.close()
+
+    def unlink(self):
+        # SharedMemory.unlink unregisters from the resource tracker, which
+        # _untrack already did; register again so the tracker stays balanced
+        resource_tracker.register(self.shm._name, "shared_memory")
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        try:
+            os.remove(self.lock_path)
+        except FileNotFoundError:
+            pass
+
+    def _ordered_records(self) -> np.ndarray:
+        """Copy of the ring contents, oldest first (caller holds the lock)"""
+        written = int(self.header["written"])
+        if written <= self.max_samples:
+            return self.ring[:written].copy()
+        start = written % self.max_samples
+        return np.concatenate([self.ring[start:], self.ring[:start]])
+
+    def _ordered_events(self) -> List[bytes]:
+        written = int(self.header["events_written"])
+        count = min(written, self.event_slots)
+        payloads = []
+        for i in range(written - count, written):
+            slot = self.event_ring[i % self.event_slots]
+            length = int.from_bytes(slot[:4].tobytes(), "little")
+            payloads.append(slot[4 : 4 + length].tobytes())
+        return payloads
+
+    def _encode_event(self, event: EEGEvent) -> bytes:
+        payload = json.dumps(event_to_dict(event), default=float).encode("utf-8")
+        if len(payload) > self.event_slot_size - 4:
+            # Drop oversized metadata rather than the event itself
+            payload = json.dumps(
+                {**event_to_dict(event), "metadata": {"truncated": True}}
+            ).encode("utf-8")
+        return payload
+
+    @staticmethod
+    def _decode_event(payload: bytes) -> EEGEvent:
+        return event_from_dict(json.loads(payload.decode("utf-8")))
+
+
+class SharedMemorySessionStore:
+    """
+    Host-wide session store shared by all workers
+
+    A registry segment lists active session ids in fixed slots; each
+    session's buffer lives in its own segment named from a hash of the id.
+    Workers attach lazily and cache the mapping, keyed by the slot's
+    generation so a stopped and restarted session is re-attached; cached
+    buffers of sessions another worker removed are closed as they are
+    noticed. Only creates and deletes flock the registry, for the few slot
+    writes; lookups read it without locking and retry when the update
+    sequence shows a write overlapped them, so the event loop never waits
+    on another worker's registry lock in the common case.
+    """
+
+    def __init__(
+        self,
+        namespace: str = "savy",
+        max_sessions: int = 4096,
+        max_samples: int = 10000,
+        lock_dir: Optional[str] = None,
+    ):
+        if fcntl is None:
+            raise RuntimeError("Shared-memory session store requires POSIX flock")
+
+        self.namespace = namespace
+        self.max_sessions = max_sessions
+        self.max_samples = max_samples
+        self.lock_dir = lock_dir or os.path.join("/tmp", f"{namespace}-eeg-locks")
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self.registry_lock = os.path.join(self.lock_dir, "registry.lock")
+        self.lock = _FileLock(self.registry_lock)
+        self.attached: Dict[str, Tuple[int, SharedEEGStreamBuffer]] = {}
+
+        with self.lock.locked(fcntl.LOCK_EX):
+            self.registry_shm, created = _open_segment(
+                f"{namespace}_eeg_registry",
+                REGISTRY_HEADER_SIZE + max_sessions * REGISTRY_SLOT_SIZE,
+            )
+            if created:
+                self.registry_shm.buf[:4] = REGISTRY_MAGIC
+        self.generation = np.ndarray((), "<u4", self.registry_shm.buf, 4)
+        self.sequence = np.ndarray((), "<u8", self.registry_shm.buf, 8)
+        self.slots = np.ndarray(
+            (max_sessions, REGISTRY_SLOT_SIZE),
+            np.uint8,
+            self.registry_shm.buf,
+            REGISTRY_HEADER_SIZE,
+        )
+
+    def _segment_name(self, session_id: str) -> str:
+        digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()[:16]
+        return f"{self.namespace}_eeg_{digest}"
+
+    def _session_ids(self) -> Iterator[Tuple[int, str]]:
+        for index in np.flatnonzero(self.slots[:, 0]):
+            slot = self.slots[index]
+            yield int(index), slot[1 : 1 + int(slot[0])].tobytes().decode("utf-8")
+
+    def _find(self, session_id: str) -> Optional[int]:
+        for index, sid in self._session_ids():
+            if sid == session_id:
+                return index
+        return None
+
+    def _slot_generation(self, index: int) -> int:
+        return int.from_bytes(self.slots[index, -4:].tobytes(), "little")
+
+    def _generation_of(self, session_id: str) -> Optional[int]:
+        index = self._find(session_id)
+        return None if index is None else self._slot_generation(index)
+
+    def _live(self) -> Dict[str, int]:
+        return {sid: self._slot_generation(i) for i, sid in self._session_ids()}
+
+    def _read(self, read):
+        """
+        Run ``read`` over the registry without taking its lock
+
+        Writers make the sequence odd while they update slots; a read that
+        overlapped one is retried. A writer that stays mid-update (or died
+        there) is waited for under a shared lock after a few retries.
+        """
+        for _ in range(REGISTRY_READ_RETRIES):
+            before = int(self.sequence)
+            if before % 2:
+                continue
+            try:
+                result = read()
+            except Exception:
+                # A torn slot; only an error if no write overlapped
+                if int(self.sequence) == before:
+                    raise
+                continue
+            if int(self.sequence) == before:
+                return result
+
+        with self.lock.locked(fcntl.LOCK_SH):
+            return read()
+
+    @contextmanager
+    def _writing(self):
+        """Exclusive registry update, announced to lock-free readers"""
+        with self.lock.locked(fcntl.LOCK_EX):
+            # Odd while writing; a writer that died mid-update left it odd
+            sequence = int(self.sequence)
+            sequence += 1 if sequence % 2 == 0 else 2
+            self.sequence[...] = sequence
+            try:
+                yield
+            finally:
+                self.sequence[...] = sequence + 1
+
+    def _attach(
+        self, session_id: str, generation: int, create: bool = False
+    ) -> SharedEEGStreamBuffer:
+        cached = self.attached.get(session_id)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        self._detach(session_id)
+
+        name = self._segment_name(session_id)
+        buffer = SharedEEGStreamBuffer(
+            name,
+            os.path.join(self.lock_dir, f"{name}.lock"),
+            self.max_samples,
+            create=create,
+        )
+        self.attached[session_id] = (generation, buffer)
+        return buffer
+
+    def _detach(self, session_id: str):
+        cached = self.attached.pop(session_id, None)
+        if cached is not None:
+            cached[1].close()
+
+    def _prune(self, live: Dict[str, int]):
+        """Close cached buffers of sessions gone from the registry"""
+        for session_id, (generation, _) in list(self.attached.items()):
+            if live.get(session_id) != generation:
+                self._detach(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self._read(lambda: self._find(session_id)) is not None
+
+    def __getitem__(self, session_id: str) -> SharedEEGStreamBuffer:
+        generation = self._read(lambda: self._generation_of(session_id))
+        if generation is not None:
+            try:
+                return self._attach(session_id, generation)
+            except FileNotFoundError:
+                pass  # Deleted since the lookup
+        self._detach(session_id)
+        raise KeyError(session_id)
+
+    def get(self, session_id: str, default=None):
+        try:
+            return self[session_id]
+        except KeyError:
+            return default
+
+    def create(self, session_id: str) -> SharedEEGStreamBuffer:
+        encoded = session_id.encode("utf-8")
+        if len(encoded) > REGISTRY_ID_SIZE:
+            raise ValueError("Session id too long for shared registry")
+
+        buffer = self.get(session_id)
+        if buffer is not None:
+            return buffer
+
+        with self._writing():
+            index = self._find(session_id)
+            if index is not None:
+                generation = self._slot_generation(index)
+                return self._attach(session_id, generation, create=True)
+
+            free = np.flatnonzero(self.slots[:, 0] == 0)
+            if len(free) == 0:
+                raise RuntimeError("Shared session registry is full")
+            index = int(free[0])
+
+            generation = int(self.generation) + 1
+            self.generation[...] = generation
+            buffer = self._attach(session_id, generation, create=True)
+            # A fresh generation may reuse a segment left by a crashed worker
+            buffer.header["written"] = 0
+            buffer.header["events_written"] = 0
+            buffer.header["last_activity"] = time.time()
+
+            self.slots[index, -4:] = np.frombuffer(
+                generation.to_bytes(4, "little"), np.uint8
+            )
+            self.slots[index, 1 : 1 + len(encoded)] = np.frombuffer(encoded, np.uint8)
+            self.slots[index, 0] = len(encoded)
+            return buffer
+
+    def get_or_create(self, session_id: str) -> SharedEEGStreamBuffer:
+        return self.create(session_id)
+
+    def __delitem__(self, session_id: str):
+        with self._writing():
+            index = self._find(session_id)
+            if index is None:
+                raise KeyError(session_id)
+            generation = self._slot_generation(index)
+            self.slots[index, 0] = 0
+            # Unlinked under the lock so a concurrent create starts fresh
+            try:
+                self._attach(session_id, generation).unlink()
+            except FileNotFoundError:
+                pass
+        self._detach(session_id)
+
+    def __len__(self) -> int:
+        return self._read(lambda: int(np.count_nonzero(self.slots[:, 0])))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._read(self._live)))
+
+    def keys(self) -> List[str]:
+        return list(self)
+
+    def values(self) -> List[SharedEEGStreamBuffer]:
+        return [buffer for _, buffer in self.items()]
+
+    def items(self) -> List[Tuple[str, SharedEEGStreamBuffer]]:
+        live = self._read(self._live)
+        self._prune(live)
+        items = []
+        for session_id, generation in live.items():
+            try:
+                items.append((session_id, self._attach(session_id, generation)))
+            except FileNotFoundError:
+                continue  # Deleted since the listing
+        return items
+
+    def close(self):
+        """Detach this worker; segments stay for the other workers"""
+        for _, buffer in self.attached.values():
+            buffer.close()
+        self.attached = {}
+        self.slots = self.generation = self.sequence = None
+        self.registry_shm.close()
+        self.lock.close()
+
+
+class SessionManager:
+    """
+    Lifecycle policy on top of a session store
+
+    Buffers idle for longer than ``idle_ttl`` seconds are evicted by a
+    periodic sweep, and the least recently active buffers are evicted when
+    all sessions together exceed ``max_bytes`` (checked on every sweep and
+    session creation). With ``spill_dir`` set, an evicted buffer's window is
+    saved there first and restored the next time the session is used.
+    Callables in ``eviction_hooks`` get each session id and buffer just
+    before it is evicted. Exposes the same dict-like API as the stores.
+    """
+
+    def __init__(
+        self,
+        store,
+        idle_ttl: float = 900.0,
+        max_bytes: int = 1 << 30,
+        spill_dir: Optional[str] = None,
+        sweep_interval: float = 30.0,
+    ):
+        self.store = store
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.sweep_interval = sweep_interval
+        self.eviction_hooks: List[Callable[[str, Any], None]] = []
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.store or self._is_spilled(session_id)
+
+    def __getitem__(self, session_id: str):
+        buffer = self.store.get(session_id)
+        if buffer is not None:
+            return buffer
+        if self._is_spilled(session_id):
+            return self._rehydrate(session_id)
+        raise KeyError(session_id)
+
+    def get(self, session_id: str, default=None):
+        try:
+            return self[session_id]
+        except KeyError:
+            return default
+
+    def create(self, session_id: str):
+        buffer = self.store.create(session_id)
+        self.enforce_budget(keep=session_id)
+        return buffer
+
+    def get_or_create(self, session_id: str):
+        buffer = self.get(session_id)
+        if buffer is None:
+            buffer = self.create(session_id)
+        return buffer
+
+    def __delitem__(self, session_id: str):
+        spilled = self._discard_spill(session_id)
+        if session_id in self.store:
+            del self.store[session_id]
+        elif not spilled:
+            raise KeyError(session_id)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store)
+
+    def keys(self) -> List[str]:
+        return list(self.store.keys())
+
+    def values(self) -> List:
+        return list(self.store.values())
+
+    def items(self) -> List[Tuple]:
+        return list(self.store.items())
+
+    def total_bytes(self) -> int:
+        return sum(buffer.nbytes for buffer in self.store.values())
+
+    def evict(self, session_id: str, reason: str = "manual") -> bool:
+        """Drop a live buffer, spilling its window to disk first if enabled"""
+        buffer = self.store.get(session_id)
+        if buffer is None:
+            return False
+        for hook in self.eviction_hooks:
+            try:
+                hook(session_id, buffer)
+            except Exception as e:
+                logger.error(f"Eviction hook failed for session {session_id}: {e}")
+        if self.spill_dir and len(buffer):
+            self._spill(session_id, buffer)
+
+        try:
+            del self.store[session_id]
+        except KeyError:
+            # Evicted concurrently by another worker
+            return False
+
+        SESSION_EVICTIONS.inc(1.0, reason)
+        logger.info(f"Evicted session {session_id} ({reason})")
+        return True
+
+    def sweep(self) -> List[str]:
+        """Evict idle sessions, then enforce the byte budget"""
+        now = time.time()
+        evicted = [
+            session_id
+            for session_id, buffer in self.items()
+            if now - buffer.last_activity > self.idle_ttl
+            and self.evict(session_id, "idle")
+        ]
+        return evicted + self.enforce_budget()
+
+    def enforce_budget(self, keep: Optional[str] = None) -> List[str]:
+        """Evict least recently active sessions until under ``max_bytes``"""
+        sessions = sorted(self.items(), key=lambda item: item[1].last_activity)
+        total = sum(buffer.nbytes for _, buffer in sessions)
+        evicted = []
+
+        for session_id, buffer in sessions:
+            if total <= self.max_bytes:
+                break
+            if session_id == keep:
+                continue
+            nbytes = buffer.nbytes
+            if self.evict(session_id, "budget"):
+                total -= nbytes
+                evicted.append(session_id)
+
+        return evicted
+
+    async def run(self):
+        """Sweep every ``sweep_interval`` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Session sweep failed: {e}")
+
+    def close(self):
+        if hasattr(self.store, "close"):
+            self.store.close()
+
+    def _spill_path(self, session_id: str) -> str:
+        digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.npz")
+
+    def _is_spilled(self, session_id: str) -> bool:
+        return bool(self.spill_dir) and os.path.exists(self._spill_path(session_id))
+
+    def _discard_spill(self, session_id: str) -> bool:
+        if not self.spill_dir:
+            return False
+        try:
+            os.remove(self._spill_path(session_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _spill(self, session_id: str, buffer):
+        records, events = buffer_records(buffer)
+        save_window(self._spill_path(session_id), records, events, session_id)
+
+    def _rehydrate(self, session_id: str):
+        buffer = self.create(session_id)
+
+        # Claim the spill file so only one worker restores it
+        path = self._spill_path(session_id)
+        claimed = f"{path}.{os.getpid()}"
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return buffer
+
+        try:
+            _, records, events = load_window(claimed)
+        finally:
+            os.remove(claimed)
+
+        if hasattr(buffer, "records"):
+            buffer.restore(records, events)
+        else:
+            buffer.restore(records_to_samples(records), events)
+
+        SESSION_REHYDRATIONS.inc()
+        logger.info(f"Rehydrated session {session_id} ({len(records)} samples)")
+        return buffer
+
+
+def create_session_store():
+    """
+    Session store from environment
+
+    SAVY_SESSION_STORE=shm shares buffers between all workers on the host
+    (e.g. ``uvicorn --workers N``); the default keeps them in-process.
+    """
+    max_samples = int(os.getenv("SAVY_BUFFER_SAMPLES", "10000"))
+    if os.getenv("SAVY_SESSION_STORE", "local").lower() == "shm":
+        return SharedMemorySessionStore(
+            namespace=os.getenv("SAVY_SHM_NAMESPACE", "savy"),
+            max_sessions=int(os.getenv("SAVY_SHM_MAX_SESSIONS", "4096")),
+            max_samples=max_samples,
+        )
+    return LocalSessionStore(max_samples)
+
+
+def create_session_manager() -> SessionManager:
+    """
+    Session store from environment, wrapped in the lifecycle policy
+
+    SAVY_SESSION_TTL (seconds idle), SAVY_SESSION_MAX_MB (budget across all
+    sessions), SAVY_SESSION_SWEEP (seconds between sweeps) and
+    SAVY_SESSION_SPILL_DIR (unset disables spilling to disk).
+    """
+    return SessionManager(
+        create_session_store(),
+        idle_ttl=float(os.getenv("SAVY_SESSION_TTL", "900")),
+        max_bytes=int(float(os.getenv("SAVY_SESSION_MAX_MB", "1024")) * 2**20),
+        spill_dir=os.getenv("SAVY_SESSION_SPILL_DIR") or None,
+        sweep_interval=float(os.getenv("SAVY_SESSION_SWEEP", "30")),
+    )
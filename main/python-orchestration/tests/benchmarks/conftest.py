@@ -0,0 +1,68 @@
+import asyncio
+import numpy as np
+import pytest
+
+from services.brain_signal_generator import SyntheticEEGSource
+from services.eeg_service import create_eeg_parser, create_eeg_processor
+
+SAMPLING_RATE = 256
+BLOCK_SECONDS = [1, 10, 60]
+CHANNEL_COUNTS = [4, 8]
+
+
+@pytest.fixture(scope="session")
+def frame_cache():
+    return {}
+
+
+@pytest.fixture(params=BLOCK_SECONDS, ids=lambda s: f"{s}s")
+def block_seconds(request):
+    return request.param
+
+
+@pytest.fixture(params=CHANNEL_COUNTS, ids=lambda c: f"{c}ch")
+def num_channels(request):
+    return request.param
+
+
+@pytest.fixture
+def hex_frame(frame_cache, block_seconds, num_channels):
+    """One synthetic frame of the requested size, built once per session"""
+    key = (block_seconds, num_channels)
+    if key not in frame_cache:
+        source = SyntheticEEGSource(
+            num_channels=num_channels,
+            sampling_rate=SAMPLING_RATE,
+            session_id="bench",
+            seed=0,
+            start_timestamp=0.0,
+        )
+        frame_cache[key] = source.next_frame(block_seconds * SAMPLING_RATE).hex()
+    return frame_cache[key]
+
+
+@pytest.fixture
+def parsed_block(hex_frame, processor):
+    samples, events = create_eeg_parser().hex_to_samples(hex_frame)
+    return processor.preprocess_samples(samples), events
+
+
+@pytest.fixture
+def sample_matrix(hex_frame, num_channels):
+    """Data section of the frame as a (n_samples, n_channels) float32 array"""
+    frame = bytes.fromhex(hex_frame)
+    n = int.from_bytes(frame[7:11], "little")
+    return np.frombuffer(frame, "<f4", n * num_channels, 32).reshape(n, num_channels)
+
+
+@pytest.fixture
+def processor(num_channels):
+    return create_eeg_processor(SAMPLING_RATE, num_channels)
+
+
+@pytest.fixture
+def event_loop_runner():
+    """Run coroutines on one loop so loop setup is not part of the timing"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
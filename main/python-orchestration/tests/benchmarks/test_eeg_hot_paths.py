@@ -0,0 +1,227 @@
+"""
+Benchmarks for the EEG hot paths
+
+Run with timing enabled and compare against the stored JSON baselines, see
+README.md. With the default ``--benchmark-disable`` each case runs once as a
+smoke test.
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from services.eeg_anomaly import FEATURE_NAMES, AnomalyScheduler
+from services.eeg_codec import CODECS, decode_samples, encode_samples
+from services.eeg_filter import FilterBank
+from services.eeg_resample import StreamingResampler
+from services.eeg_spectrogram import SpectrogramBank
+from services.session_store import LocalSessionStore
+from services.eeg_framing import FrameReassembler
+from services.eeg_service import (
+    ChecksumPolicy,
+    EEGChannel,
+    EEGDataParser,
+    EEGStreamBuffer,
+    create_eeg_parser,
+)
+
+
+def test_hex_to_samples(benchmark, hex_frame, num_channels):
+    parser = create_eeg_parser()
+
+    samples, _ = benchmark(parser.hex_to_samples, hex_frame)
+
+    assert len(samples) > 0
+    assert len(samples) % num_channels == 0
+
+
+@pytest.mark.parametrize("policy", list(ChecksumPolicy), ids=lambda p: p.value)
+def test_frame_checksum_policy(benchmark, hex_frame, policy):
+    frame = bytes.fromhex(hex_frame)
+    parser = EEGDataParser(checksum_policy=policy)
+
+    def parse():
+        samples, _ = parser.frame_to_samples(frame)
+        return samples, parser.drain_checksums()
+
+    samples, failures = benchmark(parse)
+
+    assert len(samples) > 0
+    assert failures == 0
+
+
+def test_reassemble_chunked_frame(benchmark, hex_frame):
+    frame = bytes.fromhex(hex_frame)
+    chunks = [frame[i : i + 1460] for i in range(0, len(frame), 1460)]
+    reassembler = FrameReassembler()
+
+    def feed():
+        return [f for chunk in chunks for f in reassembler.feed(chunk)]
+
+    frames = benchmark(feed)
+
+    assert frames == [frame]
+
+
+def test_prepare_stream_data(benchmark, processor, parsed_block):
+    samples, events = parsed_block
+
+    result = benchmark(processor.prepare_stream_data, samples, events)
+
+    assert result["stats"]["total_samples"] == len(samples)
+
+
+def test_detect_spikes(benchmark, processor, parsed_block):
+    samples, _ = parsed_block
+
+    spikes = benchmark(processor.detect_spikes, samples, EEGChannel.FP1)
+
+    assert all(e.event_type == "spike" for e in spikes)
+
+
+def test_detect_stress_level(benchmark, processor, parsed_block):
+    samples, _ = parsed_block
+
+    level = benchmark(processor.detect_stress_level, samples)
+
+    assert level in ("low", "medium", "high")
+
+
+def test_signal_quality(benchmark, processor, parsed_block):
+    samples, _ = parsed_block
+
+    quality = benchmark(processor.signal_quality, samples)
+
+    assert len(quality) == processor.num_channels
+    assert all(0 <= q["score"] <= 1 for q in quality.values())
+
+
+def test_get_spectral_data(benchmark, processor, parsed_block):
+    samples, _ = parsed_block
+
+    spectral = benchmark(processor.get_spectral_data, samples, EEGChannel.FP1)
+
+    assert len(spectral["frequencies"]) == len(spectral["power"])
+
+
+def test_get_coherence(benchmark, processor, parsed_block):
+    samples, _ = parsed_block
+
+    coherence = benchmark(processor.get_coherence, samples)
+
+    assert len(coherence["channels"]) == processor.num_channels
+    assert all(
+        np.allclose(np.diagonal(matrix), 1) for matrix in coherence["bands"].values()
+    )
+
+
+def test_wavelet_transform(benchmark, processor, parsed_block):
+    samples, _ = parsed_block
+
+    results = benchmark(processor.wavelet_transform, samples, max_times=1000)
+
+    assert len(results) == processor.num_channels
+    assert all(r.magnitudes.shape[0] == len(r.frequencies) for r in results.values())
+
+
+def test_filter_samples(benchmark, processor, parsed_block):
+    samples, _ = parsed_block
+    bank = FilterBank()
+
+    filtered = benchmark(
+        lambda: processor.filter_samples(
+            samples, bank.create(processor.sampling_rate, processor.num_channels)
+        )
+    )
+
+    assert len(filtered) == len(samples)
+
+
+def test_update_spectrogram(benchmark, processor, parsed_block):
+    samples, _ = parsed_block
+    bank = SpectrogramBank()
+
+    added = benchmark(
+        lambda: processor.update_spectrogram(
+            samples,
+            bank.create("bench", processor.sampling_rate, processor.num_channels),
+        )
+    )
+
+    assert added == len(bank.peek("bench"))
+
+
+@pytest.mark.parametrize("from_rate", [250, 500, 1000])
+def test_resample_block(benchmark, num_channels, block_seconds, from_rate):
+    block = np.random.default_rng(0).standard_normal(
+        (block_seconds * from_rate, num_channels)
+    )
+
+    resampled, _ = benchmark(
+        lambda: StreamingResampler(from_rate, 256, num_channels).process(block)
+    )
+
+    assert abs(len(resampled) - block_seconds * 256) <= 16
+
+
+def test_buffer_add_data(benchmark, event_loop_runner, parsed_block):
+    samples, events = parsed_block
+
+    def add_data():
+        buffer = EEGStreamBuffer()
+        event_loop_runner(buffer.add_data(samples, events))
+        return buffer
+
+    buffer = benchmark(add_data)
+
+    assert len(buffer.samples) == min(len(samples), buffer.max_samples)
+
+
+def test_buffer_get_window(benchmark, event_loop_runner, parsed_block):
+    samples, events = parsed_block
+    buffer = EEGStreamBuffer(max_samples=len(samples))
+    event_loop_runner(buffer.add_data(samples, events))
+
+    window, _ = benchmark(lambda: event_loop_runner(buffer.get_window(10.0)))
+
+    assert 0 < len(window) <= len(samples)
+
+
+def test_anomaly_tick(benchmark, event_loop_runner, parsed_block):
+    samples, events = parsed_block
+    sessions = LocalSessionStore()
+    for i in range(50):
+        event_loop_runner(sessions.create(f"session-{i}").add_data(samples, events))
+
+    async def emit(session_id, anomalies):
+        pass
+
+    model = IsolationForest(random_state=0).fit(
+        np.random.default_rng(0).standard_normal((512, len(FEATURE_NAMES)))
+    )
+    scheduler = AnomalyScheduler(sessions, emit, deadline=60.0, model=model)
+
+    def tick():
+        scheduler.scored_until.clear()
+        scheduler.last_anomaly.clear()
+        return event_loop_runner(scheduler.tick())
+
+    emitted = benchmark(tick)
+
+    assert 0 <= emitted <= 50 * len({s.channel for s in samples})
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_codec_encode(benchmark, sample_matrix, codec):
+    blob = benchmark(encode_samples, sample_matrix, codec)
+
+    assert len(blob) <= sample_matrix.nbytes + 12 + sample_matrix.shape[1]
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_codec_decode(benchmark, sample_matrix, codec):
+    blob = encode_samples(sample_matrix, codec)
+
+    decoded = benchmark(decode_samples, blob)
+
+    assert np.array_equal(decoded.view(np.uint32), sample_matrix.view(np.uint32))
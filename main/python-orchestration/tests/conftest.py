@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def split_blocks():
+    """Cut an array into consecutive blocks of random length along axis 0"""
+
+    def split(data: np.ndarray, seed: int = 0, max_block: int = 300):
+        rng = np.random.default_rng(seed)
+        cuts, at = [], 0
+        while at < len(data):
+            at += int(rng.integers(1, max_block))
+            cuts.append(min(at, len(data)))
+        return np.split(data, cuts[:-1])
+
+    return split
+
+
+@pytest.fixture
+def recording():
+    """Ten seconds of 4-channel noise plus alpha and mains at 256 Hz"""
+    rng = np.random.default_rng(1)
+    t = np.arange(2560) / 256
+    waves = 20 * np.sin(2 * np.pi * 10 * t) + 5 * np.sin(2 * np.pi * 50 * t)
+    return 30 + waves[:, None] + rng.normal(0, 10, (len(t), 4))
+
+
+class FakeIPFS:
+    """In-memory stand-in for IPFSStorageService's block and DAG calls"""
+
+    def __init__(self):
+        self.blocks = {}
+        self.cat_calls = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def _put(self, value) -> str:
+        cid = f"cid{len(self.blocks)}"
+        self.blocks[cid] = value
+        return cid
+
+    async def add_bytes(self, data: bytes, pin: bool = True) -> str:
+        return self._put(bytes(data))
+
+    async def cat(self, cid: str) -> bytes:
+        self.cat_calls += 1
+        return self.blocks[cid]
+
+    async def dag_put(self, data, pin: bool = True) -> str:
+        return self._put(json.loads(json.dumps(data)))
+
+    async def dag_get(self, cid: str):
+        return self.blocks[cid]
+
+
+@pytest.fixture
+def fake_ipfs():
+    return FakeIPFS()
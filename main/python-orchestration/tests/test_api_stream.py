@@ -0,0 +1,86 @@
+import json
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app, manager
+from services.brain_signal_generator import build_frame
+
+SESSION = "ws-session"
+
+
+def frame(block: int) -> bytes:
+    data = np.random.default_rng(block).normal(0, 20, (256, 4))
+    return build_frame(data, 256, start_timestamp=float(block), session_id=SESSION)
+
+
+def produce(producer, block: int) -> dict:
+    producer.send_text(json.dumps({"hex_data": frame(block).hex()}))
+    return producer.receive_json()
+
+
+def wait_for_viewers(count: int):
+    deadline = time.monotonic() + 2.0
+    while manager.viewer_count(SESSION) != count:
+        assert time.monotonic() < deadline, manager.viewer_count(SESSION)
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("SAVY_SESSION_STORE", "local")
+    with TestClient(app) as client:
+        yield client
+
+
+def test_viewers_get_a_snapshot_then_every_block(client):
+    url = f"/ws/eeg/stream/{SESSION}"
+    with client.websocket_connect(f"{url}?role=producer") as producer:
+        ack = produce(producer, 0)
+        assert ack["type"] == "ack"
+        assert (ack["frames"], ack["rejected"], ack["viewers"]) == (1, 0, 0)
+        assert ack["samples"] == 256 * 4
+
+        with client.websocket_connect(
+            f"{url}?role=viewer"
+        ) as first, client.websocket_connect(
+            f"{url}?role=viewer&max_points=64"
+        ) as second:
+            for viewer, points in ((first, 256), (second, 64)):
+                snapshot = viewer.receive_json()
+                assert snapshot["type"] == "snapshot"
+                channels = snapshot["data"]["channels"]
+                assert len(channels) == 4
+                assert all(len(c) == points for c in channels.values())
+            wait_for_viewers(2)
+
+            for block in (1, 2):
+                assert produce(producer, block)["viewers"] == 2
+                for viewer in (first, second):
+                    message = viewer.receive_json()
+                    assert message["type"] == "data"
+                    timestamps = [
+                        point["timestamp"]
+                        for point in message["data"]["channels"]["fp1"]
+                    ]
+                    assert block <= min(timestamps) and max(timestamps) < block + 1
+
+        # Closed viewers are dropped from the fan-out
+        wait_for_viewers(0)
+        assert produce(producer, 3)["viewers"] == 0
+
+    assert SESSION not in manager.producers
+    assert SESSION not in manager.active_connections
+
+
+def test_viewers_are_not_producers(client):
+    url = f"/ws/eeg/stream/{SESSION}-solo"
+    with client.websocket_connect(f"{url}?role=viewer") as viewer:
+        # Text from a viewer is read and ignored, never parsed as data
+        viewer.send_text(json.dumps({"hex_data": frame(0).hex()}))
+        with client.websocket_connect(f"{url}?role=producer") as producer:
+            ack = produce(producer, 0)
+            assert ack["viewers"] == 1 and ack["samples"] == 256 * 4
+            assert viewer.receive_json()["type"] == "data"
@@ -0,0 +1,233 @@
+import asyncio
+import os
+import time
+
+import numpy as np
+import pytest
+
+from services import session_store
+from services.eeg_archive import (
+    RangeTooLongError,
+    SessionArchiver,
+    read_overview,
+    read_range,
+)
+from services.eeg_service import EEGChannel, EEGEvent, EEGSample
+from services.session_store import LocalSessionStore, SessionManager
+
+FS = 64
+CHANNELS = list(EEGChannel)[:2]
+
+
+def samples(first: int, count: int):
+    return [
+        EEGSample(timestamp=index / FS, channel=channel, value=float(index + c))
+        for index in range(first, first + count)
+        for c, channel in enumerate(CHANNELS)
+    ]
+
+
+@pytest.fixture
+def sessions():
+    return SessionManager(LocalSessionStore(max_samples=100000))
+
+
+@pytest.fixture
+def archiver(sessions, fake_ipfs, tmp_path):
+    return SessionArchiver(
+        sessions, fake_ipfs, chunk_seconds=1.0, archive_dir=str(tmp_path)
+    )
+
+
+async def upload(archiver: SessionArchiver):
+    """Run the uploaders until everything queued is in IPFS"""
+    workers = [asyncio.create_task(archiver._upload_loop()) for _ in range(2)]
+    await archiver.queue.join()
+    for worker in workers:
+        worker.cancel()
+
+
+async def test_only_the_tail_past_the_cursor_is_converted(
+    sessions, archiver, monkeypatch
+):
+    buffer = sessions.create("s1")
+    await buffer.add_data(samples(0, 4 * FS), [])
+    await archiver.seal("s1", buffer)
+
+    converted = []
+    convert = session_store.samples_to_records
+    monkeypatch.setattr(
+        session_store,
+        "samples_to_records",
+        lambda s: converted.append(len(s)) or convert(s),
+    )
+    await buffer.add_data(samples(4 * FS, FS), [])
+    assert await archiver.seal("s1", buffer) == 1
+
+    # From the cursor at 3 s on, plus the record just before it
+    assert converted == [2 * FS * len(CHANNELS) + 1]
+
+
+async def test_late_events_go_out_with_the_next_chunk(sessions, archiver):
+    buffer = sessions.create("s1")
+    await buffer.add_data(samples(0, 2 * FS), [])
+    await archiver.seal("s1", buffer)
+
+    late = EEGEvent(timestamp=0.5, event_type="anomaly", channel=CHANNELS[1])
+    await buffer.add_data(samples(2 * FS, FS), [late])
+    await archiver.seal("s1", buffer)
+    await buffer.add_data(samples(3 * FS, FS), [])
+    await archiver.seal("s1", buffer)
+    await upload(archiver)
+
+    manifest = archiver.get_manifest("s1")
+    window = await read_range(archiver.ipfs, manifest["manifest_cid"], 0.0, 1.0)
+    assert window.events == [late]
+    assert len(window.records) == FS * len(CHANNELS)
+    carriers = [c for c in manifest["chunks"] if c["start"] == 0.5]
+    assert len(carriers) == 1 and carriers[0]["end"] == 2.0
+
+
+async def test_forced_seal_archives_late_events_without_samples(sessions, archiver):
+    buffer = sessions.create("s1")
+    await buffer.add_data(samples(0, 2 * FS), [])
+    await archiver.seal("s1", buffer, force=True)
+
+    late = EEGEvent(timestamp=1.25, event_type="anomaly")
+    await buffer.add_data([], [late])
+    assert await archiver.seal("s1", buffer) == 0
+    assert await archiver.seal("s1", buffer, force=True) == 1
+    assert await archiver.seal("s1", buffer, force=True) == 0
+    await upload(archiver)
+
+    manifest = archiver.get_manifest("s1")
+    window = await read_range(archiver.ipfs, manifest["manifest_cid"], 1.0, 2.0)
+    assert window.events == [late]
+    assert sum(c["samples"] for c in manifest["chunks"]) == 2 * FS * len(CHANNELS)
+
+
+async def test_flushed_cursor_is_dropped_after_upload(sessions, archiver):
+    buffer = sessions.create("s1")
+    await buffer.add_data(samples(0, 3 * FS + 5), [])
+
+    await archiver.flush("s1")
+    assert "s1" in archiver.cursors
+
+    await upload(archiver)
+    assert "s1" not in archiver.cursors
+
+    manifest = archiver.get_manifest("s1")
+    assert manifest["chunks"][-1]["end"] > 3.0
+    assert sum(c["samples"] for c in manifest["chunks"]) == (3 * FS + 5) * 2
+
+
+async def test_concurrent_seals_of_a_session_do_not_overlap(sessions, archiver):
+    buffer = sessions.create("s1")
+    await buffer.add_data(samples(0, 4 * FS + 7), [])
+
+    queued = await asyncio.gather(
+        *(archiver.seal("s1", buffer, force=True) for _ in range(3))
+    )
+    await upload(archiver)
+
+    assert sorted(queued) == [0, 0, 5]
+    chunks = archiver.get_manifest("s1")["chunks"]
+    assert sum(c["samples"] for c in chunks) == (4 * FS + 7) * len(CHANNELS)
+
+
+async def test_stopped_session_is_sealed_by_the_leader(sessions, fake_ipfs, tmp_path):
+    lock_path = str(tmp_path / "archiver.lock")
+    leader, other = (
+        SessionArchiver(
+            sessions,
+            fake_ipfs,
+            chunk_seconds=1.0,
+            archive_dir=str(tmp_path),
+            lock_path=lock_path,
+        )
+        for _ in range(2)
+    )
+    assert leader._is_leader() and not other._is_leader()
+    buffer = sessions.create("s1")
+    await buffer.add_data(samples(0, 2 * FS + 9), [])
+
+    # As the stop endpoint does on a non-leader: hand off, then delete
+    assert other.hand_off("s1")
+    del sessions["s1"]
+    assert not other.hand_off("s1")
+
+    await leader.seal_all()
+    await upload(leader)
+    assert os.listdir(leader.handoff_dir) == []
+    assert "s1" not in leader.cursors
+    chunks = leader.get_manifest("s1")["chunks"]
+    assert sum(c["samples"] for c in chunks) == (2 * FS + 9) * len(CHANNELS)
+    leader._release_leader()
+
+
+async def test_evicted_session_is_sealed_before_it_is_dropped(archiver, tmp_path):
+    sessions = archiver.sessions
+    sessions.idle_ttl = 60.0
+    buffer = sessions.create("s1")
+    await buffer.add_data(samples(0, FS + 3), [])
+    await archiver.seal("s1", buffer)
+    buffer.last_activity = time.time() - 120
+
+    assert sessions.sweep() == ["s1"]
+    await archiver.seal_all()
+    await upload(archiver)
+
+    assert "s1" not in archiver.cursors
+    chunks = archiver.get_manifest("s1")["chunks"]
+    assert sum(c["samples"] for c in chunks) == (FS + 3) * len(CHANNELS)
+
+
+async def test_raw_overview_is_held_to_the_range_cap(sessions, archiver):
+    buffer = sessions.create("s1")
+    await buffer.add_data(samples(0, 3 * FS), [])
+    await archiver.flush("s1")
+    await upload(archiver)
+    manifest_cid = archiver.get_manifest("s1")["manifest_cid"]
+
+    overview = await read_overview(
+        archiver.ipfs, manifest_cid, 0.0, 2.0, 100000, max_range_seconds=2.0
+    )
+    assert overview.level == 0
+    with pytest.raises(RangeTooLongError):
+        await read_overview(
+            archiver.ipfs, manifest_cid, 0.0, 2.0, 100000, max_range_seconds=1.0
+        )
+
+
+async def test_sealed_session_reads_back_by_range_and_overview(sessions, archiver):
+    buffer = sessions.create("s1")
+    await buffer.add_data(samples(0, 8 * FS), [])
+    await archiver.flush("s1")
+    await upload(archiver)
+
+    manifest = archiver.get_manifest("s1")
+    spans = [(c["start"], c["end"]) for c in manifest["chunks"]]
+    assert [start for start, _ in spans] == [float(s) for s in range(8)]
+    assert all(end == next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+
+    fetched = archiver.ipfs.cat_calls
+    window = await read_range(archiver.ipfs, manifest["manifest_cid"], 2.5, 4.25)
+    assert window.chunks == 3 and archiver.ipfs.cat_calls - fetched == 3
+    first, last = int(2.5 * FS), int(4.25 * FS)
+    assert window.records["timestamp"].tolist() == [
+        i / FS for i in range(first, last) for _ in CHANNELS
+    ]
+    assert window.records["value"].tolist() == [
+        float(i + c) for i in range(first, last) for c in range(len(CHANNELS))
+    ]
+
+    # One-second bins: each holds 64 consecutive values
+    overview = await read_overview(archiver.ipfs, manifest["manifest_cid"], 0, 8, 16)
+    assert (overview.level, overview.bin_seconds) == (2, 1.0)
+    for c, channel in enumerate(CHANNELS):
+        bins = overview.channels[channel.value]
+        first_values = np.arange(8) * FS + c
+        assert bins["timestamps"].tolist() == list(range(8))
+        np.testing.assert_array_equal(bins["min"], first_values)
+        np.testing.assert_array_equal(bins["max"], first_values + FS - 1)
+        np.testing.assert_allclose(bins["mean"], first_values + (FS - 1) / 2)
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from services.brain_signal_generator import build_frame
+from services.eeg_codec import (
+    CODECS,
+    CODEC_RAW,
+    block_codec,
+    decode_frame,
+    decode_samples,
+    encode_frame,
+    encode_samples,
+)
+
+
+def bits(data: np.ndarray) -> np.ndarray:
+    return np.asarray(data, "<f4").view(np.uint32)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_samples_round_trip_bit_exact(codec, recording):
+    data = recording.astype(np.float32)
+
+    blob = encode_samples(data, codec)
+
+    assert block_codec(blob) == codec
+    np.testing.assert_array_equal(bits(decode_samples(blob)), bits(data))
+    if codec != CODEC_RAW:
+        assert len(blob) < data.nbytes
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_special_floats_round_trip(codec):
+    data = np.array(
+        [[np.nan, 1.0], [np.inf, -0.0], [-np.inf, 0.0], [1e-45, -3.5]], np.float32
+    )
+    # A NaN with payload bits set must keep them
+    data.view(np.uint32)[1, 0] = 0x7FC00123
+
+    decoded = decode_samples(encode_samples(data, codec))
+
+    np.testing.assert_array_equal(bits(decoded), bits(data))
+
+
+@pytest.mark.parametrize("codec", CODECS)
+@pytest.mark.parametrize("shape", [(0, 4), (0,), (16, 0)])
+def test_empty_blocks_round_trip(codec, shape):
+    decoded = decode_samples(encode_samples(np.zeros(shape, np.float32), codec))
+
+    assert decoded.shape == (shape + (1,))[:2]
+    assert decoded.dtype == np.float32
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        encode_samples(np.zeros((4, 1)), "lz4")
+    with pytest.raises(ValueError):
+        decode_samples(b"nope" + bytes(16))
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_frame_round_trip_keeps_checksum_bytes(codec, recording):
+    frame = build_frame(recording[:512], 256, start_timestamp=5.0, session_id="s1")
+
+    blob = encode_frame(frame, codec)
+
+    assert block_codec(blob) == codec
+    assert decode_frame(blob) == frame
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_float64_blocks_round_trip(codec):
+    timestamps = 1.7e9 + np.arange(1000) / 256 + np.array([0.0, -0.0] * 500)
+
+    decoded = decode_samples(encode_samples(timestamps, codec, dtype="<f8"))
+
+    assert decoded.dtype == np.float64 and decoded.shape == (1000, 1)
+    np.testing.assert_array_equal(decoded[:, 0].view("<u8"), timestamps.view("<u8"))
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_payload_larger_than_declared_is_rejected(codec, recording):
+    blob = bytearray(encode_samples(recording.astype(np.float32), codec))
+    # Declare 16 samples over a payload holding thousands
+    blob[8:12] = (16).to_bytes(4, "little")
+
+    with pytest.raises(ValueError):
+        decode_samples(bytes(blob))
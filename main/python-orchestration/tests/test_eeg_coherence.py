@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from services.eeg_coherence import CoherenceBank, StreamingCoherence
+from services.eeg_spectral import magnitude_squared_coherence
+
+BANDS = {"alpha": (8, 13), "beta": (13, 30)}
+
+
+@pytest.mark.parametrize("nperseg", [256, 100])
+@pytest.mark.parametrize("seed", range(3))
+def test_blocks_without_fading_match_scipy_csd(recording, split_blocks, nperseg, seed):
+    state = StreamingCoherence(256, 4, nperseg=nperseg, memory_seconds=None)
+    timestamps = np.arange(len(recording)) / 256
+
+    for block, times in zip(
+        split_blocks(recording, seed), split_blocks(timestamps, seed)
+    ):
+        state.process(block, times)
+
+    csd = state.csd()
+    for i in range(4):
+        for j in range(4):
+            _, expected = signal.csd(
+                recording[:, i], recording[:, j], 256, nperseg=nperseg
+            )
+            assert np.allclose(csd[i, j], expected)
+
+    _, expected = signal.coherence(
+        recording[:, 1], recording[:, 3], 256, nperseg=nperseg
+    )
+    assert np.allclose(magnitude_squared_coherence(csd)[1, 3], expected)
+
+
+def test_fading_forgets_old_coherence():
+    rng = np.random.default_rng(0)
+    shared = rng.normal(size=(256 * 20, 1))
+    coupled = np.hstack([shared, shared + 0.1 * rng.normal(size=shared.shape)])
+    independent = rng.normal(size=(256 * 60, 2))
+    timestamps = np.arange(len(coupled) + len(independent)) / 256
+
+    state = StreamingCoherence(256, 2, nperseg=256, memory_seconds=5.0)
+    state.process(coupled, timestamps[: len(coupled)])
+    assert state.coherence(BANDS)["alpha"][0, 1] > 0.9
+
+    state.process(independent, timestamps[len(coupled) :])
+    assert state.coherence(BANDS)["alpha"][0, 1] < 0.2
+
+
+def test_repeated_samples_are_skipped(recording):
+    timestamps = np.arange(len(recording)) / 256
+    once = StreamingCoherence(256, 4, memory_seconds=None)
+    overlapped = StreamingCoherence(256, 4, memory_seconds=None)
+
+    once.process(recording, timestamps)
+    overlapped.process(recording[:2000], timestamps[:2000])
+    overlapped.process(recording[1500:], timestamps[1500:])
+
+    assert overlapped.segments == once.segments
+    assert np.allclose(overlapped.csd(), once.csd())
+
+
+def test_bank_sizes_segments_from_rate():
+    bank = CoherenceBank(window_seconds=0.5, memory_seconds=None, max_sessions=1)
+
+    state = bank.create("a", 512, 8)
+    bank.create("b", 512, 8)
+
+    assert state.nperseg == 256 and state.memory_seconds is None
+    assert bank.peek("a") is None and len(bank) == 1
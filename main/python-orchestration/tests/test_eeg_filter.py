@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from services.eeg_filter import FilterBank, StreamingFilter, design_filter_bank
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_blocks_match_filtering_the_whole_signal(recording, split_blocks, seed):
+    sos = design_filter_bank(256)
+    stream_filter = StreamingFilter(sos, recording.shape[1])
+
+    streamed = np.concatenate(
+        [stream_filter.process(block) for block in split_blocks(recording, seed)]
+    )
+
+    zi = signal.sosfilt_zi(sos)[:, :, None] * recording[0]
+    expected, _ = signal.sosfilt(sos, recording, axis=0, zi=zi)
+    assert np.allclose(streamed, expected, atol=1e-9)
+
+
+def test_channels_filtered_one_at_a_time_match(recording, split_blocks):
+    sos = design_filter_bank(256)
+    whole = StreamingFilter(sos, 4).process(recording)
+    stream_filter = StreamingFilter(sos, 4)
+
+    for channel in range(4):
+        streamed = np.concatenate(
+            [
+                stream_filter.process_channel(channel, block)
+                for block in split_blocks(recording[:, channel], seed=channel)
+            ]
+        )
+        assert np.allclose(streamed, whole[:, channel], atol=1e-9)
+
+
+def test_low_rates_drop_cutoffs_above_nyquist():
+    sos = design_filter_bank(64, high_cutoff=40.0, notch_freq=50.0)
+
+    assert len(sos) == 2
+    assert np.all(np.abs(signal.sos2zpk(sos)[1]) < 1)
+
+
+def test_bank_restarts_state_on_layout_change():
+    bank = FilterBank()
+
+    first = bank.get("s1", 256, 4)
+    assert bank.get("s1", 256, 4) is first
+    assert bank.get("s1", 512, 4) is not first
+    assert len(bank) == 1
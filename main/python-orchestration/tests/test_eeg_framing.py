@@ -0,0 +1,73 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from services.brain_signal_generator import build_frame
+from services.eeg_framing import FOOTER_SIZE, FrameReassembler
+
+
+def make_frame(samples: int, seed: int = 0, magic: bytes = b"SAVY") -> bytes:
+    data = np.random.default_rng(seed).normal(0, 20, (samples, 4))
+    frame = build_frame(data, 256, session_id="s1", events=[])
+    body = magic + frame[4:-FOOTER_SIZE]
+    return body + hashlib.sha1(body).digest()[:FOOTER_SIZE]
+
+
+@pytest.fixture
+def frames():
+    return [make_frame(samples, seed) for seed, samples in enumerate((64, 1, 300))]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 32, 1460, 1 << 20])
+def test_split_and_coalesced_frames(frames, chunk_size):
+    stream = b"".join(frames)
+    reassembler = FrameReassembler(initial_capacity=16)
+
+    out = []
+    for i in range(0, len(stream), chunk_size):
+        out.extend(reassembler.feed(stream[i : i + chunk_size]))
+
+    assert out == frames
+    assert len(reassembler) == 0
+    assert reassembler.dropped_bytes == 0
+
+
+def test_hex_chunks_may_split_a_byte(frames):
+    text = frames[0].hex()
+    reassembler = FrameReassembler()
+
+    out = reassembler.feed_hex(text[:33]) + reassembler.feed_hex(text[33:])
+
+    assert out == frames[:1]
+
+
+def test_frames_need_no_magic():
+    frame = make_frame(128, magic=b"ABCD")
+
+    assert FrameReassembler().feed(frame + frame) == [frame, frame]
+
+
+def test_resync_skips_garbage_between_frames(frames):
+    garbage = b"\xff" * 100 + b"\x00" * 40
+    reassembler = FrameReassembler()
+
+    out = reassembler.feed(garbage + frames[0] + garbage[:3] + frames[2])
+
+    assert out == [frames[0], frames[2]]
+    assert reassembler.dropped_bytes == len(garbage) + 3
+
+
+def test_oversized_declared_frame_is_skipped(frames):
+    reassembler = FrameReassembler(max_frame_bytes=len(frames[0]))
+
+    assert reassembler.feed(frames[2] + frames[0]) == [frames[0]]
+    assert reassembler.dropped_bytes == len(frames[2])
+
+
+def test_magic_when_configured(frames):
+    other = make_frame(16, magic=b"ABCD")
+    reassembler = FrameReassembler(magic=b"SAVY")
+
+    assert reassembler.feed(other + frames[0]) == [frames[0]]
+    assert reassembler.dropped_bytes == len(other)
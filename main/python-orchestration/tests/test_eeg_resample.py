@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from services.eeg_resample import (
+    ResamplerBank,
+    StreamingResampler,
+    create_resampler_bank,
+)
+from services.eeg_service import EEGChannel, EEGDataProcessor, EEGSample
+
+
+@pytest.mark.parametrize(
+    "from_rate, to_rate", [(256, 128), (250, 256), (500, 256), (128, 256)]
+)
+@pytest.mark.parametrize("seed", range(3))
+def test_blocks_match_resample_poly(recording, split_blocks, from_rate, to_rate, seed):
+    resampler = StreamingResampler(from_rate, to_rate, recording.shape[1])
+
+    results = [resampler.process(block) for block in split_blocks(recording, seed)]
+    streamed = np.concatenate([values for values, _ in results])
+    positions = np.concatenate([at for _, at in results])
+
+    expected = signal.resample_poly(
+        recording, resampler.up, resampler.down, axis=0, padtype="edge"
+    )
+    # Outputs reaching past the last input (half a filter) are held back
+    assert len(expected) - len(streamed) <= resampler.half_len // resampler.down + 1
+    assert np.allclose(streamed, expected[: len(streamed)], atol=1e-9)
+    assert np.allclose(positions, np.arange(len(streamed)) * from_rate / to_rate)
+
+
+@pytest.mark.parametrize("from_rate, to_rate", [(256, 128), (250, 256), (500, 256)])
+def test_flushed_stream_matches_resample_poly(
+    recording, split_blocks, from_rate, to_rate
+):
+    resampler = StreamingResampler(from_rate, to_rate, recording.shape[1])
+
+    results = [resampler.process(block) for block in split_blocks(recording, 0)]
+    results.append(resampler.flush())
+    streamed = np.concatenate([values for values, _ in results])
+    positions = np.concatenate([at for _, at in results])
+
+    expected = signal.resample_poly(
+        recording, resampler.up, resampler.down, axis=0, padtype="edge"
+    )
+    assert streamed.shape == expected.shape
+    assert np.allclose(streamed, expected, atol=1e-9)
+    assert np.allclose(positions, np.arange(len(streamed)) * from_rate / to_rate)
+
+
+def test_one_off_block_is_resampled_to_its_end():
+    channels = list(EEGChannel)[:2]
+    samples = [
+        EEGSample(timestamp=i / 500, channel=channel, value=float(i))
+        for i in range(100)
+        for channel in channels
+    ]
+    processor = EEGDataProcessor(sampling_rate=500, num_channels=2)
+
+    held = processor.resample_samples(samples, StreamingResampler(500, 256, 2))
+    final = processor.resample_samples(
+        samples, StreamingResampler(500, 256, 2), final=True
+    )
+
+    assert len(held) < len(final) == 2 * 52
+    assert final[: len(held)] == held
+    assert final[-1].timestamp == pytest.approx(51 / 256)
+
+
+def test_same_rate_passes_through(recording):
+    resampler = StreamingResampler(256, 256, recording.shape[1])
+
+    values, positions = resampler.process(recording)
+
+    assert np.array_equal(values, recording)
+    assert np.array_equal(positions, np.arange(len(recording)))
+
+
+def test_bank_creates_per_session_resamplers():
+    bank = ResamplerBank(256)
+
+    first = bank.get("s1", 500, 4)
+    assert bank.get("s1", 500, 4) is first
+    assert bank.get("s1", 250, 4) is not first
+    assert bank.create(256, 4).passthrough
+
+
+def test_bank_size_has_its_own_setting(monkeypatch):
+    monkeypatch.setenv("SAVY_ANALYSIS_RATE", "256")
+    monkeypatch.setenv("SAVY_STREAM_FILTER_SESSIONS", "8")
+    monkeypatch.setenv("SAVY_RESAMPLER_SESSIONS", "2")
+
+    bank = create_resampler_bank()
+    for session_id in ("s1", "s2", "s3"):
+        bank.get(session_id, 500, 4)
+
+    assert bank.max_sessions == 2 and list(bank.resamplers) == ["s2", "s3"]
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+from services.brain_signal_generator import build_frame
+from services.eeg_service import (
+    ChecksumError,
+    ChecksumPolicy,
+    EEGChannel,
+    EEGDataParser,
+    EEGEvent,
+    EEGSample,
+    EEGStreamBuffer,
+    create_eeg_parser,
+    lttb_downsample,
+    minmax_downsample,
+)
+
+
+@pytest.fixture
+def frame():
+    data = np.random.default_rng(0).normal(0, 20, (256, 4))
+    return build_frame(data, 256, start_timestamp=100.0, session_id="s1")
+
+
+def corrupt(frame: bytes) -> bytes:
+    damaged = bytearray(frame)
+    damaged[-1] ^= 0xFF
+    return bytes(damaged)
+
+
+def test_strict_policy_raises_on_bad_footer(frame):
+    parser = EEGDataParser(checksum_policy=ChecksumPolicy.STRICT)
+
+    samples, _ = parser.frame_to_samples(frame)
+    assert len(samples) == 256 * 4
+
+    with pytest.raises(ChecksumError):
+        parser.frame_to_samples(corrupt(frame))
+    with pytest.raises(ChecksumError):
+        parser.hex_to_samples(corrupt(frame).hex())
+
+
+def test_default_policy_keeps_bad_footer(frame, monkeypatch):
+    monkeypatch.delenv("SAVY_CHECKSUM_POLICY", raising=False)
+    parser = create_eeg_parser()
+
+    samples, _ = parser.frame_to_samples(corrupt(frame))
+
+    assert parser.checksum_policy == ChecksumPolicy.WARN
+    assert len(samples) == 256 * 4 and all(s.is_valid for s in samples)
+    assert parser.drain_checksums() == 0
+
+
+def test_async_policy_flags_bad_footer(frame):
+    parser = EEGDataParser(checksum_policy=ChecksumPolicy.ASYNC_FLAG)
+
+    samples, _ = parser.frame_to_samples(corrupt(frame))
+    # Hashed on a worker thread, but samples only change when drained
+    parser.pending_checksums[0][0].result()
+    assert all(sample.is_valid for sample in samples)
+
+    assert parser.drain_checksums() == 1
+    assert samples and not any(sample.is_valid for sample in samples)
+    assert parser.drain_checksums() == 0
+
+
+def test_malformed_frame_parses_to_nothing():
+    assert EEGDataParser().frame_to_samples(b"\x00" * 20) == ([], [])
+
+
+async def test_buffer_ignores_empty_blocks():
+    buffer = EEGStreamBuffer()
+
+    await buffer.add_data([], [])
+    assert len(buffer) == 0
+
+    event = EEGEvent(timestamp=1.0, event_type="marker")
+    await buffer.add_data([], [event])
+    assert buffer.events == [event]
+
+    sample = EEGSample(timestamp=1.0, channel=EEGChannel.FP1, value=2.0)
+    await buffer.add_data([sample], [])
+    assert await buffer.get_window() == ([sample], [event])
+
+
+@pytest.mark.parametrize("n, max_points", [(1000, 100), (1001, 37), (50, 3)])
+def test_lttb_keeps_ends_and_one_point_per_bucket(n, max_points):
+    x = np.arange(n, dtype=np.float64)
+    y = np.random.default_rng(n).normal(size=n)
+
+    indices = lttb_downsample(x, y, max_points)
+
+    assert len(indices) == max_points
+    assert indices[0] == 0 and indices[-1] == n - 1
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    for i, index in enumerate(indices[1:-1]):
+        assert edges[i] <= index < edges[i + 1]
+
+
+def test_lttb_picks_the_spike():
+    y = np.zeros(1000)
+    y[417] = 50.0
+
+    indices = lttb_downsample(np.arange(1000.0), y, 20)
+
+    assert 417 in indices
+
+
+@pytest.mark.parametrize("n, max_points", [(1000, 100), (1003, 40), (7, 4)])
+def test_minmax_keeps_every_bucket_extreme(n, max_points):
+    y = np.random.default_rng(n).normal(size=n)
+
+    indices = minmax_downsample(y, max_points)
+
+    assert len(indices) <= max_points
+    assert np.all(np.diff(indices) > 0)
+    size = -(-n // (max_points // 2))
+    for start in range(0, n, size):
+        bucket = y[start : start + size]
+        assert start + int(np.argmin(bucket)) in indices
+        assert start + int(np.argmax(bucket)) in indices
+
+
+def test_downsampling_passes_short_signals_through():
+    y = np.arange(10.0)
+
+    assert np.array_equal(lttb_downsample(y, y, 10), np.arange(10))
+    assert np.array_equal(minmax_downsample(y, 20), np.arange(10))
@@ -0,0 +1,82 @@
+import threading
+
+import numpy as np
+import pytest
+from scipy import signal
+
+from services.eeg_spectral import (
+    ScratchPool,
+    SpectralCache,
+    cross_spectral_density,
+    magnitude_squared_coherence,
+    segment_spectra,
+    welch,
+)
+
+
+def test_scratch_pool_reuses_one_buffer_per_thread():
+    pool = ScratchPool(max_bytes=1 << 20)
+
+    first = pool.get((4, 100))
+    second = pool.get((8, 50))
+    assert second.shape == (8, 50)
+    assert np.shares_memory(first, second)
+
+    pool.get((3, 300), np.float32)
+    assert pool.nbytes == 2 * 4 * 100 * 8
+
+    held = {}
+    thread = threading.Thread(target=lambda: held.update(other=pool.get((4, 100))))
+    thread.start()
+    thread.join()
+    assert not np.shares_memory(first, held["other"])
+
+
+def test_scratch_pool_does_not_hold_oversized_requests():
+    pool = ScratchPool(max_bytes=1024)
+
+    big = pool.get((1000,))
+
+    assert big.shape == (1000,)
+    assert pool.nbytes == 0
+
+
+def test_scratch_stays_out_of_the_setup_cache():
+    cache = SpectralCache()
+    segments = np.random.default_rng(0).normal(size=(4, 3, 64))
+
+    for _ in range(3):
+        segment_spectra(segments, cache)
+
+    assert [kind for kind, _ in cache.entries] == ["window"]
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_welch_matches_scipy(recording):
+    frequencies, power = welch(recording.T, 256, 256)
+
+    expected_frequencies, expected = signal.welch(recording.T, 256, nperseg=256)
+    assert np.allclose(frequencies, expected_frequencies)
+    assert np.allclose(power, expected)
+
+
+@pytest.mark.parametrize("nperseg", [256, 200, 65])
+def test_cross_spectral_density_matches_scipy_csd(recording, nperseg):
+    frequencies, csd = cross_spectral_density(recording.T, 256, nperseg)
+
+    for i in range(4):
+        for j in range(4):
+            expected_frequencies, expected = signal.csd(
+                recording[:, i], recording[:, j], 256, nperseg=nperseg
+            )
+            assert np.allclose(csd[i, j], expected)
+    assert np.allclose(frequencies, expected_frequencies)
+
+
+def test_coherence_matches_scipy(recording):
+    _, csd = cross_spectral_density(recording.T, 256, 128)
+    coherence = magnitude_squared_coherence(csd)
+
+    _, expected = signal.coherence(recording[:, 0], recording[:, 2], 256, nperseg=128)
+    assert np.allclose(coherence[0, 2], expected)
+    assert np.allclose(np.einsum("iif->if", coherence), 1.0)
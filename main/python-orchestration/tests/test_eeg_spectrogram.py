@@ -0,0 +1,99 @@
+import base64
+
+import numpy as np
+import pytest
+from scipy import signal
+
+from services.eeg_spectrogram import (
+    HeatmapDtype,
+    SpectrogramBank,
+    StreamingSpectrogram,
+    encode_heatmap,
+)
+
+FS = 256
+
+
+def scipy_decibels(data: np.ndarray, nperseg: int, hop: int):
+    _, times, power = signal.spectrogram(
+        data.T, FS, window="hann", nperseg=nperseg, noverlap=nperseg - hop
+    )
+    return times, 10 * np.log10(power.transpose(2, 0, 1))
+
+
+@pytest.mark.parametrize("nperseg, hop", [(256, 64), (128, 128), (100, 33)])
+@pytest.mark.parametrize("seed", range(3))
+def test_blocks_match_scipy_spectrogram(recording, split_blocks, nperseg, hop, seed):
+    spectrogram = StreamingSpectrogram(FS, 4, nperseg, hop, max_columns=1000)
+    timestamps = np.arange(len(recording)) / FS
+
+    for block, times in zip(
+        split_blocks(recording, seed), split_blocks(timestamps, seed)
+    ):
+        spectrogram.process(block, times)
+
+    times, decibels = spectrogram.read()
+    expected_times, expected = scipy_decibels(recording, nperseg, hop)
+    assert np.allclose(times, expected_times)
+    assert np.allclose(decibels, expected, atol=1e-3)
+    assert np.allclose(spectrogram.frequencies, np.fft.rfftfreq(nperseg, 1 / FS))
+
+
+def test_ring_keeps_latest_columns_and_reads_since(recording):
+    spectrogram = StreamingSpectrogram(FS, 4, 256, 64, max_columns=8)
+    timestamps = np.arange(len(recording)) / FS
+
+    spectrogram.process(recording, timestamps)
+    times, decibels = spectrogram.read()
+
+    expected_times, expected = scipy_decibels(recording, 256, 64)
+    assert len(spectrogram) == 8
+    assert np.allclose(times, expected_times[-8:])
+    assert np.allclose(decibels, expected[-8:], atol=1e-3)
+
+    newer, _ = spectrogram.read(since=times[4])
+    assert np.array_equal(newer, times[5:])
+    latest, columns = spectrogram.read(limit=2)
+    assert np.array_equal(latest, times[-2:]) and len(columns) == 2
+
+
+def test_overlapping_blocks_are_not_counted_twice(recording):
+    timestamps = np.arange(len(recording)) / FS
+    once = StreamingSpectrogram(FS, 4, 256, 64)
+    overlapped = StreamingSpectrogram(FS, 4, 256, 64)
+
+    once.process(recording, timestamps)
+    overlapped.process(recording[:1500], timestamps[:1500])
+    overlapped.process(recording[1000:], timestamps[1000:])
+
+    assert np.array_equal(once.read()[1], overlapped.read()[1])
+
+
+def test_uint8_heatmap_round_trip():
+    decibels = np.linspace(-80, -20, 60, dtype=np.float32).reshape(6, 10)
+
+    heatmap = encode_heatmap(decibels, HeatmapDtype.UINT8, db_min=-80, db_max=-20)
+    quantized = np.frombuffer(base64.b64decode(heatmap["data"]), np.uint8)
+    decoded = heatmap["db_min"] + quantized / 255 * (
+        heatmap["db_max"] - heatmap["db_min"]
+    )
+
+    assert heatmap["shape"] == [6, 10]
+    assert np.allclose(decoded.reshape(6, 10), decibels, atol=60 / 255)
+
+    raw = encode_heatmap(decibels)
+    assert np.array_equal(
+        np.frombuffer(base64.b64decode(raw["data"]), "<f4").reshape(6, 10), decibels
+    )
+
+
+def test_bank_evicts_least_recently_used():
+    bank = SpectrogramBank(max_sessions=2)
+
+    bank.create("a", FS, 4)
+    bank.create("b", FS, 4)
+    bank.touch("a")
+    bank.create("c", FS, 4)
+
+    assert bank.peek("b") is None
+    assert bank.peek("a").nperseg == FS
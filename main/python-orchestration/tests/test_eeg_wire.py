@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from services.eeg_service import EEGChannel, EEGDataProcessor, EEGSample
+from services.eeg_wire import (
+    FRAME_ALIGN,
+    WireFormat,
+    from_binary_frame,
+    from_columnar_json,
+    negotiate_format,
+    to_binary_frame,
+    to_columnar_json,
+)
+
+
+@pytest.fixture
+def columnar(recording):
+    """Columnar payload with one contiguous and one decimated channel"""
+    processor = EEGDataProcessor(sampling_rate=256)
+    samples = [
+        EEGSample(timestamp=i / 256, channel=channel, value=float(row[c]))
+        for i, row in enumerate(recording[:300])
+        for c, channel in enumerate(list(EEGChannel)[:2])
+    ]
+    data = processor.columnar_channels(samples)
+    data["channels"]["fp2"] = processor.columnar_channels(samples, max_points=50)[
+        "channels"
+    ]["fp2"]
+    return data
+
+
+def assert_same_columns(decoded, original):
+    assert list(decoded["channels"]) == list(original["channels"])
+    for key, column in original["channels"].items():
+        np.testing.assert_array_equal(
+            decoded["channels"][key]["values"], column["values"]
+        )
+        if column["indices"] is None:
+            assert decoded["channels"][key]["indices"] is None
+        else:
+            np.testing.assert_array_equal(
+                decoded["channels"][key]["indices"], column["indices"]
+            )
+
+
+def test_columnar_json_round_trip(columnar):
+    assert columnar["channels"]["fp1"]["indices"] is None
+    assert len(columnar["channels"]["fp2"]["indices"]) <= 50
+
+    encoded = to_columnar_json(columnar)
+
+    assert encoded["encoding"] == "columnar"
+    assert encoded["channels"]["fp2"]["count"] == len(
+        columnar["channels"]["fp2"]["values"]
+    )
+    assert_same_columns(from_columnar_json(encoded), columnar)
+
+
+def test_binary_frame_round_trip(columnar):
+    frame = to_binary_frame(columnar, session_id="s1")
+
+    decoded = from_binary_frame(frame)
+
+    assert decoded["session_id"] == "s1"
+    assert decoded["encoding"] == "binary"
+    assert decoded["start_timestamp"] == columnar["start_timestamp"]
+    assert_same_columns(decoded, columnar)
+    # Columns are views into the frame at aligned offsets
+    base = np.frombuffer(frame, np.uint8).ctypes.data
+    for column in decoded["channels"].values():
+        for array in column.values():
+            if array is not None:
+                assert (array.ctypes.data - base) % FRAME_ALIGN == 0
+
+
+def test_binary_frame_rejects_foreign_bytes(columnar):
+    frame = to_binary_frame(columnar)
+
+    with pytest.raises(ValueError):
+        from_binary_frame(b"JUNK" + frame[4:])
+    with pytest.raises(ValueError):
+        from_binary_frame(frame[:4] + b"\x09\x00" + frame[6:])
+
+
+@pytest.mark.parametrize(
+    "accept, requested, expected",
+    [
+        (None, None, WireFormat.JSON),
+        ("application/vnd.savy.eeg.frame", None, WireFormat.BINARY),
+        (
+            "text/html, application/vnd.savy.eeg.columnar+json;q=0.9",
+            None,
+            WireFormat.COLUMNAR,
+        ),
+        ("application/vnd.savy.eeg.frame", WireFormat.JSON, WireFormat.JSON),
+    ],
+)
+def test_negotiate_format(accept, requested, expected):
+    assert negotiate_format(accept, requested) == expected
@@ -0,0 +1,114 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.brain_signal_generator import build_frame
+from services.ingest_gateway import ACK, LENGTH_PREFIX, IngestGateway
+
+
+def frame(block: int, session_id: str = "dev1") -> bytes:
+    data = np.random.default_rng(block).normal(0, 20, (64, 4))
+    return build_frame(data, 256, start_timestamp=float(block), session_id=session_id)
+
+
+@pytest.fixture
+async def gateway(monkeypatch):
+    """Plain-TCP gateway on a loopback port, recording what it hands on"""
+    monkeypatch.setenv("SAVY_CHECKSUM_POLICY", "strict")
+    received = []
+
+    async def handler(session_id, samples, events, header):
+        received.append((session_id, len(samples), header["sampling_rate"]))
+
+    opened = []
+
+    async def start(**kwargs):
+        server = IngestGateway(handler, None, host="127.0.0.1", port=0, **kwargs)
+        server.received = received
+        await server.start()
+        opened.append(server)
+        return server
+
+    yield start
+
+    for server in opened:
+        await server.close()
+
+
+async def connect(server: IngestGateway):
+    port = server.server.sockets[0].getsockname()[1]
+    return await asyncio.open_connection("127.0.0.1", port)
+
+
+async def send(reader, writer, payload: bytes):
+    writer.write(LENGTH_PREFIX.pack(len(payload)) + payload)
+    await writer.drain()
+    return ACK.unpack(await asyncio.wait_for(reader.readexactly(ACK.size), 2.0))
+
+
+async def test_frames_are_acked_and_handed_on(gateway):
+    server = await gateway()
+    reader, writer = await connect(server)
+
+    assert await send(reader, writer, frame(0)) == (1, 64 * 4)
+    assert await send(reader, writer, frame(1, "dev2")) == (2, 64 * 4)
+
+    corrupt = bytearray(frame(2))
+    corrupt[40] ^= 0xFF
+    assert await send(reader, writer, bytes(corrupt)) == (3, -1)
+    assert await send(reader, writer, frame(3)) == (4, 64 * 4)
+
+    assert [session for session, _, _ in server.received] == ["dev1", "dev2", "dev1"]
+    assert all(count == 256 and rate == 256 for _, count, rate in server.received)
+    writer.close()
+
+
+@pytest.mark.parametrize("length", [8, 1 << 20])
+async def test_bad_frame_length_closes_the_connection(gateway, length):
+    server = await gateway(max_frame_bytes=1 << 16)
+    reader, writer = await connect(server)
+
+    writer.write(LENGTH_PREFIX.pack(length))
+    await writer.drain()
+
+    assert await asyncio.wait_for(reader.read(), 2.0) == b""
+    assert server.received == [] and not server.connections
+    writer.close()
+
+
+async def test_silent_connection_is_closed(gateway):
+    server = await gateway(idle_timeout=0.1)
+    reader, writer = await connect(server)
+
+    assert await send(reader, writer, frame(0)) == (1, 256)
+    # A frame cut short counts as silence too
+    writer.write(LENGTH_PREFIX.pack(len(frame(1))) + frame(1)[:40])
+    await writer.drain()
+
+    assert await asyncio.wait_for(reader.read(), 2.0) == b""
+    assert len(server.received) == 1
+    writer.close()
+
+
+async def test_connections_past_the_limit_are_refused(gateway):
+    server = await gateway(max_connections=1)
+    reader, writer = await connect(server)
+    assert await send(reader, writer, frame(0)) == (1, 256)
+
+    extra_reader, extra_writer = await connect(server)
+    assert await asyncio.wait_for(extra_reader.read(), 2.0) == b""
+
+    # The admitted connection keeps working, and its slot frees on close
+    assert await send(reader, writer, frame(1)) == (2, 256)
+    writer.close()
+    await writer.wait_closed()
+    for _ in range(100):
+        if not server.connections:
+            break
+        await asyncio.sleep(0.01)
+
+    reader, writer = await connect(server)
+    assert await send(reader, writer, frame(2)) == (1, 256)
+    writer.close()
+    extra_writer.close()
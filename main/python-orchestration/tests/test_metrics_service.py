@@ -0,0 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from services.metrics_service import Counter, Histogram
+
+
+def test_concurrent_updates_are_not_lost():
+    histogram = Histogram("stage_seconds", "Stage latency", ["stage"])
+    counter = Counter("errors_total", "Errors", ["stage"])
+
+    def record(_):
+        for _ in range(2000):
+            histogram.observe(0.003, "decode")
+            counter.inc(1.0, "decode")
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(record, range(8)))
+
+    assert sum(histogram.values[("decode",)][:-1]) == 16000
+    assert counter.values[("decode",)] == 16000
+    assert 'stage_seconds_count{stage="decode"} 16000' in histogram.samples()
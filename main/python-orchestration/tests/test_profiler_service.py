@@ -0,0 +1,37 @@
+from services.profiler_service import ProfileManager, SamplingProfiler
+
+
+def test_overlapping_records_keep_recording():
+    profiler = SamplingProfiler()
+
+    with profiler.record():
+        with profiler.record():
+            assert profiler.recording
+        # The inner block finishing first must not stop the outer one
+        assert profiler.recording
+    assert not profiler.recording
+
+
+def test_silent_session_profile_expires(tmp_path):
+    profiles = ProfileManager(output_dir=str(tmp_path), interval=0.001)
+    profiles.enable_session("s1", duration=0.05, output_format="collapsed")
+    thread = profiles.sessions["s1"].profiler._thread
+
+    # No block arrives: the sampler stops at the deadline on its own
+    thread.join(timeout=2.0)
+    assert not thread.is_alive()
+
+    listed = profiles.list_profiles()
+    assert "s1" not in profiles.sessions
+    assert [p["file"].endswith(".folded") for p in listed] == [True]
+
+
+def test_profiles_written_in_the_same_second_do_not_collide(tmp_path):
+    profiles = ProfileManager(output_dir=str(tmp_path))
+
+    paths = set()
+    for _ in range(3):
+        with profiles.profile("request-GET-/health", "collapsed") as path:
+            paths.add(path)
+
+    assert len(paths) == 3 and len(profiles.list_profiles()) == 3
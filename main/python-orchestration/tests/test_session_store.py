@@ -0,0 +1,173 @@
+import asyncio
+import os
+import time
+import uuid
+
+import numpy as np
+import pytest
+
+from services.eeg_service import EEGChannel, EEGEvent, EEGSample
+from services.session_store import SessionManager, SharedMemorySessionStore, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="needs POSIX flock")
+
+
+def samples(first: int, count: int, rate: int = 64):
+    return [
+        EEGSample(timestamp=i / rate, channel=EEGChannel.FP1, value=float(i))
+        for i in range(first, first + count)
+    ]
+
+
+@pytest.fixture
+def shm_stores(tmp_path):
+    """Stores on one namespace, as separate workers on the host would open"""
+    namespace = f"t{uuid.uuid4().hex[:8]}"
+    opened = []
+
+    def open_store(**kwargs):
+        store = SharedMemorySessionStore(
+            namespace, lock_dir=str(tmp_path / "locks"), **kwargs
+        )
+        opened.append(store)
+        return store
+
+    yield open_store
+
+    for session_id in list(opened[0]):
+        del opened[0][session_id]
+    for store in opened:
+        store.close()
+    opened[0].registry_shm.unlink()
+
+
+def test_buffer_opens_its_lock_file_once(shm_stores, monkeypatch):
+    buffer = shm_stores().create("s1")
+    opened = []
+    monkeypatch.setattr(os, "open", lambda *a, **k: opened.append(a))
+
+    for _ in range(3):
+        buffer.records()
+        len(buffer.samples)
+    assert opened == []
+
+
+async def test_contended_write_waits_off_the_event_loop(shm_stores):
+    buffer = shm_stores().create("s1")
+    other = shm_stores()["s1"]
+
+    buffer.lock.acquire(fcntl.LOCK_EX)
+    write = asyncio.create_task(other.add_data(samples(0, 10), []))
+    ticks = 0
+    for _ in range(5):
+        await asyncio.sleep(0.01)
+        ticks += 1
+    assert ticks == 5 and not write.done()
+
+    buffer.lock.release()
+    await write
+    assert len(buffer) == 10
+
+
+async def test_cancelled_wait_gives_the_lock_back(shm_stores):
+    buffer = shm_stores().create("s1")
+    other = shm_stores()["s1"]
+
+    buffer.lock.acquire(fcntl.LOCK_EX)
+    write = asyncio.create_task(other.add_data(samples(0, 10), []))
+    await asyncio.sleep(0.01)
+    write.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await write
+    buffer.lock.release()
+
+    await asyncio.wait_for(other.add_data(samples(10, 5), []), timeout=2.0)
+    assert len(buffer) == 5
+
+
+async def test_writes_are_visible_to_attached_workers(shm_stores):
+    first, second = shm_stores(), shm_stores()
+    marker = EEGEvent(timestamp=0.5, event_type="marker", channel=EEGChannel.FP1)
+
+    await first.create("s1").add_data(samples(0, 64), [marker])
+    assert "s1" in second and list(second) == ["s1"]
+    records, events = second["s1"].records()
+    assert records["value"].tolist() == [float(i) for i in range(64)]
+    assert events == [marker]
+
+    # A stopped and restarted session is re-attached, not served stale
+    del first["s1"]
+    assert "s1" not in second
+    first.create("s1")
+    assert len(second["s1"]) == 0
+
+
+async def test_buffers_removed_by_other_workers_are_closed(shm_stores, tmp_path):
+    first, second = shm_stores(), shm_stores()
+    for session_id in ("kept", "gone", "restarted"):
+        first.create(session_id)
+    stale = {sid: buffer for sid, buffer in second.items()}
+    lock_path = stale["gone"].lock_path
+
+    del first["gone"]
+    del first["restarted"]
+    first.create("restarted")
+    assert not os.path.exists(lock_path)
+
+    # The listing (as the sweep runs it) drops what the registry no longer has
+    assert [sid for sid, _ in second.items()] == ["kept", "restarted"]
+    assert set(second.attached) == {"kept", "restarted"}
+    assert stale["gone"].lock.fd is None and stale["restarted"].lock.fd is None
+    assert second["restarted"] is not stale["restarted"]
+    assert second["kept"] is stale["kept"]
+    assert sorted(os.listdir(tmp_path / "locks")) == sorted(
+        ["registry.lock", *(os.path.basename(b.lock_path) for _, b in second.items())]
+    )
+
+
+def test_lookups_do_not_take_the_registry_lock(shm_stores):
+    first, second = shm_stores(), shm_stores()
+    first.create("s1")
+
+    first.lock.acquire(fcntl.LOCK_EX)
+    try:
+        assert "s1" in second and len(second) == 1
+        assert second["s1"] is second.get_or_create("s1")
+    finally:
+        first.lock.release()
+
+    # A writer that died mid-update leaves the sequence odd; reads fall back
+    # to the shared lock, which the dead writer no longer holds
+    second.sequence[...] = int(second.sequence) | 1
+    assert list(second) == ["s1"]
+    first.create("s2")
+    assert int(second.sequence) % 2 == 0 and list(second) == ["s1", "s2"]
+
+
+async def test_idle_and_over_budget_sessions_are_evicted(shm_stores):
+    store = shm_stores()
+    for session_id in ("old", "idle", "new"):
+        await store.create(session_id).add_data(samples(0, 8), [])
+    store["idle"].header["last_activity"] = time.time() - 120
+    store["old"].header["last_activity"] = time.time() - 10
+
+    sessions = SessionManager(store, idle_ttl=60.0, max_bytes=store["new"].nbytes)
+    assert sessions.sweep() == ["idle", "old"]
+    assert list(shm_stores()) == ["new"]
+
+
+async def test_evicted_session_is_spilled_and_rehydrated(shm_stores, tmp_path):
+    sessions = SessionManager(shm_stores(), spill_dir=str(tmp_path / "spill"))
+    marker = EEGEvent(timestamp=0.25, event_type="marker")
+    await sessions.create("s1").add_data(samples(0, 32), [marker])
+    before, _ = sessions["s1"].records()
+
+    assert sessions.evict("s1")
+    assert "s1" not in sessions.store and "s1" in sessions
+
+    # Another worker picks the session up from the spill file
+    other = SessionManager(shm_stores(), spill_dir=str(tmp_path / "spill"))
+    records, events = other["s1"].records()
+    np.testing.assert_array_equal(records, before)
+    assert events == [marker]
+    assert "s1" in sessions.store and not sessions._is_spilled("s1")